@@ -0,0 +1,197 @@
+import re
+import threading
+import time
+from collections import Counter
+
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+_CELL = re.compile(r"^([A-Z]*)(\d*)$")
+
+def parse_range(rng: str) -> tuple[int, int, int | None, int | None]:
+    """A1 range -> (first_row, first_col, last_row, last_col), 1-based; None = open-ended."""
+    rng = rng.split("!")[-1]
+    a, _, b = rng.partition(":")
+    b = b or a
+    (c1, r1), (c2, r2) = _CELL.match(a).groups(), _CELL.match(b).groups()
+    col = lambda c: a1_to_rowcol(f"{c}1")[1] if c else None
+    return int(r1 or 1), col(c1) or 1, (int(r2) if r2 else None), col(c2)
+
+def _trim(rows: list) -> list:
+    """Drop trailing empty cells and rows, as the Sheets API does."""
+    out = []
+    for r in rows:
+        r = list(r)
+        while r and r[-1] == "":
+            r.pop()
+        out.append(r)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title: str, sheet_id: int, rows: list, grid_rows: int = 1000, cols: int = 26):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self.rows = [[str(c) for c in r] for r in rows]
+        self.row_count = max(grid_rows, len(self.rows))
+        self.col_count = cols
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        self.spreadsheet.log(name)
+
+    def _slice(self, rng: str) -> list:
+        r1, c1, r2, c2 = parse_range(rng)
+        return _trim([r[c1 - 1:c2] for r in self.rows[r1 - 1:r2]])
+
+    # ----- reads -----
+
+    def get(self, rng: str, **kwargs) -> list:
+        self._call("get")
+        with self._lock:
+            return self._slice(rng)
+
+    def batch_get(self, ranges: list, **kwargs) -> list:
+        self._call("batch_get")
+        with self._lock:
+            return [self._slice(r) for r in ranges]
+
+    def get_all_values(self, **kwargs) -> list:
+        self._call("get_all_values")
+        with self._lock:
+            return _trim(self.rows)
+
+    def get_all_records(self, **kwargs) -> list[dict]:
+        header, *rows = self.get_all_values() or [[]]
+        return [dict(zip(header, r + [""] * (len(header) - len(r)))) for r in rows]
+
+    def row_values(self, row: int, **kwargs) -> list:
+        self._call("row_values")
+        with self._lock:
+            return _trim(self.rows[row - 1:row])[0] if row <= len(self.rows) else []
+
+    # ----- writes -----
+
+    def _set_row(self, n: int, values: list, first_col: int = 1) -> None:
+        while len(self.rows) < n:
+            self.rows.append([])
+        row = self.rows[n - 1]
+        row += [""] * (first_col - 1 + len(values) - len(row))
+        row[first_col - 1:first_col - 1 + len(values)] = [str(v) for v in values]
+        self.row_count = max(self.row_count, n)
+
+    def _response(self, first: int, values: list) -> dict:
+        last_col = rowcol_to_a1(1, max((len(v) for v in values), default=1))[:-1]
+        return {"updatedRange": f"'{self.title}'!A{first}:{last_col}{first + len(values) - 1}",
+                "updatedRows": len(values), "updatedData": {"values": [[str(c) for c in v] for v in values]}}
+
+    def update(self, rng, values=None, **kwargs) -> dict:
+        self._call("update")
+        if not isinstance(rng, str):  # gspread 6 order: update(values, range_name)
+            rng, values = values or "A1", rng
+        r1, c1, _, _ = parse_range(rng)
+        with self._lock:
+            for n, v in enumerate(values):
+                self._set_row(r1 + n, v, c1)
+            return self._response(r1, values)
+
+    def batch_update(self, data: list, **kwargs) -> dict:
+        self._call("batch_update")
+        responses = []
+        with self._lock:
+            for d in data:
+                r1, c1, _, _ = parse_range(d["range"])
+                for n, v in enumerate(d["values"]):
+                    self._set_row(r1 + n, v, c1)
+                responses.append(self._response(r1, d["values"]))
+        return {"responses": responses}
+
+    def append_rows(self, values: list, **kwargs) -> dict:
+        self._call("append_rows")
+        with self._lock:
+            while self.rows and not any(self.rows[-1]):
+                self.rows.pop()
+            first = len(self.rows) + 1
+            for n, v in enumerate(values):
+                self._set_row(first + n, v)
+            return {"updates": self._response(first, values)}
+
+    def append_row(self, values: list, **kwargs) -> dict:
+        return self.append_rows([values], **kwargs)
+
+    def freeze(self, rows=None, cols=None) -> None:
+        self._call("freeze")
+
+class FakeSpreadsheet:
+    """
+    In-memory stand-in for a gspread Spreadsheet and its worksheets, implementing
+    only the calls the app makes, with the same argument and response shapes.
+    Every call is counted in ``calls`` so a scenario can report what it would cost
+    in Sheets requests. ``latency`` (seconds) is slept on every call to approximate
+    a round trip to Google; the default of 0 times the app alone.
+    """
+
+    def __init__(self, tabs: dict | None = None, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self._sheets = {}
+        self._lock = threading.Lock()
+        for title, rows in (tabs or {}).items():
+            self.add_worksheet(title, rows=len(rows) + 100, cols=26, values=rows, log=False)
+
+    def log(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def reset_calls(self) -> Counter:
+        with self._lock:
+            calls, self.calls = self.calls, Counter()
+        return calls
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        try:
+            return self._sheets[title]
+        except KeyError:
+            raise WorksheetNotFound(title) from None
+
+    def worksheets(self) -> list:
+        return list(self._sheets.values())
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, values=None, log: bool = True) -> FakeWorksheet:
+        if log:
+            self.log("add_worksheet")
+        ws = FakeWorksheet(self, title, len(self._sheets) + 1, values or [], rows, cols)
+        self._sheets[title] = ws
+        return ws
+
+    def fetch_sheet_metadata(self, params=None) -> dict:
+        self.log("fetch_sheet_metadata")
+        return {"sheets": [
+            {"properties": {"sheetId": ws.id, "title": ws.title,
+                            "gridProperties": {"rowCount": ws.row_count, "columnCount": ws.col_count}}}
+            for ws in self._sheets.values()
+        ]}
+
+    def batch_update(self, body: dict) -> dict:
+        """Only deleteDimension (row deletes) is supported."""
+        self.log("batch_update")
+        by_id = {ws.id: ws for ws in self._sheets.values()}
+        for req in body.get("requests", []):
+            rng = req["deleteDimension"]["range"]
+            ws = by_id[rng["sheetId"]]
+            with ws._lock:
+                del ws.rows[rng["startIndex"]:rng["endIndex"]]
+        return {"replies": [{} for _ in body.get("requests", [])]}
+
+class FakeClient:
+    """What get_gc() returns: opens the one fake spreadsheet whatever the key."""
+
+    def __init__(self, spreadsheet: FakeSpreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        return self.spreadsheet
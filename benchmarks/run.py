@@ -0,0 +1,233 @@
+"""
+Offline benchmarks for the data paths behind the app's panels.
+
+Runs timed scenarios (cold load, warm load, latest-status rebuild, search,
+today board, open board, edit lookup, append) against synthetic histories held
+in an in-memory fake of the Sheets API, so no credentials or network are needed:
+
+    python -m benchmarks.run                       # 5k and 50k rows
+    python -m benchmarks.run --sizes 5k 50k 500k --repeat 5
+    python -m benchmarks.run --save bench.json     # record a baseline
+    python -m benchmarks.run --baseline bench.json # exit 1 on regressions
+
+The app is a Streamlit script, so it cannot simply be imported: its
+definitions (imports, functions, classes, UPPER_CASE settings) are loaded
+without running the page, and get_gc() is pointed at the fake spreadsheet.
+Settings come from --set KEY=VALUE the same way the app reads st.secrets.
+"""
+import argparse
+import ast
+import datetime as dt
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import types
+
+import streamlit as st
+from streamlit.logger import set_log_level
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from benchmarks.synthetic import SIZES, history
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+DEFAULT_SETTINGS = {
+    "TURNOVER_SPREADSHEET_ID": "benchmark",
+    "STALE_WHILE_REVALIDATE": "false",   # time the load itself, not a background refresh
+    # Time the app, not the quota pacing (API calls are reported separately);
+    # pass --set SHEETS_READS_PER_MIN=60 to include it
+    "SHEETS_READS_PER_MIN": "1000000",
+    "SHEETS_WRITES_PER_MIN": "1000000",
+}
+
+def load_app(settings: dict) -> types.ModuleType:
+    """The app's definitions as a module, without executing the page."""
+    st.secrets = dict(settings)  # the app only ever calls st.secrets.get(...)
+    tree = ast.parse(open(APP_PATH, encoding="utf-8").read(), APP_PATH)
+    keep = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)):
+            keep.append(node)
+        elif isinstance(node, ast.Try) and isinstance(node.body[0], (ast.Import, ast.ImportFrom)):
+            keep.append(node)  # optional dependencies
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            target = node.targets[0] if isinstance(node, ast.Assign) else node.target
+            if isinstance(target, ast.Name) and target.id.lstrip("_").isupper():
+                keep.append(node)
+    app = types.ModuleType("streamlit_app")
+    app.__file__ = APP_PATH
+    exec(compile(ast.Module(body=keep, type_ignores=[]), APP_PATH, "exec"), app.__dict__)
+    return app
+
+# ===================== Scenarios =====================
+
+class Bench:
+    """One app instance over one synthetic history."""
+
+    def __init__(self, app, tabs: dict, latency: float, seed: int = 3):
+        self.app, self.tabs, self.latency = app, tabs, latency
+        self.rng = random.Random(seed)
+        self.book = None
+        self.appended = 0
+        wos = sorted({r[0] for r in tabs["Entries"][1:]})
+        self.sample_wos = self.rng.sample(wos, min(200, len(wos)))
+        titles = [r[1] for r in tabs["Entries"][1:50]]
+        self.queries = [self.sample_wos[0][:4], titles[0].split()[0].lower(), " ".join(titles[1].split()[:2]).lower(),
+                        "sensor", "zzzz-no-match"]
+
+    def fresh_book(self) -> None:
+        """New fake spreadsheet and empty app caches: the next read is a cold load."""
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        self.book = FakeSpreadsheet(self.tabs, latency=self.latency)
+        client = FakeClient(self.book)
+        self.app.get_gc = lambda *a, **k: client
+
+    # ----- scenarios (each returns nothing; timed by run_scenario) -----
+
+    def cold_load(self):
+        self.app.load_df()
+        self.app.load_rfm_df()
+
+    def warm_load(self):
+        self.app.load_df()
+        self.app.load_rfm_df()
+
+    def latest_status(self):
+        self.app.latest_status_by_wo(self.app.load_df())
+
+    def search_indexed(self):
+        a, svc = self.app, self.app.data_service()
+        df = svc.frame(a.TAB_NAME)[1]
+        for q in self.queries:
+            a.apply_filters(df, q, None, None, [], [], index=svc)
+
+    def search_scan(self):
+        a = self.app
+        df = a.data_service().frame(a.TAB_NAME)[1]
+        for q in self.queries:
+            a.apply_filters(df, q, None, None, [], [])
+
+    def today_board(self):
+        """The data and HTML work of the Today's WOs panel (widgets excluded)."""
+        a, svc = self.app, self.app.data_service()
+        todays = a.drop_rfm_rows(svc.today(a.TAB_NAME, dt.date.today()))
+        todays = a.apply_filters(todays, "", None, None, [], [], index=svc)
+        latest_today = todays.sort_values("CreatedAt").groupby("WO", as_index=False, observed=True).tail(1)
+        blocks = []
+        for _, r in latest_today.iterrows():
+            thread = svc.thread(a.TAB_NAME, str(r["WO"]))
+            last = thread.tail(1).iloc[0] if not thread.empty else r
+            summary = a.wo_line(str(r["WO"]), str(last.get("Title", "")), str(last.get("Resolution", "")))
+            blocks.append(a.details_block(summary, a.history_html(thread)))
+        "\n".join(blocks)
+
+    def open_board(self):
+        """The Open WOs panel: latest state, open filter, sort and the first page with histories."""
+        a, svc = self.app, self.app.data_service()
+        latest = svc.latest(a.TAB_NAME)
+        open_wo = a.drop_rfm_rows(latest[~latest["Status"].isin(["Completed", "RTS", "WMATL"])])
+        open_wo = a.apply_filters(open_wo, "", None, None, [], [], index=svc)
+        open_wo = a.sort_latest(open_wo, "Oldest first", "WO")
+        for _, r in open_wo.iloc[:25].iterrows():
+            a.colored_status(str(r["Status"]))
+            a.history_html(svc.thread(a.TAB_NAME, r["WO"]))
+
+    def edit_lookup(self):
+        for wo in self.sample_wos:
+            self.app._latest_rownum_for_wo(wo)
+
+    def append(self):
+        """One entry through the write queue, including its WRITE_FLUSH_SECS batching window."""
+        self.appended += 1
+        now = dt.datetime.now()
+        self.app.append_entry({
+            "WO": self.sample_wos[self.appended % len(self.sample_wos)], "Title": "Benchmark entry",
+            "Resolution": "Appended by the benchmark", "Date": now.date().isoformat(), "Location": "JOW General",
+            "Status": "WIP", "EntryID": f"BENCH-{os.getpid()}-{self.appended}",
+            "CreatedAt": now.isoformat(timespec="seconds"),
+        })
+
+SCENARIOS = ["cold_load", "warm_load", "latest_status", "search_indexed", "search_scan",
+             "today_board", "open_board", "edit_lookup", "append"]
+
+def run_scenario(bench: Bench, name: str, repeat: int) -> dict:
+    fn = getattr(bench, name)
+    times, calls = [], 0
+    if name != "cold_load":
+        fn()  # warm-up: builds the derived views this scenario reads
+    for _ in range(repeat):
+        if name == "cold_load":
+            bench.fresh_book()
+        bench.book.reset_calls()
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1000)
+        calls += sum(bench.book.reset_calls().values())
+    return {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3),
+            "api_calls": round(calls / repeat, 2)}
+
+def run(sizes: list, repeat: int, scenarios: list, settings: dict, latency: float) -> dict:
+    app = load_app(settings)
+    results = {}
+    for size in sizes:
+        t = time.perf_counter()
+        tabs = history(size)
+        print(f"# {size}: {len(tabs['Entries']) - 1} entry rows, {len(tabs['RFM']) - 1} RFM rows "
+              f"(generated in {time.perf_counter() - t:.1f}s)", file=sys.stderr)
+        bench = Bench(app, tabs, latency)
+        bench.fresh_book()
+        for name in scenarios:
+            results[f"{size}/{name}"] = run_scenario(bench, name, repeat)
+            r = results[f"{size}/{name}"]
+            print(f"{size:>6}  {name:<15} {r['median_ms']:>11.2f} {r['min_ms']:>11.2f} {r['api_calls']:>9}")
+    return results
+
+def regressions(results: dict, baseline: dict, tolerance: float, floor_ms: float = 1.0) -> list[str]:
+    """Scenarios slower than tolerance x baseline (ignoring sub-millisecond noise) or making more API calls."""
+    out = []
+    for key, r in results.items():
+        b = baseline.get(key)
+        if not b:
+            continue
+        if r["median_ms"] > max(b["median_ms"] * tolerance, b["median_ms"] + floor_ms):
+            out.append(f"{key}: {b['median_ms']:.2f} -> {r['median_ms']:.2f} ms")
+        if r["api_calls"] > b["api_calls"]:
+            out.append(f"{key}: {b['api_calls']} -> {r['api_calls']} API calls")
+    return out
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--sizes", nargs="+", default=["5k", "50k"], help=f"any of {', '.join(SIZES)} or a row count")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    p.add_argument("--latency", type=float, default=0.0, help="seconds slept per fake Sheets call")
+    p.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                   help="app setting, as it would be read from secrets (repeatable)")
+    p.add_argument("--save", help="write results as JSON")
+    p.add_argument("--baseline", help="compare with a saved JSON; exit 1 on regressions")
+    p.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown vs the baseline")
+    args = p.parse_args(argv)
+
+    set_log_level("error")  # bare mode: "missing ScriptRunContext" warnings on every cached call
+    settings = dict(DEFAULT_SETTINGS, **dict(s.split("=", 1) for s in args.set))
+    sizes = [s if s in SIZES else int(s) for s in args.sizes]
+    print(f"{'size':>6}  {'scenario':<15} {'median ms':>11} {'min ms':>11} {'API calls':>9}")
+    results = run(sizes, args.repeat, args.scenarios, settings, args.latency)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import datetime as dt
+import random
+
+# Mirrors the app's vocabularies (LOCATIONS / STATUSES / RFM statuses in streamlit_app.py)
+LOCATIONS = [
+    "JOW General", "JOW Sc 1", "JOW Sc 2", "JOW Sc 3", "JOW Sc 4", "JOW Sc 5", "JOW Sc 6", "JOW Sc 7", "JOW Sc 8",
+    "World Celebration Gardens", "Creations", "Connections", "CommuniCore Hall", "Benchwork",
+]
+ENTRY_HEADERS = ["WO", "Title", "Resolution", "Date", "Location", "Status", "Attachments", "EntryID", "CreatedAt"]
+RFM_HEADERS = ["RFM", "Title", "Description", "Date", "Location", "Status", "Attachments", "EntryID", "CreatedAt"]
+
+# Where a thread ends up: most work orders get closed, a tail stays open or waits on material
+FINAL_STATUS = [("Completed", 0.50), ("RTS", 0.12), ("WIP", 0.22), ("APPR", 0.08), ("WMATL", 0.08)]
+RFM_FINAL_STATUS = [("Close", 0.55), ("PO Created", 0.20), ("WAPPR", 0.15), ("Draft", 0.10)]
+
+SIZES = {"5k": 5_000, "50k": 50_000, "500k": 500_000}
+
+_EQUIPMENT = ["pump", "HVAC unit", "door actuator", "projector", "lighting rig", "audio amp", "show control PLC",
+              "fountain valve", "elevator", "fire panel", "conveyor", "vehicle", "compressor", "handrail", "kiosk"]
+_FAULTS = ["no power", "noisy", "leaking", "intermittent fault", "won't reset", "out of alignment",
+           "overheating", "error code E42", "loose fitting", "worn belt", "failed sensor", "cracked panel"]
+_WORK = ["Inspected and cleaned", "Replaced fuse", "Reset breaker", "Ordered replacement part", "Tightened fittings",
+         "Recalibrated", "Swapped board", "Lubricated", "Ran full cycle test", "Waiting on vendor",
+         "Replaced sensor", "Updated firmware", "Adjusted limit switch", "Removed debris"]
+
+def _pick(rng: random.Random, weighted: list) -> str:
+    return rng.choices([s for s, _ in weighted], weights=[w for _, w in weighted])[0]
+
+def _thread_length(rng: random.Random) -> int:
+    """Most WOs get 1-3 entries, a long tail gets many (geometric, capped)."""
+    n = 1
+    while n < 25 and rng.random() < 0.62:
+        n += 1
+    return n
+
+def _path(final: str, length: int, statuses: tuple) -> list:
+    """Statuses along a thread: early entries walk the open states, the last one is ``final``."""
+    opens = [s for s in statuses if s != final]
+    return [opens[min(i, len(opens) - 1)] for i in range(length - 1)] + [final]
+
+def entries_history(rows: int, seed: int = 7, today: dt.date | None = None, days: int = 730,
+                    today_share: float = 0.01) -> list[list[str]]:
+    """
+    Entries tab (header included) with ``rows`` data rows grouped into WO threads.
+    Dates span ``days`` back from ``today``, newer work being more common, and
+    about ``today_share`` of the threads have an entry today. Rows are in append
+    order (CreatedAt ascending), like the real sheet.
+    """
+    rng = random.Random(seed)
+    today = today or dt.date.today()
+    threads, wo = [], 5_000_000
+    total = 0
+    while total < rows:
+        wo += rng.randint(1, 40)
+        n = min(_thread_length(rng), rows - total)
+        if rng.random() < today_share:
+            start = 0
+        else:
+            start = min(int(rng.expovariate(1 / (days / 4))), days)
+        threads.append((str(wo), n, start))
+        total += n
+
+    out = []
+    for wo, n, start in threads:
+        title = f"{rng.choice(_EQUIPMENT).title()} {rng.choice(_FAULTS)}"
+        loc = rng.choice(LOCATIONS)
+        statuses = _path(_pick(rng, FINAL_STATUS), n, ("APPR", "WIP"))
+        day = today - dt.timedelta(days=start)
+        prev = dt.datetime.min
+        for i in range(n):
+            d = day - dt.timedelta(days=(n - 1 - i) * rng.randint(0, 3))
+            stamp = dt.datetime.combine(d, dt.time(6)) + dt.timedelta(minutes=rng.randint(0, 900))
+            stamp = prev = max(stamp, prev + dt.timedelta(minutes=1))  # thread entries stay in order
+            d = max(d, stamp.date())
+            attach = f"https://drive.example/{wo}-{i}" if rng.random() < 0.05 else ""
+            out.append((stamp, [wo, title, f"{rng.choice(_WORK)}; {rng.choice(_FAULTS)} checked", d.isoformat(),
+                                loc, statuses[i], attach, f"E{wo}-{i}", stamp.isoformat(timespec="seconds")]))
+    out.sort(key=lambda x: x[0])
+    return [list(ENTRY_HEADERS)] + [r for _, r in out]
+
+def rfm_history(rows: int, seed: int = 11, today: dt.date | None = None, days: int = 730) -> list[list[str]]:
+    """RFM tab (header included): shorter threads, same shape as entries_history."""
+    rng = random.Random(seed)
+    today = today or dt.date.today()
+    out, rfm = [], 10_000
+    while len(out) < rows:
+        rfm += 1
+        n = min(max(1, _thread_length(rng) // 2), rows - len(out))
+        statuses = _path(_pick(rng, RFM_FINAL_STATUS), n, ("Draft", "WAPPR", "PO Created"))
+        day = today - dt.timedelta(days=min(int(rng.expovariate(1 / (days / 4))), days))
+        loc, title = rng.choice(LOCATIONS), f"{rng.choice(_EQUIPMENT).title()} parts"
+        for i in range(n):
+            stamp = dt.datetime.combine(day, dt.time(7)) + dt.timedelta(hours=i, minutes=rng.randint(0, 59))
+            out.append((stamp, [f"RFM{rfm}", title, f"Qty {rng.randint(1, 12)}", day.isoformat(), loc,
+                                statuses[i], "", f"R{rfm}-{i}", stamp.isoformat(timespec="seconds")]))
+    out.sort(key=lambda x: x[0])
+    return [list(RFM_HEADERS)] + [r for _, r in out]
+
+def history(size: str | int, seed: int = 7, today: dt.date | None = None) -> dict:
+    """{'Entries': rows, 'RFM': rows} for a named size ('5k', '50k', '500k') or a row count."""
+    rows = SIZES[size] if isinstance(size, str) else int(size)
+    return {"Entries": entries_history(rows, seed, today), "RFM": rfm_history(max(50, rows // 20), seed + 1, today)}
@@ -0,0 +1,104 @@
+import csv
+import hashlib
+import io
+import sqlite3
+import threading
+import time
+
+def source_digest(fileobj, block: int = 1 << 20) -> str:
+    """sha1 of a (seekable) file's bytes, read in blocks; the file is rewound afterwards."""
+    h = hashlib.sha1()
+    fileobj.seek(0)
+    while True:
+        data = fileobj.read(block)
+        if not data:
+            break
+        h.update(data.encode("utf-8") if isinstance(data, str) else data)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+def iter_import_chunks(fileobj, headers: list[str], aliases: dict, chunk_rows: int = 500, skip: int = 0):
+    """
+    Stream a CSV (binary or text file object) as (consumed, rows) chunks, where
+    rows are dicts keyed by ``headers`` and consumed counts the CSV data rows
+    read so far (blank lines included), so it can be checkpointed and passed
+    back as ``skip`` to resume. Column names are stripped and mapped through
+    ``aliases``; unknown columns are ignored and missing ones come back as "".
+    """
+    text = fileobj if isinstance(fileobj, io.TextIOBase) else io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    names = [aliases.get(c.strip(), c.strip()) for c in next(reader, [])]
+    pos = [(h, names.index(h)) for h in headers if h in names]
+    chunk, consumed = [], 0
+    for r in reader:
+        consumed += 1
+        if consumed <= skip or not any(c.strip() for c in r):
+            continue
+        chunk.append({h: (r[i].strip() if i < len(r) else "") for h, i in pos})
+        if len(chunk) >= chunk_rows:
+            yield consumed, chunk
+            chunk = []
+    if chunk or consumed > skip:
+        yield consumed, chunk
+    if not isinstance(fileobj, io.TextIOBase):
+        text.detach()  # leave the caller's file open
+
+def write_csv_chunks(out, chunks, width: int) -> int:
+    """
+    Write (start_row, rows) chunks, as yielded by gsheets_drive.read_chunks, to a
+    text file object as CSV one chunk at a time; rows are padded/cut to width
+    and blank rows are dropped. Returns the number of rows written.
+    """
+    writer = csv.writer(out)
+    written = 0
+    for _, rows in chunks:
+        keep = [(list(r) + [""] * width)[:width] for r in rows if any(str(c).strip() for c in r)]
+        writer.writerows(keep)
+        written += len(keep)
+    return written
+
+class ImportCheckpoint:
+    """
+    Progress of resumable imports in a small SQLite file, per (source digest, tab):
+    CSV rows consumed so far, plus the chunk in flight (its first EntryID and
+    where it ends), so an interrupted run can tell whether that append landed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS imports ("
+                "source TEXT, tab TEXT, consumed INTEGER DEFAULT 0, imported INTEGER DEFAULT 0, "
+                "inflight_first TEXT, inflight_consumed INTEGER, inflight_rows INTEGER, "
+                "updated_at REAL, PRIMARY KEY (source, tab))"
+            )
+
+    def _update(self, source: str, tab: str, sets: str, params: tuple) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO imports (source, tab) VALUES (?, ?)", (source, tab))
+            self._db.execute(f"UPDATE imports SET {sets}, updated_at = ? WHERE source = ? AND tab = ?",
+                             (*params, time.time(), source, tab))
+
+    def get(self, source: str, tab: str) -> dict:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT consumed, imported, inflight_first, inflight_consumed, inflight_rows "
+                "FROM imports WHERE source = ? AND tab = ?", (source, tab)
+            ).fetchone()
+        keys = ("consumed", "imported", "inflight_first", "inflight_consumed", "inflight_rows")
+        return dict(zip(keys, row or (0, 0, None, None, None)))
+
+    def begin_chunk(self, source: str, tab: str, consumed_after: int, first_entry_id: str, rows: int) -> None:
+        self._update(source, tab, "inflight_first = ?, inflight_consumed = ?, inflight_rows = ?",
+                     (first_entry_id, consumed_after, rows))
+
+    def commit_chunk(self, source: str, tab: str, consumed_after: int, rows: int) -> None:
+        self._update(source, tab, "consumed = ?, imported = imported + ?, inflight_first = NULL, "
+                     "inflight_consumed = NULL, inflight_rows = NULL", (consumed_after, rows))
+
+    def discard_chunk(self, source: str, tab: str) -> None:
+        """The chunk in flight never reached the sheet: forget it (it will be re-read)."""
+        self._update(source, tab, "inflight_first = NULL, inflight_consumed = NULL, inflight_rows = NULL", ())
@@ -1,7 +1,12 @@
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 from google.oauth2 import service_account
 import gspread
 from gspread.exceptions import WorksheetNotFound
+from gspread.utils import rowcol_to_a1
 
 # Scopes: you can tighten to drive.file after everything works
 SCOPES = [
@@ -73,6 +78,88 @@ def fetch_all(ws):
     rows = all_vals[1:]
     return headers, rows
 
+def key_digest(rows, key_spans, h=None):
+    """
+    Fold the key columns of rows (list of lists) into a sha1 object.
+    key_spans are inclusive 0-based column spans, e.g. [(0, 0), (7, 8)].
+    Pass an existing hash object to extend it with appended rows.
+    """
+    h = h or hashlib.sha1()
+    for r in rows:
+        for a, b in key_spans:
+            for i in range(a, b + 1):
+                h.update(str(r[i] if i < len(r) else "").encode("utf-8"))
+                h.update(b"\x1f")
+        h.update(b"\x1e")
+    return h
+
+def grid_size(ws) -> tuple[int, int]:
+    """(rows, columns) of the worksheet grid from fresh metadata (ws.row_count can be stale)."""
+    meta = ws.spreadsheet.fetch_sheet_metadata(params={"fields": "sheets.properties"})
+    for sheet in meta.get("sheets", []):
+        props = sheet["properties"]
+        if props["sheetId"] == ws.id:
+            grid = props.get("gridProperties", {})
+            return int(grid.get("rowCount", 0)), int(grid.get("columnCount", 0))
+    return ws.row_count, ws.col_count
+
+def read_chunks(ws, first_row: int, last_row: int, last_col: str = "Z",
+                chunk_rows: int = 2000, workers: int = 1, call=None):
+    """
+    Yield (start_row, rows) for A{first_row}:{last_col}{last_row} in bounded
+    chunks, in sheet order. Up to ``workers`` chunks are fetched at once (only
+    that many are held in memory); ``call(fn, *args)`` wraps each request, e.g.
+    a backoff/quota helper. A chunk's trailing empty rows are not returned.
+    """
+    call = call or (lambda fn, *args: fn(*args))
+    starts = iter(range(first_row, last_row + 1, chunk_rows))
+
+    def rng(a):
+        return f"A{a}:{last_col}{min(a + chunk_rows - 1, last_row)}"
+
+    if workers <= 1:
+        for a in starts:
+            yield a, call(ws.get, rng(a))
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        window = deque()
+        for a in starts:
+            window.append((a, pool.submit(call, ws.get, rng(a))))
+            if len(window) >= workers:
+                break
+        while window:
+            a, fut = window.popleft()
+            nxt = next(starts, None)
+            if nxt is not None:
+                window.append((nxt, pool.submit(call, ws.get, rng(nxt))))
+            yield a, fut.result()
+
+def fetch_tail(ws, known_rows: int, fingerprint: str, key_spans, last_col="Z", max_row=None):
+    """
+    Incremental read in a single batch_get: the key columns of the whole sheet
+    plus every row below ``known_rows`` (open-ended unless ``max_row`` is given).
+    Returns the new tail rows ([] if nothing was appended), or None when the
+    first ``known_rows`` rows no longer match ``fingerprint`` (in-place edit,
+    delete or re-sort) and the caller must do a full reload.
+    """
+    end = "" if max_row is None else str(max_row)
+    ranges = [f"{rowcol_to_a1(1, a + 1)}:{rowcol_to_a1(1, b + 1)[:-1]}{end}" for a, b in key_spans]
+    ranges.append(f"A{known_rows + 1}:{last_col}{end}")
+    *key_blocks, tail = ws.batch_get(ranges)
+
+    # Re-assemble sparse rows so the digest matches one taken over full rows
+    width = max(b for _, b in key_spans) + 1
+    key_rows = []
+    for n in range(known_rows):
+        row = [""] * width
+        for (a, b), block in zip(key_spans, key_blocks):
+            cells = (block[n] if n < len(block) else [])[: b - a + 1]
+            row[a:a + len(cells)] = cells
+        key_rows.append(row)
+    if key_digest(key_rows, key_spans).hexdigest() != fingerprint:
+        return None
+    return [list(r) for r in tail]
+
 def append_row(ws, data_row: list[str]):
     ws.append_row(data_row, value_input_option="USER_ENTERED")
 
@@ -90,6 +177,36 @@ def find_row_by_wo(ws, wo_col_index: int, wo_value: str):
             continue
     return None, None
 
+def entry_ids_at(ws, row_numbers, entry_col: int = 8) -> list[str]:
+    """
+    EntryID cell of each given row, in one batch_get (entry_col is 1-based; H by default).
+    The app's write queue checks edited rows with this before its batch update.
+    """
+    if not row_numbers:
+        return []
+    blocks = ws.batch_get([rowcol_to_a1(r, entry_col) for r in row_numbers])
+    return [str(b[0][0]).strip() if b and b[0] else "" for b in blocks]
+
+def delete_rows(ws, row_numbers):
+    """
+    Delete the given 1-based rows in one batchUpdate. Adjacent rows are merged
+    into one range and ranges run bottom-up, so no delete shifts a later one.
+    """
+    spans = []
+    for r in sorted(set(row_numbers), reverse=True):
+        if spans and spans[-1][0] == r + 1:
+            spans[-1][0] = r
+        else:
+            spans.append([r, r])
+    if not spans:
+        return None
+    requests = [
+        {"deleteDimension": {"range": {"sheetId": ws.id, "dimension": "ROWS",
+                                       "startIndex": a - 1, "endIndex": b}}}
+        for a, b in spans
+    ]
+    return ws.spreadsheet.batch_update({"requests": requests})
+
 def update_row(ws, row_number_1_based: int, new_row_values: list[str]):
     """
     Replace entire row (except header). Assumes new_row_values length <= current sheet width.
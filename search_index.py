@@ -0,0 +1,173 @@
+import bisect
+import re
+import threading
+from array import array
+from typing import NamedTuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+PREFIX_BOOST = 0.6   # a prefix match ("gp" -> "gpu") scores less than the whole word
+
+def tokenize(text) -> list[str]:
+    """Lowercased word tokens (letters, digits, underscore)."""
+    return TOKEN_RE.findall(str(text or "").lower())
+
+class Hit(NamedTuple):
+    key: object           # document key, e.g. ("Entries", row_number)
+    score: float
+    matches: dict         # field -> sorted token positions that matched
+
+class SearchIndex:
+    """
+    Inverted token index over a few text fields of many documents.
+
+    Every query term is a prefix ("gp" matches "gpu"); terms are ANDed. Hits
+    are ranked by field weight x matched occurrences. Postings are compact
+    int arrays and scoring is vectorized, so queries stay in the millisecond
+    range on 100k+ documents. Documents can be added or replaced after the
+    build (write-through), keyed by any hashable key.
+    """
+
+    def __init__(self, field_weights: dict[str, float]):
+        self.fields = list(field_weights)
+        self._field_id = {f: i for i, f in enumerate(self.fields)}
+        self._weights = np.array([float(w) for w in field_weights.values()])
+        self._postings: dict[str, tuple] = {}   # token -> (docs, fields, positions) arrays
+        self._keys: list = []                   # doc id -> key
+        self._doc_of: dict = {}                 # key -> live doc id
+        self._groups = array("i")               # doc id -> group id
+        self._group_id: dict = {}
+        self._alive = bytearray()
+        self._vocab: list[str] | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def add(self, key, fields: dict, group=None) -> None:
+        """Index (or re-index) one document; group lets queries stay within e.g. one tab."""
+        with self._lock:
+            old = self._doc_of.get(key)
+            if old is not None:
+                self._alive[old] = 0
+            doc = len(self._keys)
+            self._keys.append(key)
+            self._doc_of[key] = doc
+            self._groups.append(self._group_id.setdefault(group, len(self._group_id)))
+            self._alive.append(1)
+            for field, text in fields.items():
+                fid = self._field_id[field]
+                for pos, tok in enumerate(tokenize(text)):
+                    post = self._postings.get(tok)
+                    if post is None:
+                        post = self._postings[tok] = (array("i"), array("b"), array("i"))
+                        self._vocab = None
+                    post[0].append(doc)
+                    post[1].append(fid)
+                    post[2].append(pos)
+
+    def remove(self, key) -> None:
+        with self._lock:
+            doc = self._doc_of.pop(key, None)
+            if doc is not None:
+                self._alive[doc] = 0
+
+    def _expand(self, term: str) -> list[str]:
+        """Vocabulary tokens starting with term (bisect over the sorted vocabulary)."""
+        vocab = self._vocab
+        if vocab is None:
+            vocab = self._vocab = sorted(self._postings)
+        lo = bisect.bisect_left(vocab, term)
+        hi = bisect.bisect_left(vocab, term + "\U0010ffff")
+        return vocab[lo:hi]
+
+    def _gather(self, term: str, field_mask):
+        """Concatenated (docs, fields, positions, weights) for every token matching term."""
+        docs, fids, poss, boosts = [], [], [], []
+        for tok in self._expand(term):
+            d, f, p = self._postings[tok]
+            docs.append(np.array(d, dtype=np.int64))
+            fids.append(np.array(f, dtype=np.int64))
+            poss.append(np.array(p, dtype=np.int64))
+            boosts.append(np.full(len(d), 1.0 if tok == term else PREFIX_BOOST))
+        if not docs:
+            return None
+        d, f, p = np.concatenate(docs), np.concatenate(fids), np.concatenate(poss)
+        w = self._weights[f] * np.concatenate(boosts)
+        if field_mask is not None:
+            keep = field_mask[f]
+            d, f, p, w = d[keep], f[keep], p[keep], w[keep]
+        return d, f, p, w
+
+    def _score(self, query: str, fields, group):
+        """Dense per-doc scores for an AND of prefix terms, plus the gathered postings."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return None, []
+        field_mask = None
+        if fields:
+            wanted = set(fields)
+            field_mask = np.array([f in wanted for f in self.fields])
+        with self._lock:
+            n = len(self._keys)
+            mask = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+            if group is not None:
+                gid = self._group_id.get(group)
+                if gid is None:
+                    return None, []
+                mask &= np.array(self._groups, dtype=np.int64) == gid
+            gathered = []
+            for term in terms:
+                g = self._gather(term, field_mask)
+                if g is None:
+                    return None, []
+                gathered.append(g)
+        total = np.zeros(n)
+        for d, _, _, w in gathered:
+            s = np.bincount(d, weights=w, minlength=n)
+            mask &= s > 0
+            total += s
+        total[~mask] = 0.0
+        return total, gathered
+
+    def search(self, query: str, fields=None, group=None, limit: int | None = None,
+               positions: bool = True) -> list[Hit]:
+        """
+        Ranked hits, best first. Matched-field positions are filled in for the
+        returned hits (pass a limit, or positions=False, on large result sets).
+        """
+        total, gathered = self._score(query, fields, group)
+        if total is None:
+            return []
+        ids = np.nonzero(total)[0]
+        ids = ids[np.argsort(-total[ids], kind="stable")]
+        if limit:
+            ids = ids[:limit]
+        matches = self._positions(gathered, ids) if positions else {}
+        return [Hit(self._keys[i], float(total[i]), matches.get(int(i), {})) for i in ids]
+
+    def explain(self, query: str, keys, fields=None) -> dict:
+        """key -> {field: positions} for specific documents (e.g. the rows being shown)."""
+        total, gathered = self._score(query, fields, None)
+        if total is None:
+            return {}
+        with self._lock:
+            ids = np.array([self._doc_of[k] for k in keys if k in self._doc_of], dtype=np.int64)
+        ids = ids[total[ids] > 0]
+        return {self._keys[i]: m for i, m in self._positions(gathered, ids).items()}
+
+    def _positions(self, gathered, ids) -> dict:
+        matches: dict = {int(i): {} for i in ids}
+        for d, f, p, _ in gathered:
+            sel = np.isin(d, ids)
+            for doc, fid, pos in zip(d[sel].tolist(), f[sel].tolist(), p[sel].tolist()):
+                matches[doc].setdefault(self.fields[fid], set()).add(pos)
+        return {doc: {fld: sorted(ps) for fld, ps in m.items()} for doc, m in matches.items()}
+
+    def match_keys(self, query: str, fields=None, group=None) -> set:
+        """Keys of every matching document (unranked, no positions)."""
+        total, _ = self._score(query, fields, group)
+        if total is None:
+            return set()
+        return {self._keys[i] for i in np.nonzero(total)[0]}
@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+def _q(name: str) -> str:
+    """Quote an SQL identifier (sheet headers may contain spaces)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+class Replica:
+    """
+    Local SQLite copy of sheet tabs, used as a persistence layer: each tab becomes
+    a table keyed by its sheet row number (_row) with every header stored as TEXT.
+    A tab is copied whole once, then kept current by upserting changed rows, and is
+    read back whole; filters, thread lookups and latest-status queries run on the
+    app's in-memory views built from that frame, not as SQL. One connection per
+    thread; WAL mode lets sessions read while the sync worker writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS replica_meta ("
+                "tab TEXT PRIMARY KEY, version INTEGER, synced_at REAL, columns TEXT)"
+            )
+            self.conn.commit()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ----- metadata -----
+
+    def meta(self, tab: str) -> dict:
+        """Return {'version', 'synced_at', 'columns'} for a tab, or {} if never mirrored."""
+        row = self.conn.execute(
+            "SELECT version, synced_at, columns FROM replica_meta WHERE tab = ?", (tab,)
+        ).fetchone()
+        if not row:
+            return {}
+        return {"version": row[0], "synced_at": row[1], "columns": row[2].split("\x1f")}
+
+    def version(self, tab: str):
+        return self.meta(tab).get("version")
+
+    # ----- writes (sync worker / write-through) -----
+
+    def replace_tab(self, tab: str, frame: pd.DataFrame) -> None:
+        """Mirror a whole tab (frame index = sheet row number) and bump its version."""
+        cols = [str(c) for c in frame.columns]
+        rows = [(int(i), *("" if v is None else str(v) for v in r))
+                for i, r in zip(frame.index, frame.itertuples(index=False, name=None))]
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                conn.execute(f"DROP TABLE IF EXISTS {_q(tab)}")
+                col_sql = ", ".join(f"{_q(c)} TEXT" for c in cols)
+                conn.execute(f"CREATE TABLE {_q(tab)} (_row INTEGER PRIMARY KEY{', ' if cols else ''}{col_sql})")
+                if rows:
+                    marks = ", ".join("?" for _ in range(len(cols) + 1))
+                    conn.executemany(f"INSERT INTO {_q(tab)} VALUES ({marks})", rows)
+                self._bump_meta(conn, tab, cols)
+
+    def upsert_rows(self, tab: str, frame: pd.DataFrame) -> bool:
+        """
+        Write a few rows (appended or edited) and bump the tab's version.
+        Returns False if the table's columns differ and a full replace is needed.
+        """
+        cols = [str(c) for c in frame.columns]
+        meta = self.meta(tab)
+        if meta.get("columns") != cols:
+            return False
+        rows = [(int(i), *("" if v is None else str(v) for v in r))
+                for i, r in zip(frame.index, frame.itertuples(index=False, name=None))]
+        marks = ", ".join("?" for _ in range(len(cols) + 1))
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                conn.executemany(f"INSERT OR REPLACE INTO {_q(tab)} VALUES ({marks})", rows)
+                self._bump_meta(conn, tab, cols)
+        return True
+
+    def _bump_meta(self, conn, tab: str, cols: list) -> None:
+        # Versions persist across restarts, so readers can cache frames by version
+        row = conn.execute("SELECT version FROM replica_meta WHERE tab = ?", (tab,)).fetchone()
+        conn.execute(
+            "INSERT OR REPLACE INTO replica_meta (tab, version, synced_at, columns) VALUES (?, ?, ?, ?)",
+            (tab, (row[0] if row else 0) + 1, time.time(), "\x1f".join(cols)),
+        )
+
+    # ----- reads -----
+
+    def frame(self, tab: str) -> pd.DataFrame:
+        """All rows of a tab as a DataFrame indexed by sheet row number."""
+        cols = self.meta(tab).get("columns")
+        if cols is None:
+            return pd.DataFrame()
+        df = pd.read_sql_query(f"SELECT * FROM {_q(tab)} ORDER BY _row", self.conn, index_col="_row")
+        df.index.name = None
+        return df
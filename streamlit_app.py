@@ -4,9 +4,21 @@
 
 # --- Imports ---   
 import os
+import sys
+import functools
+import logging
+import threading
+import heapq
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Listener
 import time, random, string
 import datetime as dt
-import hmac, hashlib, base64, json
+import hmac, hashlib, base64, json, re
+import ipaddress
+import csv, io, tempfile, zipfile
+import cProfile, pstats
 import pandas as pd
 import html
 import streamlit as st
@@ -17,45 +29,14 @@ def _hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 def ensure_user_sheet():
-    sh = open_spreadsheet(gc=get_gc())
-    try:
-        return sh.worksheet("Users")
-    except WorksheetNotFound:
-        ws = sh.add_worksheet(title="Users", rows=100, cols=4)
-        ws.update("A1:D1", [["Email","Role","Enabled","TokenHash"]])
-        return ws
+    return _open_users_ws()  # cached handle (see "Worksheet open (cached)")
 
 def load_users_df():
-    wa = ensure_user_sheet()
-    return pd.DataFrame(ws.get_all_records())
-
-# auth_gate for Users Table
-def auth_gate():
-    ss = st.session_state
-    params = st.querry_params #property not a function
-    key = (params.get("key", [None])[0] or "").strip()
-
-    users = load_users_df()
-
-# If a ?key=... is present, validate it
-if key:
-    row = users[
-        (users["TokenHash"] == _hash_token(key)) &
-        (users["Enabled"].astype(str).str.lower().isin(["true","1","yes","y"]))
-    ]
-    if not row.empty:
-        ss["user_email"] = row.iloc[0]["Email"]
-        ss["user_role"] = str(row.iloc[0].get("Role","viewer")).lower()
-        st.stop()
-
-# Already authenticated in this session?
-if ss.get("user_email"):
-    st.stop()
+    if REPLICA_PATH:
+        return _replica_frame(USERS_TAB)[1]
+    ws = ensure_user_sheet()
+    return pd.DataFrame(_with_backoff(ws.get_all_records))
 
-# Block everything else
-st.error("Access denied. Ask an admin for an access link.")
-st.stop()
-    
 from gspread.exceptions import WorksheetNotFound, APIError
 from html import escape  # put this near your imports (once)
 st.info(
@@ -64,16 +45,15 @@ This document/system/information is intended for official use only. Unauthorized
 All use is subject to monitoring and review to ensure compliance with applicable policies and regulations."""
 )
 from gsheets_drive import get_gc, open_spreadsheet  # uses TURNOVER_SPREADSHEET_ID in secrets
+from gsheets_drive import delete_rows, entry_ids_at, fetch_tail, grid_size, key_digest, read_chunks
+from gspread.utils import rowcol_to_a1
+from sqlite_replica import Replica
+from write_journal import Journal
+from bulk_io import ImportCheckpoint, iter_import_chunks, source_digest, write_csv_chunks
+from search_index import SearchIndex, tokenize
 
 # --- Page setup ---
 st.set_page_config(page_title="Turnover Notes", page_icon="🗒️", layout="wide")
-auth_gate() # << place early so Unauthorized users can`t see anything.
-
-User_email = st.session_state.get("user_email","unknown")
-user_role = st.session_state.get("user_role","viewer")
-is_editor = user_role in ("editor","admin")
-
-st.caption(f"sign in as:{user_email} . role: {user_role}")
 
 # --- One place to set the sheet tab name ---
 TAB_NAME = "Entries"   # keep using the "Entries" tab
@@ -202,30 +182,466 @@ LEGACY_SEARCH_ENABLED = False
 
 # ===================== Rate-limit helpers (NEW) =====================
 
+# One scheduler per process for every gspread call made through _with_backoff.
+# Separate token buckets for reads and writes refill at the per-minute budgets;
+# callers queue per bucket by priority (interactive before background) and are
+# released as tokens arrive. A quota error empties the bucket and pauses it for
+# a jittered, growing delay, so sessions back off together instead of in lockstep.
+SHEETS_READS_PER_MIN = int(st.secrets.get("SHEETS_READS_PER_MIN") or os.getenv("SHEETS_READS_PER_MIN") or 60)
+SHEETS_WRITES_PER_MIN = int(st.secrets.get("SHEETS_WRITES_PER_MIN") or os.getenv("SHEETS_WRITES_PER_MIN") or 60)
+SHEETS_BURST = 10            # tokens a bucket can bank while idle
+QUOTA_RETRIES = 6
+WRITE_CALLS = {"update", "append_row", "append_rows", "batch_update", "batch_clear", "clear",
+               "add_worksheet", "freeze", "delete_rows", "delete_dimension", "insert_row", "insert_rows"}
+PRIORITY_INTERACTIVE = 0      # lower runs first
+PRIORITY_BACKGROUND = 1
+
+_CALL_CTX = threading.local()
+
+def _mark_background() -> None:
+    """Flag the current (worker) thread: its Sheets calls yield to interactive ones."""
+    _CALL_CTX.background = True
+
+@st.cache_resource
+def _quota() -> dict:
+    now = time.monotonic()
+    buckets = {
+        kind: {"rate": per_min / 60.0, "tokens": float(SHEETS_BURST), "stamp": now,
+               "paused_until": 0.0, "strikes": 0, "waiting": [], "seq": 0}
+        for kind, per_min in (("read", SHEETS_READS_PER_MIN), ("write", SHEETS_WRITES_PER_MIN))
+    }
+    return {
+        "buckets": buckets,
+        "cond": threading.Condition(),
+        "waits": deque(maxlen=500),      # (kind, priority, seconds waited) of recent calls, for percentiles
+        "calls": Counter(),              # kind -> calls since start
+        "quota_errors": 0,
+    }
+
+def _refill(bucket: dict, now: float) -> None:
+    bucket["tokens"] = min(float(SHEETS_BURST), bucket["tokens"] + (now - bucket["stamp"]) * bucket["rate"])
+    bucket["stamp"] = now
+
+def _acquire(kind: str, priority: int) -> float:
+    """Block until this caller is first in line for its bucket and a token is available; returns seconds waited."""
+    q = _quota()
+    bucket = q["buckets"][kind]
+    start = time.monotonic()
+    with q["cond"]:
+        bucket["seq"] += 1
+        ticket = (priority, bucket["seq"])
+        heapq.heappush(bucket["waiting"], ticket)
+        while True:
+            now = time.monotonic()
+            _refill(bucket, now)
+            if bucket["waiting"][0] == ticket and now >= bucket["paused_until"] and bucket["tokens"] >= 1.0:
+                heapq.heappop(bucket["waiting"])
+                bucket["tokens"] -= 1.0
+                q["cond"].notify_all()
+                break
+            ready_at = max(bucket["paused_until"], now + (1.0 - bucket["tokens"]) / bucket["rate"])
+            q["cond"].wait(min(max(ready_at - now, 0.01), 1.0))
+        waited = time.monotonic() - start
+        q["waits"].append((kind, priority, waited))
+        q["calls"][kind] += 1
+    return waited
+
+def _penalize(kind: str) -> float:
+    """Record a quota error: empty the bucket and pause it for a jittered, growing delay."""
+    q = _quota()
+    with q["cond"]:
+        bucket = q["buckets"][kind]
+        bucket["strikes"] += 1
+        delay = min(64.0, 2.0 ** bucket["strikes"]) * random.uniform(0.5, 1.0)
+        bucket["tokens"] = 0.0
+        bucket["paused_until"] = max(bucket["paused_until"], time.monotonic() + delay)
+        q["quota_errors"] += 1
+        q["cond"].notify_all()
+    return delay
+
+def _succeeded(kind: str) -> None:
+    bucket = _quota()["buckets"][kind]
+    if bucket["strikes"]:
+        with _quota()["cond"]:
+            bucket["strikes"] = 0
+
+def quota_stats() -> dict:
+    """Queue depth, pause and recent wait times per bucket (for Sheet Diagnostics)."""
+    q = _quota()
+    with q["cond"]:
+        now = time.monotonic()
+        out = {}
+        for kind, bucket in q["buckets"].items():
+            _refill(bucket, now)
+            waits = sorted(w for k, _, w in q["waits"] if k == kind)
+            out[kind] = {
+                "queued": len(bucket["waiting"]),
+                "tokens": round(bucket["tokens"], 1),
+                "paused_for": round(max(0.0, bucket["paused_until"] - now), 1),
+                "calls": q["calls"][kind],
+                "recent": len(waits),
+                "avg_wait": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                "p95_wait": round(waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0.0,
+            }
+        out["quota_errors"] = q["quota_errors"]
+    return out
+
+# ---------- API call accounting ----------
+# Every attempt made through _with_backoff (retries included) is logged with its
+# operation, the gspread call or gsheets_drive helper, the app function that
+# made it, the tab, the session (or worker thread) and the quota wait before it.
+#
+# A rerun should only reach Sheets through the cache layer (snapshot syncs, the
+# cached spreadsheet/worksheet handles and metadata, the Users index, archive
+# manifest) or an explicit action (import, export, compaction, repair), all
+# marked with sheets_layer(). Any other request made while a rerun is running is
+# logged as uncached, and reruns making more than RERUN_API_BUDGET requests in
+# total are logged with their callers.
+
+API_LOG_KEEP = 5000          # recent requests kept for the per-minute view and export
+APPEND_CALLS = {"append_row", "append_rows"}
+RERUN_API_BUDGET = int(st.secrets.get("RERUN_API_BUDGET") or os.getenv("RERUN_API_BUDGET") or 20)
+
+_LOG = logging.getLogger("turnover_notes")
+
+@st.cache_resource
+def _api_log() -> dict:
+    return {
+        "events": deque(maxlen=API_LOG_KEEP),
+        "totals": Counter(),        # (op, caller, tab, session) -> requests since start
+        "uncached": Counter(),      # (caller, call, tab) -> requests made from a rerun outside the cache layer
+        "uncached_at": {},          # same key -> last seen (epoch seconds)
+        "lock": threading.Lock(),
+    }
+
+@contextmanager
+def sheets_layer():
+    """Mark code allowed to call Sheets during a rerun (decorator or ``with`` block)."""
+    _CALL_CTX.layer = getattr(_CALL_CTX, "layer", 0) + 1
+    try:
+        yield
+    finally:
+        _CALL_CTX.layer -= 1
+
+def _api_context(fn, args: tuple, kwargs: dict) -> dict:
+    """Who is calling: app function (inner helpers folded into their owner), tab and session."""
+    code = sys._getframe(2).f_code
+    caller = getattr(code, "co_qualname", code.co_name).split(".<locals>")[0]
+    target = getattr(fn, "__self__", None) or (args[0] if args else None)
+    if hasattr(target, "spreadsheet"):      # a worksheet
+        tab = str(target.title)
+    elif hasattr(target, "worksheets"):     # the spreadsheet: worksheet(title), add_worksheet(title=...)
+        title = args[0] if args and isinstance(args[0], str) else kwargs.get("title")
+        tab = str(title) if title else "(spreadsheet)"
+    else:
+        tab = ""
+    session = getattr(_CALL_CTX, "session", None) or threading.current_thread().name
+    return {"caller": caller, "tab": tab, "session": session, "cached": getattr(_CALL_CTX, "layer", 0) > 0}
+
+def _log_api_call(name: str, ctx: dict, attempt: int, waited: float, ms: float, outcome: str) -> None:
+    op = "append" if name in APPEND_CALLS else "update" if name in WRITE_CALLS else "read"
+    event = {"ts": round(time.time(), 3), "op": op, "call": name, **ctx, "attempt": attempt,
+             "wait_s": round(waited, 3), "ms": round(ms, 1), "outcome": outcome}
+    log = _api_log()
+    rerun = getattr(_CALL_CTX, "rerun", None)
+    with log["lock"]:
+        log["events"].append(event)
+        log["totals"][(op, ctx["caller"], ctx["tab"], ctx["session"])] += 1
+        if rerun is not None:
+            rerun["api"][ctx["caller"]] += 1
+        if rerun is not None and not ctx["cached"]:
+            key = (ctx["caller"], name, ctx["tab"])
+            log["uncached"][key] += 1
+            log["uncached_at"][key] = event["ts"]
+    if rerun is not None and not ctx["cached"]:
+        _LOG.warning("Sheets %s outside the cache layer during a rerun: %s (tab %r, %s)",
+                     name, ctx["caller"], ctx["tab"], ctx["session"])
+
 def _with_backoff(fn, *args, **kwargs):
-    """Run gspread calls with exponential backoff on quota errors."""
-    delay = 1.0
-    for _ in range(6):  # ~63s total worst case
+    """Run a gspread call through the shared quota scheduler, retrying on quota errors."""
+    name = getattr(fn, "__name__", "")
+    kind = "write" if name in WRITE_CALLS else "read"
+    priority = PRIORITY_BACKGROUND if getattr(_CALL_CTX, "background", False) else PRIORITY_INTERACTIVE
+    ctx = _api_context(fn, args, kwargs)
+    for attempt in range(1, QUOTA_RETRIES + 1):
+        waited = _acquire(kind, priority)
+        t0 = time.perf_counter()
         try:
-            return fn(*args, **kwargs)
+            result = fn(*args, **kwargs)
         except APIError as e:
             msg = str(e).lower()
-            if "quota" in msg or "ratelimit" in msg or "exceeded" in msg:
-                time.sleep(delay)
-                delay *= 2
+            quota = "quota" in msg or "ratelimit" in msg or "exceeded" in msg
+            _log_api_call(name, ctx, attempt, waited, (time.perf_counter() - t0) * 1000, "quota" if quota else "error")
+            if quota:
+                _penalize(kind)
                 continue
             raise
+        except Exception:
+            _log_api_call(name, ctx, attempt, waited, (time.perf_counter() - t0) * 1000, "error")
+            raise
+        _log_api_call(name, ctx, attempt, waited, (time.perf_counter() - t0) * 1000, "ok")
+        _succeeded(kind)
+        return result
     raise RuntimeError("Google Sheets backoff exhausted")
 
+def api_minutes(minutes: int = 10) -> pd.DataFrame:
+    """Requests per wall-clock minute (newest first) against the per-minute limits."""
+    log = _api_log()
+    with log["lock"]:
+        events = list(log["events"])
+    since = (int(time.time()) // 60 - minutes + 1) * 60
+    rows = {}
+    for e in events:
+        if e["ts"] < since:
+            continue
+        m = rows.setdefault(int(e["ts"]) // 60 * 60, Counter())
+        m[e["op"]] += 1
+        m["retries"] += e["attempt"] > 1
+        m["quota"] += e["outcome"] == "quota"
+        m["wait"] += e["wait_s"]
+    out = []
+    for minute, m in sorted(rows.items(), reverse=True):
+        reads, writes = m["read"], m["append"] + m["update"]
+        out.append({
+            "Minute": dt.datetime.fromtimestamp(minute).strftime("%H:%M"),
+            "Reads": reads, "Appends": m["append"], "Updates": m["update"],
+            "Read % of limit": round(100 * reads / SHEETS_READS_PER_MIN),
+            "Write % of limit": round(100 * writes / SHEETS_WRITES_PER_MIN),
+            "Retries": m["retries"], "Quota errors": m["quota"], "Quota wait s": round(m["wait"], 1),
+        })
+    return pd.DataFrame(out)
+
+def api_totals(top: int = 20) -> pd.DataFrame:
+    """Requests since start by operation, caller, tab and session (largest first)."""
+    log = _api_log()
+    with log["lock"]:
+        totals = log["totals"].most_common(top)
+    return pd.DataFrame([
+        {"Op": op, "Caller": caller, "Tab": tab, "Session": session, "Requests": n}
+        for (op, caller, tab, session), n in totals
+    ])
+
+def uncached_calls() -> pd.DataFrame:
+    """Requests made from reruns outside the cache layer since start, by caller (most first)."""
+    log = _api_log()
+    with log["lock"]:
+        rows = [(key, n, log["uncached_at"][key]) for key, n in log["uncached"].most_common()]
+    return pd.DataFrame([
+        {"Caller": caller, "Call": call, "Tab": tab, "Requests": n,
+         "Last seen": dt.datetime.fromtimestamp(at).strftime("%H:%M:%S")}
+        for (caller, call, tab), n, at in rows
+    ])
+
+def api_log_jsonl() -> str:
+    """The recent request log as JSON lines (one request attempt per line)."""
+    log = _api_log()
+    with log["lock"]:
+        events = list(log["events"])
+    return "".join(json.dumps(e) + "\n" for e in events)
+
+# ===================== Timing spans (per rerun) =====================
+# Wall time of the hot paths (Sheets reads, frame loads, filtering, each panel)
+# per rerun, with row counts and whether the data came from cache. Spans from
+# worker threads only feed the per-span percentiles; spans on a script thread
+# are also attributed to that session's current rerun.
+
+SPAN_RERUNS_KEEP = 50        # recent reruns listed in Sheet Diagnostics
+SPAN_SAMPLES_KEEP = 500      # timings kept per span name for p50/p95
+PROFILE_TOP = 40             # functions listed in a rerun profile
+
+@st.cache_resource
+def _span_log() -> dict:
+    return {
+        "samples": {},                               # name -> deque of (ms, rows, cache)
+        "reruns": deque(maxlen=SPAN_RERUNS_KEEP),
+        "profiles": deque(maxlen=3),                 # (time, text) of profiled reruns
+        "lock": threading.Lock(),
+    }
+
+class Span:
+    """
+    Time one block: ``with Span("apply_filters") as sp: ...`` or
+    ``sp = Span("Open WOs").start()`` ... ``sp.end(rows=n)``. Code running inside
+    can mark the innermost open span as a cache hit/miss with note_cache().
+    """
+
+    __slots__ = ("name", "rows", "cache", "t0")
+
+    def __init__(self, name: str):
+        self.name, self.rows, self.cache, self.t0 = name, None, None, None
+
+    def start(self) -> "Span":
+        stack = getattr(_CALL_CTX, "spans", None)
+        if stack is None:
+            stack = _CALL_CTX.spans = []
+        stack.append(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def end(self, rows: int | None = None) -> None:
+        ms = (time.perf_counter() - self.t0) * 1000
+        stack = getattr(_CALL_CTX, "spans", [])
+        if self in stack:
+            stack.remove(self)
+        if rows is not None:
+            self.rows = rows
+        _record_span(self.name, ms, self.rows, self.cache)
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.end()
+
+def note_cache(hit: bool) -> None:
+    """Mark the innermost open span on this thread as served from cache (or not)."""
+    stack = getattr(_CALL_CTX, "spans", None)
+    if stack and stack[-1].cache != "miss":  # a nested miss makes the whole span a miss
+        stack[-1].cache = "hit" if hit else "miss"
+
+def timed(name: str):
+    """Decorator: run the function in a Span, counting the rows it returns."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(name) as sp:
+                out = fn(*args, **kwargs)
+                sp.rows = len(out) if hasattr(out, "__len__") else None
+                return out
+        return wrapper
+    return deco
+
+def _record_span(name: str, ms: float, rows, cache) -> None:
+    log = _span_log()
+    with log["lock"]:
+        log["samples"].setdefault(name, deque(maxlen=SPAN_SAMPLES_KEEP)).append((ms, rows, cache))
+    rerun = getattr(_CALL_CTX, "rerun", None)
+    if rerun is not None:
+        agg = rerun["spans"].setdefault(name, {"n": 0, "ms": 0.0, "rows": None, "cache": None})
+        agg["n"] += 1
+        agg["ms"] += ms
+        agg["rows"] = rows if rows is not None else agg["rows"]
+        agg["cache"] = cache or agg["cache"]
+
+def begin_rerun() -> None:
+    """Start timing this script run (top of the page); profiles it when asked to."""
+    ss = st.session_state
+    prev = ss.get("_rerun_timing")
+    if prev is not None and prev.get("t0") is not None:
+        _finish_rerun(prev, "stopped")  # the previous run ended early (st.stop / rerun / error)
+    rerun = {"at": time.time(), "t0": time.perf_counter(), "spans": {}, "api": Counter(), "profiler": None}
+    if ss.pop("profile_next_rerun", False):
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+            rerun["profiler"] = prof
+        except ValueError:  # another profiler is active in this process
+            pass
+    ss["_rerun_timing"] = rerun
+    _CALL_CTX.rerun = rerun
+    _CALL_CTX.session = "session-" + ss.setdefault("_session_tag", secrets.token_hex(3))
+    _CALL_CTX.spans = []
+
+def end_rerun() -> None:
+    """Close this script run's timing record (bottom of the page)."""
+    rerun = st.session_state.get("_rerun_timing")
+    if rerun is not None and rerun.get("t0") is not None:
+        _finish_rerun(rerun, "ok")
+    _CALL_CTX.rerun = None
+
+def _finish_rerun(rerun: dict, status: str) -> None:
+    total = (time.perf_counter() - rerun.pop("t0")) * 1000
+    prof = rerun.pop("profiler", None)
+    log = _span_log()
+    if prof is not None:
+        prof.disable()
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        with log["lock"]:
+            log["profiles"].append((rerun["at"], out.getvalue()))
+    calls = sum(rerun["api"].values())
+    if calls > RERUN_API_BUDGET:
+        _LOG.warning("Rerun made %d Sheets requests (budget %d): %s", calls, RERUN_API_BUDGET,
+                     ", ".join(f"{caller} x{n}" for caller, n in rerun["api"].most_common(5)))
+    with log["lock"]:
+        log["reruns"].append({"at": rerun["at"], "status": status, "total_ms": total, "api": calls,
+                              "spans": rerun["spans"]})
+
+def span_stats() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(recent reruns, per-span p50/p95) for Sheet Diagnostics."""
+    log = _span_log()
+    with log["lock"]:
+        reruns = list(log["reruns"])
+        samples = {name: list(d) for name, d in log["samples"].items()}
+    recent = pd.DataFrame([
+        {"At": dt.datetime.fromtimestamp(r["at"]).strftime("%H:%M:%S"), "Run": r["status"],
+         "Total ms": round(r["total_ms"], 1), "API calls": r["api"],
+         **{name: f"{a['ms']:.1f}" + (f" ({a['rows']})" if a["rows"] is not None else "")
+                  + (" ✓" if a["cache"] == "hit" else " ✗" if a["cache"] == "miss" else "")
+            for name, a in r["spans"].items()}}
+        for r in reversed(reruns)
+    ]).fillna("")
+    rows = []
+    for name, ss in sorted(samples.items()):
+        ms = sorted(x[0] for x in ss)
+        cached = [x[2] for x in ss if x[2] is not None]
+        rows.append({
+            "Span": name, "Samples": len(ms),
+            "p50 ms": round(ms[len(ms) // 2], 1), "p95 ms": round(ms[int(0.95 * (len(ms) - 1))], 1),
+            "Last rows": ss[-1][1],
+            "Cache hits": f"{100 * cached.count('hit') / len(cached):.0f}%" if cached else "",
+        })
+    return recent, pd.DataFrame(rows)
+
+def rerun_profiles() -> list:
+    log = _span_log()
+    with log["lock"]:
+        return list(log["profiles"])
+
+begin_rerun()
+
 # ===================== Worksheet open (cached) =====================
+# Opening the spreadsheet costs a metadata read, so the handle is opened once per
+# process. Title, URL and tab sizes (for Sheet Diagnostics) come from one more
+# metadata read, kept for SHEET_META_TTL_SECS or until someone presses Refresh.
+
+SHEET_META_TTL_SECS = int(st.secrets.get("SHEET_META_TTL_SECS") or os.getenv("SHEET_META_TTL_SECS") or 600)
 
 @st.cache_resource
+@sheets_layer()
+def _spreadsheet():
+    return _with_backoff(open_spreadsheet, gc=get_gc())  # relies on TURNOVER_SPREADSHEET_ID in secrets/env
+
+@st.cache_resource
+def _sheet_meta_cache() -> dict:
+    return {"meta": None, "loaded_at": 0.0, "lock": threading.Lock()}
+
+@sheets_layer()
+def sheet_metadata(refresh: bool = False) -> dict:
+    """{'title', 'url', 'tabs': [{'Tab', 'Rows', 'Columns'}], 'loaded_at'} of the spreadsheet (cached)."""
+    cache = _sheet_meta_cache()
+    with cache["lock"]:
+        if refresh or cache["meta"] is None or time.time() - cache["loaded_at"] >= SHEET_META_TTL_SECS:
+            sh = _spreadsheet()
+            raw = _with_backoff(sh.fetch_sheet_metadata, params={"fields": "properties.title,sheets.properties"})
+            tabs = []
+            for sheet in raw.get("sheets", []):
+                props = sheet["properties"]
+                grid = props.get("gridProperties", {})
+                tabs.append({"Tab": props["title"], "Rows": int(grid.get("rowCount", 0)),
+                             "Columns": int(grid.get("columnCount", 0))})
+            cache["loaded_at"] = time.time()
+            cache["meta"] = {"title": raw.get("properties", {}).get("title", ""), "url": sh.url, "tabs": tabs,
+                             "loaded_at": cache["loaded_at"]}
+        return cache["meta"]
+
+@st.cache_resource
+@sheets_layer()
 def _open_entries_ws():
     """Open/create the Entries worksheet and ensure headers."""
-    gc = get_gc()
-    sh = open_spreadsheet(gc=gc)  # relies on TURNOVER_SPREADSHEET_ID in secrets/env
+    sh = _spreadsheet()
     try:
-        ws = sh.worksheet(TAB_NAME)
+        ws = _with_backoff(sh.worksheet, TAB_NAME)
     except WorksheetNotFound:
         ws = _with_backoff(sh.add_worksheet, title=TAB_NAME, rows=2000, cols=20)
     # Ensure headers
@@ -239,12 +655,12 @@ def _open_entries_ws():
     return ws
 
 @st.cache_resource
+@sheets_layer()
 def _open_rfm_ws():
     """Open/create the RFM worksheet and ensure headers."""
-    gc = get_gc()
-    sh = open_spreadsheet(gc=gc)
+    sh = _spreadsheet()
     try:
-        ws = sh.worksheet(RFM_TAB)
+        ws = _with_backoff(sh.worksheet, RFM_TAB)
     except WorksheetNotFound:
         ws = _with_backoff(sh.add_worksheet, title=RFM_TAB, rows=2000, cols=20)
     first_row = _with_backoff(ws.row_values, 1)
@@ -256,52 +672,1304 @@ def _open_rfm_ws():
             pass
     return ws
 
+@st.cache_resource
+@sheets_layer()
+def _open_users_ws():
+    """Open/create the Users worksheet (Email, Role, Enabled, TokenHash)."""
+    sh = _spreadsheet()
+    try:
+        return _with_backoff(sh.worksheet, USERS_TAB)
+    except WorksheetNotFound:
+        ws = _with_backoff(sh.add_worksheet, title=USERS_TAB, rows=100, cols=4)
+        _with_backoff(ws.update, "A1:D1", [["Email","Role","Enabled","TokenHash"]])
+        return ws
+
 # ===================== Reads (cached) =====================
 
-@st.cache_data(ttl=60)
-def _get_all_values(tab_name: str):
+# Incremental sync: after the first full read, each refresh fetches only the key
+# columns (ID, EntryID, CreatedAt) plus rows past the last synced row, in one batch_get.
+# A changed key fingerprint (in-place edit, delete, re-sort) forces a full reload;
+# a periodic full reload also picks up hand edits to non-key columns.
+INCREMENTAL_SYNC = str(st.secrets.get("INCREMENTAL_SYNC") or os.getenv("INCREMENTAL_SYNC") or "true").lower() in ("true","1","yes","y")
+SYNC_FULL_RELOAD_SECS = int(st.secrets.get("SYNC_FULL_RELOAD_SECS") or os.getenv("SYNC_FULL_RELOAD_SECS") or 1800)
+SYNC_KEY_SPANS = [(0, 0), (7, 8)]   # A (WO/RFM), H:I (EntryID, CreatedAt) — same layout on both tabs
+KEY_CELL_SPANS = [(0, sum(b - a + 1 for a, b in SYNC_KEY_SPANS) - 1)]   # same cells, stored compactly
+
+# Full reads cover the sheet's real grid size in bounded row chunks (no fixed
+# A1:Z5000 cap); several chunks can be in flight, each one a scheduled read.
+SYNC_CHUNK_ROWS = int(st.secrets.get("SYNC_CHUNK_ROWS") or os.getenv("SYNC_CHUNK_ROWS") or 2000)
+SYNC_READ_WORKERS = int(st.secrets.get("SYNC_READ_WORKERS") or os.getenv("SYNC_READ_WORKERS") or 3)
+
+SYNC_TTL_SECS = 60
+SYNC_CHANGES_KEEP = 500   # incremental changes remembered per tab (see _note_change)
+
+# Stale-while-revalidate: once a tab has been loaded, an expired snapshot is still
+# served immediately and the refresh runs on a background thread (one per tab at a
+# time), so interactive reruns never wait on Sheets. Only the very first load blocks.
+STALE_WHILE_REVALIDATE = str(st.secrets.get("STALE_WHILE_REVALIDATE") or os.getenv("STALE_WHILE_REVALIDATE") or "true").lower() in ("true","1","yes","y")
+
+@st.cache_resource
+def _sync_state(tab_name: str) -> dict:
     """
-    One big read per tab, cached for 60s.
-    NOTE: Using a Worksheet object means the range must be relative (no sheet name),
-    otherwise gspread prefixes it again (e.g., "'Entries'!Entries!A1").
+    Process-wide snapshot of one tab: its typed DataFrame, the key cells of every
+    sheet row (for the fingerprint), a content hash and a version that only
+    changes when this tab's data does. Raw rows are not kept.
+    """
+    return {
+        "header": [], "keys": [], "known": 0,   # known = sheet rows covered, incl. header
+        "digest": None, "content": None, "width": 0,
+        "full_at": 0.0, "synced_at": 0.0, "version": 0, "frame": None,
+        "changes": [],                      # (version, sheet rows) since the last full reload
+        "refreshing": False, "error": None,
+        "lock": threading.RLock(),          # guards the snapshot (held briefly)
+        "sync_lock": threading.Lock(),      # one Sheets fetch per tab at a time
+    }
+
+def _note_change(state: dict, rownums: list) -> None:
+    """Log the rows behind the version just bumped, so copies of the frame can follow it row by row."""
+    state["changes"] = (state["changes"] + [(state["version"], [int(n) for n in rownums])])[-SYNC_CHANGES_KEEP:]
+
+def _changed_rows(state: dict, since) -> list | None:
+    """Sheet rows changed after version `since`, or None if the log does not reach back that far."""
+    versions = [v for v, _ in state["changes"] if since is not None and v > since]
+    if since is None or versions != list(range(since + 1, state["version"] + 1)):
+        return None
+    return sorted({n for v, rows in state["changes"] if v > since for n in rows})
+
+def _key_cells(row: list) -> tuple:
+    return tuple(row[i] if i < len(row) else "" for a, b in SYNC_KEY_SPANS for i in range(a, b + 1))
+
+def _empty_frame(tab_name: str) -> pd.DataFrame:
+    return _type_frame(pd.DataFrame(columns=EXPECTED_HEADERS if tab_name == TAB_NAME else RFM_HEADERS))
+
+def _nonempty(rows: list, start: int) -> tuple[list, list]:
+    """(rows, row numbers) without blank rows; row numbers are kept as the frame index."""
+    keep = [(n, r) for n, r in enumerate(rows, start=start)
+            if any((str(c).strip() if c is not None else "") for c in r)]
+    return [r for _, r in keep], [n for n, _ in keep]
+
+def _read_full(tab_name: str, ws) -> dict:
+    """
+    Full read of a tab: discover the grid size, fetch it in row chunks and feed
+    each chunk straight into the frame builder, so the whole sheet never sits
+    in memory as one list of lists.
+    """
+    n_rows, n_cols = _with_backoff(grid_size, ws)
+    last_col = rowcol_to_a1(1, max(n_cols, 1))[:-1]
+    background = getattr(_CALL_CTX, "background", False)
+    session = getattr(_CALL_CTX, "session", None) or threading.current_thread().name
+    rerun, layer = getattr(_CALL_CTX, "rerun", None), getattr(_CALL_CTX, "layer", 0)
+
+    def call(fn, *args):
+        if background:
+            _mark_background()  # pool threads inherit the caller's priority, session and rerun
+        _CALL_CTX.session, _CALL_CTX.rerun, _CALL_CTX.layer = session, rerun, layer
+        return _with_backoff(fn, *args)
+
+    header, keys, parts, known = [], [], [], 0
+    content = hashlib.sha1()
+    for start, rows in read_chunks(ws, 1, n_rows, last_col, SYNC_CHUNK_ROWS, SYNC_READ_WORKERS, call):
+        rows = [list(r) for r in rows]
+        if not rows:
+            continue
+        gap = start - (known + 1)  # trailing blank rows of the previous chunk
+        if gap > 0:
+            keys.extend([_key_cells([])] * gap)
+            key_digest([[]] * gap, [(0, n_cols - 1)], content)
+        keys.extend(_key_cells(r) for r in rows)
+        key_digest(rows, [(0, n_cols - 1)], content)
+        known = start + len(rows) - 1
+        if start == 1:
+            header, rows, start = rows[0], rows[1:], 2
+        data, rownums = _nonempty(rows, start)
+        if data:
+            parts.append(_frame_from_rows(tab_name, header, data, rownums, typed=False))
+    frame = _type_frame(pd.concat(parts)) if parts else _empty_frame(tab_name)
+    return {
+        "header": header, "keys": keys, "known": known, "width": n_cols, "content": content,
+        "digest": key_digest(keys, KEY_CELL_SPANS), "frame": frame,
+    }
+
+@sheets_layer()
+def _sync_tab(tab_name: str) -> None:
+    """
+    Bring the tab snapshot up to date (delta when possible).
+    The fetch runs outside the snapshot lock so write-through is never blocked on
+    the network; if one of our writes lands meanwhile the result is discarded.
     """
     ws = _open_entries_ws() if tab_name == TAB_NAME else _open_rfm_ws()
-    rng = "A1:Z5000"               # relative to the worksheet
-    data = _with_backoff(ws.get, rng)  # returns list[list]
-    return data
+    state = _sync_state(tab_name)
+    with state["sync_lock"]:
+        with state["lock"]:
+            loaded, known, digest, version = state["full_at"] > 0, state["known"], state["digest"], state["version"]
+            if loaded and time.time() - state["synced_at"] < SYNC_TTL_SECS:
+                return  # another session refreshed it while we waited
+            full_due = time.time() - state["full_at"] >= SYNC_FULL_RELOAD_SECS
+        tail = fresh = None
+        with Span(f"sheets_read {tab_name}") as sp:
+            if INCREMENTAL_SYNC and loaded and known and not full_due:
+                tail = _with_backoff(fetch_tail, ws, known, digest.hexdigest(), SYNC_KEY_SPANS)
+            if tail is None:
+                # First load, periodic reload, or in-place edit detected
+                fresh = _read_full(tab_name, ws)
+            sp.rows = len(tail) if fresh is None else len(fresh["frame"])
+        with state["lock"]:
+            if state["version"] != version:
+                return  # raced with a write-through; next read re-syncs
+            now = time.time()
+            if fresh is None:
+                if tail:
+                    added = _extend_snapshot(tab_name, state, tail)
+                    state["version"] += 1
+                    _note_change(state, added.index)
+            else:
+                old = state["content"]
+                if old is None or old.hexdigest() != fresh["content"].hexdigest():
+                    state.update(fresh, changes=[])
+                    state["version"] += 1
+                state["full_at"] = now
+            state["synced_at"] = now
+            state["error"] = None
+
+def _extend_snapshot(tab_name: str, state: dict, rows: list) -> pd.DataFrame:
+    """Append sheet rows (starting right after the known rows) to the snapshot; returns their frame."""
+    first = state["known"] + 1
+    state["keys"] = state["keys"] + [_key_cells(r) for r in rows]
+    state["digest"] = key_digest([_key_cells(r) for r in rows], KEY_CELL_SPANS, state["digest"].copy())
+    if state["content"] is not None:
+        state["content"] = key_digest(rows, [(0, state["width"] - 1)], state["content"].copy())
+    state["known"] += len(rows)
+    data, rownums = _nonempty(rows, first)
+    added = _frame_from_rows(tab_name, state["header"], data, rownums)
+    state["frame"] = pd.concat(_align_categories(state["frame"], added))
+    return added
+
+def _revalidate(tab_name: str) -> None:
+    """Start a background refresh of a tab unless one is already running."""
+    state = _sync_state(tab_name)
+    with state["lock"]:
+        if state["refreshing"]:
+            return
+        state["refreshing"] = True
+
+    def run():
+        _mark_background()
+        try:
+            _sync_tab(tab_name)
+        except Exception as e:  # keep serving the last good snapshot
+            state["error"] = str(e)
+        finally:
+            state["refreshing"] = False
+
+    threading.Thread(target=run, daemon=True, name=f"revalidate-{tab_name}").start()
+
+def _ensure_fresh(tab_name: str) -> None:
+    """
+    Re-sync a tab once its snapshot is older than 60s.
+    A refresh usually costs only a key-column probe plus any newly appended rows;
+    our own writes are applied in place (see _write_through_*), so they never
+    force a refresh. With STALE_WHILE_REVALIDATE an expired snapshot is served
+    as-is while a background thread refreshes it.
+    NOTE: Using a Worksheet object means ranges must be relative (no sheet name),
+    otherwise gspread prefixes it again (e.g., "'Entries'!Entries!A1").
+    """
+    state = _sync_state(tab_name)
+    loaded = state["full_at"] > 0
+    if loaded and time.time() - state["synced_at"] < SYNC_TTL_SECS:
+        note_cache(True)
+        return
+    if loaded and STALE_WHILE_REVALIDATE:
+        note_cache(True)
+        _revalidate(tab_name)
+        return
+    note_cache(False)
+    _sync_tab(tab_name)
+
+def snapshot_age(tab_name: str) -> float | None:
+    """Seconds since the data served for this tab was last synced from Sheets (None if never)."""
+    if REPLICA_PATH:
+        synced_at = _replica()["replica"].meta(tab_name).get("synced_at")
+    else:
+        synced_at = _sync_state(tab_name)["synced_at"] or None
+    return None if synced_at is None else max(0.0, time.time() - synced_at)
+
+def _fmt_age(secs: float | None) -> str:
+    if secs is None:
+        return "never"
+    if secs < 90:
+        return f"{secs:.0f}s ago"
+    if secs < 5400:
+        return f"{secs / 60:.0f} min ago"
+    return f"{secs / 3600:.1f} h ago"
+
+# Typed schema: Date/CreatedAt are parsed once into datetime64, low-cardinality
+# columns are categoricals and free text uses compact Arrow strings when pyarrow is
+# installed. _sheet_text()/_row_text() turn typed data back into sheet text for the
+# replica, the CSV backup, archive copies and form defaults. Parsing is lossy for
+# text that is not in the plain ISO form (unparseable "TBD", 1/2/2025, sub-second
+# CreatedAt), so that original text is kept in DateText/CreatedAtText (<NA> for
+# every other row) and written back instead of the parsed value.
+DATE_COLUMNS = ["Date", "CreatedAt"]
+DATE_TEXT_COLUMNS = {"Date": "DateText", "CreatedAt": "CreatedAtText"}
+ISO_DATE_TEXT = {"Date": r"\d{4}-\d{2}-\d{2}", "CreatedAt": r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}"}
+CATEGORY_COLUMNS = ["WO", "RFM", "Status", "Location"]
+TEXT_COLUMNS = ["Title", "Resolution", "Description", "Attachments", "EntryID"]
+try:
+    import pyarrow  # noqa: F401  (optional)
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = object
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """ISO dates on the fast path; anything else (e.g. 1/2/2025) parsed per value. Bad -> NaT."""
+    parsed = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    retry = parsed.isna() & values.astype(str).str.strip().ne("")
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], errors="coerce", format="mixed")
+    return parsed
+
+def _as_datetime(values: pd.Series) -> pd.Series:
+    return values if pd.api.types.is_datetime64_any_dtype(values) else _parse_dates(values)
+
+def _type_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the typed schema to a frame of sheet text (unknown columns are left alone)."""
+    for c in list(df.columns):
+        if c in DATE_COLUMNS:
+            text = df[c].astype(str)
+            df[c] = parsed = _parse_dates(text)
+            kept = text.ne("") & (parsed.isna() | ~text.str.fullmatch(ISO_DATE_TEXT[c]))
+            df[DATE_TEXT_COLUMNS[c]] = text.where(kept).astype(object)  # mostly NaN: cheap to slice
+        elif c in CATEGORY_COLUMNS:
+            df[c] = df[c].astype(str).astype("category")
+        elif c in TEXT_COLUMNS:
+            df[c] = df[c].astype(str).astype(TEXT_DTYPE)
+    return df
+
+def _sheet_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Typed frame -> plain strings as they look in the sheet (the DateText columns are folded back in)."""
+    out = df.drop(columns=[t for t in DATE_TEXT_COLUMNS.values() if t in df.columns])
+    for c in out.columns:
+        if c in DATE_COLUMNS and pd.api.types.is_datetime64_any_dtype(out[c]):
+            fmt = "%Y-%m-%d" if c == "Date" else "%Y-%m-%dT%H:%M:%S"
+            text = out[c].dt.strftime(fmt).astype(object).fillna("")
+            if DATE_TEXT_COLUMNS[c] in df.columns:
+                kept = df[DATE_TEXT_COLUMNS[c]]
+                text = text.where(kept.isna(), kept.astype(object))
+            out[c] = text
+        else:
+            out[c] = out[c].astype(str).astype(object)
+    return out
+
+def _fmt_day(value) -> str:
+    return "" if value is None or pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+def _row_text(row: dict) -> dict:
+    """One typed row dict -> sheet text (for form defaults and previews)."""
+    out = {k: ("" if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v)) for k, v in row.items()
+           if k not in DATE_TEXT_COLUMNS.values()}
+    for c in DATE_COLUMNS:
+        v, kept = row.get(c), row.get(DATE_TEXT_COLUMNS[c])
+        if isinstance(kept, str):
+            out[c] = kept
+        elif isinstance(v, pd.Timestamp) and not pd.isna(v):
+            out[c] = v.strftime("%Y-%m-%d") if c == "Date" else v.isoformat(timespec="seconds")
+    return out
 
-@st.cache_data(ttl=60)
+def _align_categories(a: pd.DataFrame, b: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Share categories between two typed frames so concat/row assignment keep the dtype."""
+    a, b = a.copy(deep=False), b.copy(deep=False)
+    for c in CATEGORY_COLUMNS:
+        if c in a.columns and c in b.columns:
+            new = b[c].cat.categories.difference(a[c].cat.categories)
+            if len(new):
+                a[c] = a[c].cat.add_categories(new)
+            b[c] = b[c].cat.set_categories(a[c].cat.categories)
+    return a, b
+
+def _frame_from_rows(tab_name: str, header: list, rows: list, rownums: list, typed: bool = True) -> pd.DataFrame:
+    """Build a (typed) tab DataFrame indexed by sheet row number (header is row 1)."""
+    width = len(header)
+    rows = [(list(r) + [""] * width)[:width] for r in rows]
+    df = pd.DataFrame(rows, columns=header, index=pd.Index(rownums, dtype="int64"))
+    if tab_name == TAB_NAME:
+        df = normalize_columns(df)
+    else:
+        for c in RFM_HEADERS:
+            if c not in df.columns:
+                df[c] = ""
+    return _type_frame(df) if typed else df
+
+def _tab_frame(tab_name: str, sync: bool = True) -> tuple[int, pd.DataFrame]:
+    """Return (version, DataFrame) for a tab; the frame is kept current by sync and write-through."""
+    if sync:
+        _ensure_fresh(tab_name)
+    state = _sync_state(tab_name)
+    with state["lock"]:
+        if state["frame"] is None:
+            state["frame"] = _empty_frame(tab_name)
+        return state["version"], state["frame"]
+
+def _current_frame(tab_name: str) -> tuple[int, pd.DataFrame]:
+    """
+    (version, shared DataFrame) from the data service owner when this process is a
+    client, else from the replica when enabled, else the in-memory snapshot.
+    """
+    remote = _remote_service()
+    if remote is not None:
+        return remote.frame(tab_name)
+    if REPLICA_PATH:
+        return _replica_frame(tab_name)
+    return _tab_frame(tab_name)
+
+def frame_source() -> str:
+    """
+    Where _current_frame reads from ("remote", "replica" or "snapshot"). Versions
+    are counted separately per source, so caches keyed by a version also need this.
+    """
+    if _remote_service() is not None:
+        return "remote"
+    return "replica" if REPLICA_PATH else "snapshot"
+
+def tab_version(tab_name: str) -> int:
+    """Current data version of a tab; bumps on sync changes and on our own writes."""
+    return _current_frame(tab_name)[0]
+
+@timed("load_df")
 def load_df() -> pd.DataFrame:
     """Read the Entries sheet into a DataFrame with the expected schema."""
-    values = _get_all_values(TAB_NAME)
-    if not values:
-        return pd.DataFrame(columns=EXPECTED_HEADERS)
-    header, *rows = values
-    # drop empty rows
-    rows = [r for r in rows if any((str(c).strip() if c is not None else "") for c in r)]
-    df = pd.DataFrame(rows, columns=header[: len(header)])
-    df = normalize_columns(df)
-    if not df.empty:
-        df["Date"] = df["Date"].astype(str)
-        df["CreatedAt"] = df["CreatedAt"].astype(str)
-    return df
+    return _current_frame(TAB_NAME)[1].copy()
 
-@st.cache_data(ttl=60)
+@timed("load_rfm_df")
 def load_rfm_df() -> pd.DataFrame:
     """Read the RFM sheet into a DataFrame (ensures columns exist)."""
-    values = _get_all_values(RFM_TAB)
-    if not values:
-        return pd.DataFrame(columns=RFM_HEADERS)
-    header, *rows = values
-    rows = [r for r in rows if any((str(c).strip() if c is not None else "") for c in r)]
-    df = pd.DataFrame(rows, columns=header[: len(header)])
-    for c in RFM_HEADERS:
-        if c not in df.columns:
-            df[c] = ""
-    if not df.empty:
-        df["Date"] = df["Date"].astype(str)
-        df["CreatedAt"] = df["CreatedAt"].astype(str)
-    return df
+    return _current_frame(RFM_TAB)[1].copy()
+
+# ===================== Write-through (per-tab cache update) =====================
+
+def _response_rows(resp: dict) -> tuple[int | None, list | None]:
+    """(first row number, rendered values) from a values.update/append response."""
+    upd = (resp or {}).get("updates", resp or {})
+    m = re.search(r"![A-Z]+(\d+)", upd.get("updatedRange", ""))
+    rendered = (upd.get("updatedData") or {}).get("values")
+    return (int(m.group(1)) if m else None), rendered
+
+def _write_through_append(tab_name: str, rows: list, resp: dict) -> None:
+    """Apply just-appended rows (one append call) to this tab's snapshot and frame; bump its version once."""
+    first, rendered = _response_rows(resp)
+    rows = [list(r) for r in rendered] if rendered and len(rendered) == len(rows) else [list(r) for r in rows]
+    state = _sync_state(tab_name)
+    with state["lock"]:
+        if not state["known"] or first != state["known"] + 1:
+            # Someone else appended in between: let the next read delta-sync instead
+            state["synced_at"] = 0.0
+            return
+        added = _extend_snapshot(tab_name, state, rows)
+        state["version"] += 1
+        _note_change(state, added.index)
+        version = state["version"]
+    rownums = [int(n) for n in added.index]
+    if REPLICA_PATH:
+        _replica_after_write(tab_name, rownums, version)
+    else:
+        from_version = version - 1
+        for rownum in rownums:
+            _after_write(tab_name, from_version, version, rownum, added.loc[rownum].to_dict())
+            from_version = version
+
+def _write_through_update(tab_name: str, rownum: int, ordered: list, resp: dict) -> None:
+    """Apply an in-place row edit to this tab's snapshot and frame; bump only its version."""
+    _, rendered = _response_rows(resp)
+    row = list(rendered[0]) if rendered else list(ordered)
+    state = _sync_state(tab_name)
+    with state["lock"]:
+        if not (2 <= rownum <= state["known"]):
+            state["synced_at"] = 0.0
+            return
+        keys = list(state["keys"])
+        keys[rownum - 1] = _key_cells(row)
+        state["keys"] = keys
+        state["digest"] = key_digest(keys, KEY_CELL_SPANS)
+        state["content"] = None  # next full reload re-hashes (and may bump the version once)
+        # Only the written columns change; anything past them keeps its value
+        updated = _frame_from_rows(tab_name, state["header"][:len(row)], [row], [rownum])
+        frame, updated = _align_categories(state["frame"].copy(), updated)
+        if rownum in frame.index:
+            frame.loc[rownum, updated.columns] = updated.loc[rownum]
+        else:  # was a blank row
+            frame = pd.concat([frame, updated.reindex(columns=frame.columns)]).sort_index()
+        state["frame"] = frame
+        state["version"] += 1
+        _note_change(state, [rownum])
+        version = state["version"]
+    if REPLICA_PATH:
+        _replica_after_write(tab_name, [rownum], version)
+    else:
+        _after_write(tab_name, version - 1, version, rownum, updated.loc[rownum].to_dict())
+
+def _invalidate_snapshot(tab_name: str) -> None:
+    """A write landed on the sheet but could not be applied here: fully re-read the tab on its next sync."""
+    _LOG.exception("Write-through to %s failed; the tab will be re-read from Sheets", tab_name)
+    state = _sync_state(tab_name)
+    with state["lock"]:
+        state["known"] = 0        # no delta from a snapshot we no longer trust
+        state["content"] = None   # the reload replaces the frame and bumps the version
+        state["changes"] = []     # copies of the frame must wait for that reload
+        state["synced_at"] = 0.0
+    if REPLICA_PATH:
+        _replica()["wake"].set()
+
+# ===================== Write queue (batched, coalescing) =====================
+# Appends and row edits from every session go through one process-wide queue. A
+# flusher thread drains it on a short timer (or as soon as WRITE_BATCH_MAX items
+# are waiting): all pending appends for a tab become one values.append call and
+# all pending edits one values.batchUpdate. Each submitter blocks on its own
+# Future, so success/failure is still reported per item. Items are keyed by
+# EntryID: re-submitting a pending (or recently written) append returns the same
+# result instead of writing a duplicate row, and a newer edit of a pending row
+# replaces the older one.
+
+WRITE_FLUSH_SECS = float(st.secrets.get("WRITE_FLUSH_SECS") or os.getenv("WRITE_FLUSH_SECS") or 0.3)
+WRITE_BATCH_MAX = int(st.secrets.get("WRITE_BATCH_MAX") or os.getenv("WRITE_BATCH_MAX") or 50)
+WRITE_TIMEOUT_SECS = 300     # longer than a full _with_backoff cycle plus queueing
+WRITE_DONE_KEEP = 2000       # recent EntryIDs remembered for retry dedupe
+
+@st.cache_resource
+def _write_queue() -> dict:
+    """Create the write queue and start its flusher (once per process)."""
+    q = {
+        "pending": OrderedDict(),   # (kind, tab, EntryID) -> item
+        "inflight": {},             # same keys, batch currently being written
+        "done": OrderedDict(),      # (tab, EntryID) -> Future of a finished append
+        "cond": threading.Condition(),
+        "stats": {"batches": 0, "items": 0, "deduped": 0},
+    }
+    threading.Thread(target=_write_flusher, args=(q,), daemon=True, name="sheets-writer").start()
+    return q
+
+def _open_tab_ws(tab_name: str):
+    return _open_entries_ws() if tab_name == TAB_NAME else _open_rfm_ws()
+
+def _submit_write(kind: str, tab_name: str, ordered: list, rownum: int | None = None,
+                  expect_entry: str | None = None) -> Future:
+    """Queue one append ("append") or row edit ("update"); returns a Future of the sheet row number."""
+    q = _write_queue()
+    entry_id = str(ordered[7] or "").strip()
+    key = (kind, tab_name, entry_id or object())
+    with q["cond"]:
+        if kind == "append" and (tab_name, entry_id) in q["done"]:
+            q["stats"]["deduped"] += 1
+            return q["done"][(tab_name, entry_id)]
+        if kind == "append" and key in q["inflight"]:
+            q["stats"]["deduped"] += 1
+            return q["inflight"][key]["future"]
+        item = q["pending"].get(key)
+        if item is not None:
+            q["stats"]["deduped"] += 1
+            if kind == "update":
+                item["ordered"], item["rownum"], item["expect"] = ordered, rownum, expect_entry
+            return item["future"]
+        item = {"kind": kind, "tab": tab_name, "ordered": ordered, "rownum": rownum,
+                "expect": expect_entry, "future": Future()}
+        q["pending"][key] = item
+        q["cond"].notify()
+    return item["future"]
+
+def _write_flusher(q: dict) -> None:
+    """Background loop: gather a batch for up to WRITE_FLUSH_SECS, then write it."""
+    cond = q["cond"]
+    while True:
+        with cond:
+            cond.wait_for(lambda: q["pending"])
+            deadline = time.time() + WRITE_FLUSH_SECS
+            while len(q["pending"]) < WRITE_BATCH_MAX and time.time() < deadline:
+                cond.wait(deadline - time.time())
+            batch, q["pending"] = q["pending"], OrderedDict()
+            q["inflight"] = batch
+        try:
+            _flush_writes(list(batch.values()))
+        finally:
+            with cond:
+                q["inflight"] = {}
+                for (kind, tab, entry_id), item in batch.items():
+                    if kind == "append" and isinstance(entry_id, str) and entry_id \
+                            and item["future"].exception() is None:
+                        q["done"][(tab, entry_id)] = item["future"]
+                while len(q["done"]) > WRITE_DONE_KEEP:
+                    q["done"].popitem(last=False)
+                q["stats"]["batches"] += 1
+                q["stats"]["items"] += len(batch)
+
+def _flush_writes(items: list) -> None:
+    """Write one batch: a single append call and a single batch update per tab."""
+    for tab_name in dict.fromkeys(i["tab"] for i in items):
+        appends = [i for i in items if i["tab"] == tab_name and i["kind"] == "append"]
+        updates = [i for i in items if i["tab"] == tab_name and i["kind"] == "update"]
+        if appends:
+            _run_batch(appends, _flush_appends, tab_name, appends)
+        if updates:
+            _run_batch(updates, _flush_updates, tab_name, updates)
+
+def _run_batch(items: list, fn, *args) -> None:
+    try:
+        fn(*args)
+    except Exception as e:
+        for i in items:
+            if not i["future"].done():
+                i["future"].set_exception(e)
+
+def _flush_appends(tab_name: str, items: list) -> None:
+    ws = _open_tab_ws(tab_name)
+    rows = [i["ordered"] for i in items]
+    resp = _with_backoff(ws.append_rows, rows, value_input_option="USER_ENTERED",
+                         include_values_in_response=True)
+    first, _ = _response_rows(resp)
+    # The rows are on the sheet now: a failing cache update must not fail the write
+    # (callers would retry it and append the rows twice)
+    try:
+        _write_through_append(tab_name, rows, resp)
+    except Exception:
+        _invalidate_snapshot(tab_name)
+    for n, i in enumerate(items):
+        i["future"].set_result(first + n if first else None)
+
+def _flush_updates(tab_name: str, items: list) -> None:
+    ws = _open_tab_ws(tab_name)
+    checked = [i for i in items if i["expect"]]
+    if checked:
+        # One small read for the whole batch: does each target row still hold its entry?
+        found = _with_backoff(entry_ids_at, ws, [i["rownum"] for i in checked])
+        moved = [i for i, e in zip(checked, found) if e != i["expect"].strip()]
+        for i in moved:
+            i["future"].set_exception(ValueError(
+                f"Row {i['rownum']} no longer holds entry {i['expect']}; reload the entry and try again."
+            ))
+        if moved:
+            _sync_state(tab_name)["synced_at"] = 0.0
+            items = [i for i in items if all(i is not m for m in moved)]
+        if not items:
+            return
+    data = [{"range": f"A{i['rownum']}:I{i['rownum']}", "values": [i["ordered"]]} for i in items]
+    resp = _with_backoff(ws.batch_update, data, value_input_option="USER_ENTERED",
+                         include_values_in_response=True)
+    responses = (resp or {}).get("responses") or [{}] * len(items)
+    stale = False
+    for i, r in zip(items, responses):
+        if not stale:
+            try:
+                _write_through_update(tab_name, i["rownum"], i["ordered"], r)
+            except Exception:
+                _invalidate_snapshot(tab_name)
+                stale = True
+        i["future"].set_result(i["rownum"])
+
+def _write(kind: str, tab_name: str, ordered: list, rownum: int | None = None,
+           expect_entry: str | None = None) -> int | None:
+    """
+    Queue a write and wait for its batch; raises if that batch (or its row check) failed.
+    With JOURNAL_PATH the write is journaled first and only waited on briefly;
+    a data service client hands the write to the owning process.
+    """
+    remote = _remote_service()
+    if remote is not None:
+        return remote.write(kind, tab_name, ordered, rownum, expect_entry)
+    if JOURNAL_PATH:
+        return _journal_write(kind, tab_name, ordered, rownum, expect_entry)
+    return _submit_write(kind, tab_name, ordered, rownum, expect_entry).result(timeout=WRITE_TIMEOUT_SECS)
+
+def _write_many(kind: str, tab_name: str, items: list) -> list:
+    """
+    Several writes of one kind, items = [(ordered, rownum, expect_entry)], queued
+    together so they go out as one append / one batch update (up to WRITE_BATCH_MAX).
+    Returns per item the sheet row (None while journaled) or the exception that refused it.
+    """
+    remote = _remote_service()
+    if remote is not None:
+        return remote.write_many(kind, tab_name, items)
+    if JOURNAL_PATH:
+        pending = [_journal_submit(kind, tab_name, o, r, e, wake=False) for o, r, e in items]
+        _journal()["wake"].set()
+        deadline = time.time() + JOURNAL_ACK_SECS
+        waits = [lambda seq=seq, fut=fut: _journal_wait(seq, fut, max(0.0, deadline - time.time()))
+                 for seq, fut in pending]
+    else:
+        futures = [_submit_write(kind, tab_name, o, r, e) for o, r, e in items]
+        waits = [lambda fut=fut: fut.result(timeout=WRITE_TIMEOUT_SECS) for fut in futures]
+    results = []
+    for wait in waits:
+        try:
+            results.append(wait())
+        except Exception as e:
+            results.append(e)
+    return results
+
+# ===================== Write-ahead journal (optional) =====================
+# With JOURNAL_PATH set, every append/edit is first stored in a local SQLite journal
+# (fsynced) and acknowledged; a replayer thread feeds pending entries, oldest first,
+# through the write queue above. Quota exhaustion or an outage leaves them pending
+# and they are retried with a growing delay, also after a restart. Replay is
+# idempotent: an append whose EntryID is already on the sheet is just marked done.
+
+JOURNAL_PATH = st.secrets.get("JOURNAL_PATH") or os.getenv("JOURNAL_PATH")
+JOURNAL_ACK_SECS = float(st.secrets.get("JOURNAL_ACK_SECS") or os.getenv("JOURNAL_ACK_SECS") or 2.0)
+JOURNAL_RETRY_MAX_SECS = 120
+JOURNAL_KEEP_SECS = 7 * 24 * 3600    # replayed entries kept this long for inspection
+
+@st.cache_resource
+def _journal() -> dict:
+    """Open the journal and start its replayer (once per process)."""
+    box = {
+        "journal": Journal(JOURNAL_PATH),
+        "wake": threading.Event(),
+        "waiters": {},          # seq -> Futures of callers still waiting for the ack window
+        "error": None,
+        "lock": threading.Lock(),
+    }
+    threading.Thread(target=_journal_replayer, args=(box,), daemon=True, name="journal-replay").start()
+    return box
+
+def _journal_submit(kind: str, tab_name: str, ordered: list, rownum: int | None,
+                    expect_entry: str | None, wake: bool = True) -> tuple[int, Future]:
+    """Journal a write; returns (seq, Future resolved when the replayer has written it)."""
+    box = _journal()
+    entry_id = str(ordered[7] or "").strip()
+    fut = Future()
+    with box["lock"]:
+        seq, state = box["journal"].record(kind, tab_name, entry_id, ordered, rownum, expect_entry)
+        if state == "done":
+            fut.set_result(entry_row(tab_name, entry_id))
+        else:
+            box["waiters"].setdefault(seq, []).append(fut)
+    if wake:
+        box["wake"].set()
+    return seq, fut
+
+def _journal_wait(seq: int, fut: Future, timeout: float) -> int | None:
+    box = _journal()
+    try:
+        return fut.result(timeout=timeout)
+    except FutureTimeout:
+        return None
+    finally:
+        with box["lock"]:
+            waiting = box["waiters"].get(seq, [])
+            if fut in waiting:
+                waiting.remove(fut)
+            if not waiting:
+                box["waiters"].pop(seq, None)
+
+def _journal_write(kind: str, tab_name: str, ordered: list, rownum: int | None,
+                   expect_entry: str | None) -> int | None:
+    """
+    Journal a write, then wait up to JOURNAL_ACK_SECS for it to reach Sheets.
+    Returns the sheet row, or None if it is still pending (it is safe on disk).
+    Raises only if the replay was refused outright (e.g. the edited row is gone).
+    """
+    seq, fut = _journal_submit(kind, tab_name, ordered, rownum, expect_entry)
+    return _journal_wait(seq, fut, JOURNAL_ACK_SECS)
+
+def _journal_settle(box: dict, seq: int, result=None, error: Exception | None = None) -> None:
+    with box["lock"]:
+        waiting = box["waiters"].pop(seq, [])
+    for fut in waiting:
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+def _replay_batch(box: dict) -> int:
+    """Replay the oldest pending entries once (one queue batch); returns how many were taken."""
+    journal = box["journal"]
+    entries = journal.pending(WRITE_BATCH_MAX)
+    submitted = []
+    for e in entries:
+        if e["kind"] == "append" and e["entry_id"]:
+            landed = entry_row(e["tab"], e["entry_id"])
+            if landed is not None:  # written before a crash/restart: do not append twice
+                journal.mark_done([e])
+                _journal_settle(box, e["seq"], landed)
+                continue
+        rownum = e["rownum"]
+        if e["kind"] == "update" and e["expect"]:
+            rownum = entry_row(e["tab"], e["expect"]) or rownum  # rows may have moved meanwhile
+        submitted.append((e, _submit_write(e["kind"], e["tab"], e["values"], rownum, e["expect"])))
+    transient = None
+    for e, fut in submitted:
+        try:
+            result = fut.result(timeout=WRITE_TIMEOUT_SECS)
+        except ValueError as err:   # row check failed: replaying again cannot help
+            journal.mark_failed(e["seq"], str(err))
+            _journal_settle(box, e["seq"], error=err)
+        except Exception as err:    # quota exhausted, offline, ...: stays pending
+            journal.mark_retry([e["seq"]], str(err))
+            transient = err
+        else:
+            journal.mark_done([e])
+            _journal_settle(box, e["seq"], result)
+    if transient is not None:
+        raise transient
+    return len(entries)
+
+def _journal_replayer(box: dict) -> None:
+    """Background loop: replay pending entries in order; back off while Sheets is unavailable."""
+    _mark_background()
+    failures = 0
+    pruned_at = 0.0
+    while True:
+        try:
+            while _replay_batch(box):
+                pass
+            failures = 0
+            box["error"] = None
+            if time.time() - pruned_at > 3600:
+                box["journal"].prune(JOURNAL_KEEP_SECS)
+                pruned_at = time.time()
+        except Exception as e:
+            failures += 1
+            box["error"] = str(e)
+        delay = min(JOURNAL_RETRY_MAX_SECS, 2.0 ** failures) if failures else 30.0
+        box["wake"].wait(delay)
+        box["wake"].clear()
+
+def journal_backlog() -> int:
+    """Journaled writes not yet in Sheets (0 when the journal is off)."""
+    return _journal()["journal"].backlog() if JOURNAL_PATH else 0
+
+# ===================== Local replica (optional) =====================
+# With REPLICA_PATH set, a background worker mirrors Entries, RFM and Users into a
+# local SQLite file and page renders read only from it. Sheets stays the system of
+# record: writes still go to Sheets first and are then applied to the replica.
+# The replica is a persistence layer: filters, threads and latest status run on
+# the same in-memory views as without it, built from the tab read back from SQLite.
+# Only changed rows move after the first copy: our writes and delta-synced appends
+# are upserted (rows taken from the snapshot's change log) and patched into the
+# frame read back earlier; a full copy and re-read follow only a full reload.
+
+REPLICA_PATH = st.secrets.get("REPLICA_PATH") or os.getenv("REPLICA_PATH")
+REPLICA_SYNC_SECS = int(st.secrets.get("REPLICA_SYNC_SECS") or os.getenv("REPLICA_SYNC_SECS") or 30)
+REPLICA_USERS_SECS = 120
+USERS_TAB = "Users"
+
+@st.cache_resource
+def _replica() -> dict:
+    """Open the replica and start its sync worker (once per process)."""
+    box = {
+        "replica": Replica(REPLICA_PATH),
+        "wake": threading.Event(),
+        "mirrored": {},        # tab -> in-memory snapshot version last copied
+        "frames": {},          # tab -> (replica version, DataFrame)
+        "error": None,
+        "lock": threading.Lock(),
+    }
+    threading.Thread(target=_replica_worker, args=(box,), daemon=True, name="replica-sync").start()
+    return box
+
+def _replica_mirror(box: dict, tab_name: str) -> None:
+    """Bring a tab's replica up to its snapshot: just the changed rows when the change log allows."""
+    _sync_tab(tab_name)  # the worker is already off the UI thread: sync inline
+    state = _sync_state(tab_name)
+    with box["lock"]:
+        with state["lock"]:
+            version, frame = _tab_frame(tab_name, sync=False)
+            mirrored = box["mirrored"].get(tab_name)
+            rownums = _changed_rows(state, mirrored)
+        if mirrored == version:
+            return
+        if rownums is None or not _replica_apply(box, tab_name, frame, rownums):
+            box["replica"].replace_tab(tab_name, _sheet_text(frame))
+        box["mirrored"][tab_name] = version
+
+def _replica_apply(box: dict, tab_name: str, frame: pd.DataFrame, rownums: list) -> bool:
+    """
+    Upsert a few snapshot rows into the replica (caller holds box["lock"]) and carry
+    the frame read back from it, plus the derived views, to the new replica version.
+    False if the table's columns changed and a full copy is needed.
+    """
+    rownums = [r for r in rownums if r in frame.index]
+    if not rownums:
+        return True
+    rep, rows = box["replica"], frame.loc[rownums]
+    before = rep.version(tab_name)
+    if not rep.upsert_rows(tab_name, _sheet_text(rows)):
+        return False
+    after = rep.version(tab_name)
+    cached = box["frames"].get(tab_name)
+    if cached and cached[0] == before and after == before + 1:
+        box["frames"][tab_name] = (after, _replace_rows(cached[1], rows))
+    from_version = before
+    for rownum, row in zip(rownums, rows.to_dict("records")):
+        _after_write(tab_name, from_version, after, rownum, row)
+        from_version = after
+    return True
+
+def _replace_rows(frame: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """A new frame with `rows` (same labels = sheet rows) replacing or adding rows; `frame` is shared and left alone."""
+    frame, rows = _align_categories(frame, rows)
+    old = rows.index.intersection(frame.index)
+    if len(old):
+        frame = frame.copy()
+        frame.loc[old, rows.columns] = rows.loc[old]
+    new = rows.index.difference(frame.index)
+    if len(new):
+        frame = pd.concat([frame, rows.loc[new].reindex(columns=frame.columns)]).sort_index()
+    return frame
+
+def _replica_mirror_users(box: dict) -> None:
+    ws = ensure_user_sheet()
+    values = _with_backoff(ws.get_all_values)
+    header, *rows = values or [[]]
+    width = len(header)
+    users = pd.DataFrame([(list(r) + [""] * width)[:width] for r in rows], columns=header,
+                         index=pd.Index(range(2, len(rows) + 2), dtype="int64"))
+    box["replica"].replace_tab(USERS_TAB, users)
+
+def _replica_worker(box: dict) -> None:
+    """Background loop: delta-sync each tab and mirror changes into SQLite."""
+    _mark_background()
+    users_at = 0.0
+    while True:
+        try:
+            for tab in (TAB_NAME, RFM_TAB):
+                _replica_mirror(box, tab)
+            if time.time() - users_at >= REPLICA_USERS_SECS:
+                _replica_mirror_users(box)
+                users_at = time.time()
+            box["error"] = None
+        except Exception as e:  # keep serving the last good replica
+            box["error"] = str(e)
+        box["wake"].wait(REPLICA_SYNC_SECS)
+        box["wake"].clear()
+
+def _replica_after_write(tab_name: str, rownums: list, version: int) -> None:
+    """Apply just-written rows to the replica right away (read-your-writes)."""
+    box = _replica()
+    _, frame = _tab_frame(tab_name, sync=False)
+    with box["lock"]:
+        if box["mirrored"].get(tab_name) == version - 1 and all(r in frame.index for r in rownums):
+            if _replica_apply(box, tab_name, frame, rownums):
+                box["mirrored"][tab_name] = version
+                return
+    box["wake"].set()  # replica was behind anyway: let the worker catch up
+
+@sheets_layer()
+def _replica_frame(tab_name: str) -> tuple[int, pd.DataFrame]:
+    """(replica version, DataFrame) for a tab, re-read from SQLite only when it changed."""
+    box = _replica()
+    rep = box["replica"]
+    if rep.version(tab_name) is None:
+        # Never mirrored on this machine: one blocking copy, then local reads only
+        if tab_name == USERS_TAB:
+            _replica_mirror_users(box)
+        else:
+            _replica_mirror(box, tab_name)
+    version = rep.version(tab_name)
+    cached = box["frames"].get(tab_name)
+    note_cache(bool(cached and cached[0] == version))
+    if cached and cached[0] == version:
+        return cached
+    frame = rep.frame(tab_name)
+    if tab_name != USERS_TAB:
+        frame = _type_frame(frame)
+    box["frames"][tab_name] = (version, frame)
+    return version, frame
+
+# ===================== Archive partitions (optional) =====================
+# With ARCHIVE_AFTER_DAYS set, a compaction job moves fully closed WO/RFM threads
+# whose last entry is older than that into per-month archive tabs ("Entries 2025-01",
+# "RFM 2025-01": source tab + month of the thread's last entry). The Partitions tab
+# records each archive tab's date range and row count. Page loads read only the hot
+# tabs; a date-range search opens just the partitions whose range overlaps it.
+
+ARCHIVE_AFTER_DAYS = int(st.secrets.get("ARCHIVE_AFTER_DAYS") or os.getenv("ARCHIVE_AFTER_DAYS") or 0)  # 0 = off
+ARCHIVE_COMPACT_SECS = 24 * 3600     # automatic compaction at most once a day per process
+MANIFEST_TAB = "Partitions"
+MANIFEST_HEADERS = ["Tab", "Source", "Month", "MinDate", "MaxDate", "Rows", "UpdatedAt"]
+CLOSED_STATUSES = {TAB_NAME: {"Completed", "RTS"}, RFM_TAB: {"Completed", "RTS", "Close"}}
+# Archived rows are labelled manifest_row * ARCHIVE_LABEL_BASE + sheet_row, so they
+# can sit in one frame with hot rows (labels = sheet rows) without colliding.
+ARCHIVE_LABEL_BASE = 10 ** 9
+
+@st.cache_resource
+def _archive_state() -> dict:
+    return {
+        "manifest": None, "manifest_at": 0.0, "ws": None,
+        "frames": {},           # archive tab -> (manifest UpdatedAt, DataFrame)
+        "compacted_at": 0.0, "running": False, "result": None, "error": None,
+        "lock": threading.Lock(),           # guards the cached manifest/frames
+        "compact_lock": threading.Lock(),   # one compaction per process at a time
+    }
+
+@sheets_layer()
+def _manifest_ws(create: bool = False):
+    """The Partitions worksheet, or None while nothing has been archived yet."""
+    state = _archive_state()
+    if state["ws"] is None:
+        sh = _spreadsheet()
+        try:
+            state["ws"] = _with_backoff(sh.worksheet, MANIFEST_TAB)
+        except WorksheetNotFound:
+            if not create:
+                return None
+            ws = _with_backoff(sh.add_worksheet, title=MANIFEST_TAB, rows=200, cols=len(MANIFEST_HEADERS))
+            _with_backoff(ws.update, "A1", [MANIFEST_HEADERS])
+            state["ws"] = ws
+    return state["ws"]
+
+@sheets_layer()
+def archive_partitions(tab_name: str | None = None, refresh: bool = False) -> list[dict]:
+    """
+    Manifest entries (optionally only those archived from one tab), re-read at most
+    once per SYNC_TTL_SECS. Each entry carries its manifest row number ('row') and
+    MinDate/MaxDate as Timestamps (NaT when the rows had no usable date).
+    """
+    state = _archive_state()
+    with state["lock"]:
+        stale = refresh or time.time() - state["manifest_at"] >= SYNC_TTL_SECS
+    if stale:
+        ws = _manifest_ws()
+        values = _with_backoff(ws.get_all_values) if ws is not None else []
+        parts = [p for p in (_partition_entry(n, r) for n, r in enumerate(values[1:], start=2)) if p]
+        with state["lock"]:
+            state.update(manifest=parts, manifest_at=time.time())
+    parts = state["manifest"] or []
+    return [p for p in parts if tab_name is None or p["Source"] == tab_name]
+
+def _partition_entry(row: int, values: list) -> dict | None:
+    """One manifest row as a partition entry (None for a blank row)."""
+    p = dict(zip(MANIFEST_HEADERS, (list(values) + [""] * len(MANIFEST_HEADERS))[:len(MANIFEST_HEADERS)]))
+    if not p["Tab"].strip():
+        return None
+    p.update(row=row, MinDate=pd.to_datetime(p["MinDate"], errors="coerce"),
+             MaxDate=pd.to_datetime(p["MaxDate"], errors="coerce"),
+             Rows=int(p["Rows"]) if str(p["Rows"]).isdigit() else 0)
+    return p
+
+@sheets_layer()
+def _archive_part(part: dict) -> pd.DataFrame:
+    """Typed frame of one archive tab, re-read only when its manifest entry changed."""
+    state = _archive_state()
+    with state["lock"]:
+        cached = state["frames"].get(part["Tab"])
+    if cached and cached[0] == part["UpdatedAt"]:
+        return cached[1]
+    sh = _spreadsheet()
+    ws = _with_backoff(sh.worksheet, part["Tab"])
+    frame = _read_full(part["Source"], ws)["frame"]
+    frame.index = frame.index + part["row"] * ARCHIVE_LABEL_BASE
+    with state["lock"]:
+        state["frames"][part["Tab"]] = (part["UpdatedAt"], frame)
+    return frame
+
+def archive_frame(tab_name: str, start_date: dt.date | None, end_date: dt.date | None) -> pd.DataFrame:
+    """Archived rows of a tab from the partitions whose date range overlaps [start, end]."""
+    lo = pd.Timestamp(start_date) if isinstance(start_date, dt.date) else None
+    hi = pd.Timestamp(end_date) if isinstance(end_date, dt.date) else None
+    frames = []
+    for p in archive_partitions(tab_name):
+        # NaT bounds compare False, so partitions without dates are never pruned
+        if (lo is not None and p["MaxDate"] < lo) or (hi is not None and p["MinDate"] > hi):
+            continue
+        frames.append(_archive_part(p))
+    if not frames:
+        return _empty_frame(tab_name)
+    out = frames[0]
+    for f in frames[1:]:
+        out = pd.concat(_align_categories(out, f))
+    return out
+
+def _closed_threads(tab_name: str, frame: pd.DataFrame, version, cutoff: pd.Timestamp) -> dict:
+    """month -> row labels of every thread whose last entry is closed and older than cutoff."""
+    closed = CLOSED_STATUSES[tab_name]
+    by_month = {}
+    for id_value, labels in _thread_index(tab_name, "snapshot", version, frame).items():
+        last = frame.loc[labels[-1]]
+        created = last["CreatedAt"]
+        if not id_value.strip() or str(last["Status"]) not in closed or pd.isna(created) or created >= cutoff:
+            continue
+        by_month.setdefault(created.strftime("%Y-%m"), []).append(labels)
+    return by_month
+
+def _entry_id_rows(ws) -> dict:
+    """EntryID -> sheet row, from one read of the EntryID column."""
+    col = _with_backoff(ws.get, "H2:H")
+    return {str(r[0]).strip(): n for n, r in enumerate(col, start=2) if r and str(r[0]).strip()}
+
+def _record_partition(title: str, tab_name: str, month: str, rows: pd.DataFrame, added: int) -> None:
+    """Create or widen a partition's manifest entry after rows were added to it."""
+    mws = _manifest_ws(create=True)
+    prev = next((p for p in archive_partitions(refresh=True) if p["Tab"] == title), None)
+    dates = rows["Date"].dropna()
+    lo, hi = (dates.min(), dates.max()) if len(dates) else (pd.NaT, pd.NaT)
+    if prev is not None:
+        lo = min((d for d in (lo, prev["MinDate"]) if not pd.isna(d)), default=pd.NaT)
+        hi = max((d for d in (hi, prev["MaxDate"]) if not pd.isna(d)), default=pd.NaT)
+    # UpdatedAt changes on every write, so a cached frame of this partition is never reused
+    entry = [title, tab_name, month, _fmt_day(lo), _fmt_day(hi),
+             str((prev["Rows"] if prev else 0) + added), dt.datetime.now().isoformat(timespec="milliseconds")]
+    if prev is not None:
+        _with_backoff(mws.update, f"A{prev['row']}", [entry])
+        row = prev["row"]
+    else:
+        row, _ = _response_rows(_with_backoff(mws.append_rows, [entry], value_input_option="RAW"))
+    # Searches and exports see the partition right away (its rows are about to leave the hot tab)
+    state = _archive_state()
+    with state["lock"]:
+        state["frames"].pop(title, None)
+        if row is None:
+            state["manifest_at"] = 0.0
+        else:
+            parts = [p for p in state["manifest"] or [] if p["Tab"] != title]
+            state["manifest"] = sorted(parts + [_partition_entry(row, entry)], key=lambda p: p["row"])
+
+@sheets_layer()
+def compact_archive(tab_name: str, older_than_days: int | None = None) -> dict:
+    """
+    Move closed threads older than the cutoff out of a hot tab into its monthly
+    archive tabs; returns {archive tab: rows moved}. Safe to re-run after a
+    failure: rows already present in an archive tab are not copied twice, and
+    hot rows are only deleted after their archive copy was written.
+    """
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = pd.Timestamp.now() - pd.Timedelta(days=days)
+    headers = EXPECTED_HEADERS if tab_name == TAB_NAME else RFM_HEADERS
+    state = _sync_state(tab_name)
+    with _archive_state()["compact_lock"]:
+        state["synced_at"] = 0.0
+        _sync_tab(tab_name)
+        version, frame = _tab_frame(tab_name, sync=False)
+        by_month = _closed_threads(tab_name, frame, version, cutoff)
+        if not by_month:
+            return {}
+        ws = _open_tab_ws(tab_name)
+        on_sheet = _entry_id_rows(ws)
+        sh = _spreadsheet()
+        moved, entry_ids = {}, []
+        for month, threads in sorted(by_month.items()):
+            # Only whole threads whose every row is still on the sheet under its EntryID
+            labels = [l for ls in threads
+                      if all(str(e).strip() in on_sheet for e in frame.loc[ls, "EntryID"])
+                      for l in ls]
+            if not labels:
+                continue
+            rows = frame.loc[labels]
+            title = f"{tab_name} {month}"
+            try:
+                aws = _with_backoff(sh.worksheet, title)
+            except WorksheetNotFound:
+                aws = _with_backoff(sh.add_worksheet, title=title, rows=max(100, len(labels) + 1), cols=len(headers))
+                _with_backoff(aws.update, "A1", [headers])
+            archived = set(_entry_id_rows(aws))
+            ids = rows["EntryID"].astype(str).str.strip()
+            new = _sheet_text(rows[~ids.isin(archived).to_numpy()])[headers]
+            if len(new):
+                _with_backoff(aws.append_rows, new.values.tolist(), value_input_option="USER_ENTERED")
+            _record_partition(title, tab_name, month, rows, len(new))
+            moved[title] = len(rows)
+            entry_ids.extend(ids)
+        if not entry_ids:
+            return {}
+        # Row numbers are re-read right before the delete, in case others deleted rows meanwhile
+        on_sheet = _entry_id_rows(ws)
+        _with_backoff(delete_rows, ws, [on_sheet[e] for e in entry_ids if e in on_sheet])
+        with state["lock"]:
+            # Rows shifted: force a full reload but keep serving the old frame until then
+            state["known"] = 0
+            state["synced_at"] = 0.0
+        _sync_tab(tab_name)
+        archive_partitions(refresh=True)
+        if REPLICA_PATH:
+            _replica()["wake"].set()
+        return moved
+
+def _compact_all() -> dict:
+    return {tab: compact_archive(tab) for tab in (TAB_NAME, RFM_TAB)}
+
+def _maybe_compact() -> None:
+    """Run compaction in the background when it is enabled and due (at most once a day)."""
+    state = _archive_state()
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return
+    with state["lock"]:
+        if state["running"] or time.time() - state["compacted_at"] < ARCHIVE_COMPACT_SECS:
+            return
+        state["running"] = True
+
+    def run():
+        _mark_background()
+        try:
+            state["result"] = _compact_all()
+            state["error"] = None
+        except Exception as e:  # hot tabs are untouched until archive copies exist
+            state["error"] = str(e)
+        finally:
+            state["compacted_at"] = time.time()
+            state["running"] = False
+
+    threading.Thread(target=run, daemon=True, name="archive-compaction").start()
+
+# ===================== Bulk import / export =====================
+# Historical CSVs are streamed into a tab in IMPORT_CHUNK_ROWS-row values.append
+# calls at background priority, so interactive sessions keep their quota. Progress
+# is checkpointed per source file (sha1) in IMPORT_STATE_PATH: re-running the same
+# file after an interruption continues after the last chunk that reached the sheet.
+# Exports stream a tab (and optionally its archive partitions) out in row chunks.
+
+IMPORT_CHUNK_ROWS = int(st.secrets.get("IMPORT_CHUNK_ROWS") or os.getenv("IMPORT_CHUNK_ROWS") or 500)
+IMPORT_STATE_PATH = st.secrets.get("IMPORT_STATE_PATH") or os.getenv("IMPORT_STATE_PATH") or "import_state.sqlite3"
+
+def _prepare_import(tab_name: str, rows: list[dict]) -> tuple[list[list], int]:
+    """
+    Imported records -> sheet rows: dates normalised (unparseable text is kept),
+    CreatedAt defaulted from Date, EntryIDs assigned. Rows without a WO/RFM are
+    dropped; returns (rows, dropped).
+    """
+    headers = EXPECTED_HEADERS if tab_name == TAB_NAME else RFM_HEADERS
+    df = pd.DataFrame(rows, columns=headers).fillna("")
+    keep = df[headers[0]].astype(str).str.strip().ne("")
+    df = df[keep]
+    for c in DATE_COLUMNS:
+        raw = df[c].astype(str).str.strip()
+        parsed = _parse_dates(raw)
+        fmt = "%Y-%m-%d" if c == "Date" else "%Y-%m-%dT%H:%M:%S"
+        df[c] = parsed.dt.strftime(fmt).where(parsed.notna(), raw)
+    no_created = df["CreatedAt"].eq("")
+    df.loc[no_created, "CreatedAt"] = df.loc[no_created, "Date"].map(
+        lambda d: f"{d}T00:00:00" if d else dt.datetime.now().isoformat(timespec="seconds"))
+    no_id = df["EntryID"].astype(str).str.strip().eq("")
+    df.loc[no_id, "EntryID"] = [gen_entry_id() for _ in range(int(no_id.sum()))]
+    return df.values.tolist(), int((~keep).sum())
+
+@sheets_layer()
+def import_csv(tab_name: str, fileobj, progress=None) -> dict:
+    """
+    Stream a CSV of historical entries into Entries or RFM, IMPORT_CHUNK_ROWS rows
+    per append call. Resumable (see above); progress(csv_rows_read, rows_imported)
+    is called after each chunk. Returns {"imported", "dropped", "resumed_from"}.
+    """
+    headers = EXPECTED_HEADERS if tab_name == TAB_NAME else RFM_HEADERS
+    source = source_digest(fileobj)
+    checkpoint = ImportCheckpoint(IMPORT_STATE_PATH)
+    ws = _open_tab_ws(tab_name)
+    done = checkpoint.get(source, tab_name)
+    if done["inflight_first"]:
+        # Interrupted mid-chunk: keep it if the append landed, else read it again
+        if done["inflight_first"] in _entry_id_rows(ws):
+            checkpoint.commit_chunk(source, tab_name, done["inflight_consumed"], done["inflight_rows"])
+        else:
+            checkpoint.discard_chunk(source, tab_name)
+        done = checkpoint.get(source, tab_name)
+    imported = dropped = 0
+    was_background = getattr(_CALL_CTX, "background", False)
+    _mark_background()  # bulk traffic yields to interactive calls
+    try:
+        for consumed, rows in iter_import_chunks(fileobj, headers, COLUMN_ALIASES, IMPORT_CHUNK_ROWS,
+                                                 skip=done["consumed"]):
+            values, n_dropped = _prepare_import(tab_name, rows)
+            dropped += n_dropped
+            if values:
+                checkpoint.begin_chunk(source, tab_name, consumed, values[0][7], len(values))
+                _with_backoff(ws.append_rows, values, value_input_option="USER_ENTERED")
+            checkpoint.commit_chunk(source, tab_name, consumed, len(values))
+            imported += len(values)
+            if progress:
+                progress(consumed, done["imported"] + imported)
+    finally:
+        _CALL_CTX.background = was_background
+        _sync_state(tab_name)["synced_at"] = 0.0   # the next read delta-syncs the new tail
+        if REPLICA_PATH:
+            _replica()["wake"].set()
+    return {"imported": imported, "dropped": dropped, "resumed_from": done["consumed"]}
+
+@sheets_layer()
+def export_csv(tab_name: str, out, include_archive: bool = False) -> int:
+    """
+    Stream a tab from Sheets into a text file object as CSV, SYNC_CHUNK_ROWS rows
+    per read (never the whole sheet in memory); archive partitions are appended
+    after the hot rows when asked. Returns the number of data rows written.
+    """
+    headers = EXPECTED_HEADERS if tab_name == TAB_NAME else RFM_HEADERS
+    csv.writer(out).writerow(headers)
+    sources = [_open_tab_ws(tab_name)]
+    if include_archive:
+        sh = _spreadsheet()
+        sources += [_with_backoff(sh.worksheet, p["Tab"]) for p in archive_partitions(tab_name)]
+    written = 0
+    for ws in sources:
+        n_rows, _ = _with_backoff(grid_size, ws)
+        last_col = rowcol_to_a1(1, len(headers))[:-1]
+        chunks = read_chunks(ws, 2, n_rows, last_col, SYNC_CHUNK_ROWS, 1, _with_backoff)
+        written += write_csv_chunks(out, chunks, len(headers))
+    return written
+
+# ===================== Backups (built on request) =====================
+# The backup is only built when someone asks for it, from the in-memory tab frames
+# (no Sheets reads), and cached per (format, Entries/RFM versions): asking again
+# without any change in between reuses the same file. Each tab is written in
+# BACKUP_CHUNK_ROWS slices straight into the zip (CSV) or into Parquet row groups.
+
+BACKUP_CHUNK_ROWS = 5000
+BACKUP_KEEP = 4              # artifacts kept per process (latest first)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet backups need pyarrow (optional)
+    pq = None
+BACKUP_FORMATS = ["CSV (zip)"] + (["Parquet (zip)"] if pq is not None else [])
+
+@st.cache_resource
+def _backup_cache() -> dict:
+    return {"artifacts": OrderedDict(), "lock": threading.Lock()}
+
+def _write_csv_backup(zf: zipfile.ZipFile, name: str, frame: pd.DataFrame) -> None:
+    with zf.open(f"{name}.csv", "w") as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(list(_sheet_text(frame.iloc[:0]).columns))
+        for a in range(0, len(frame), BACKUP_CHUNK_ROWS):
+            writer.writerows(_sheet_text(frame.iloc[a:a + BACKUP_CHUNK_ROWS]).itertuples(index=False, name=None))
+        text.flush()
+        text.detach()
+
+def _write_parquet_backup(zf: zipfile.ZipFile, name: str, frame: pd.DataFrame, tmpdir: str) -> None:
+    """Dates stay timestamps (with DateText/CreatedAtText where the sheet held other text), the rest is text."""
+    schema = pa.schema([(c, pa.timestamp("us") if c in DATE_COLUMNS else pa.string()) for c in frame.columns])
+    path = os.path.join(tmpdir, f"{name}.parquet")
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for a in range(0, len(frame), BACKUP_CHUNK_ROWS):
+            part = frame.iloc[a:a + BACKUP_CHUNK_ROWS].copy()
+            for c in part.columns:
+                if c in DATE_TEXT_COLUMNS.values():
+                    part[c] = part[c].astype(object).where(part[c].notna(), None)
+                elif c not in DATE_COLUMNS:
+                    part[c] = part[c].astype(str)
+            writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False, safe=False))
+    zf.write(path, f"{name}.parquet")
+
+def _build_backup(fmt: str) -> dict:
+    buf = io.BytesIO()
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmpdir, \
+            zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for tab in (TAB_NAME, RFM_TAB):
+            _, frame = _current_frame(tab)
+            name = tab.lower()
+            if fmt.startswith("Parquet"):
+                _write_parquet_backup(zf, name, frame, tmpdir)
+            else:
+                _write_csv_backup(zf, name, frame)
+            rows[tab] = len(frame)
+    stamp = dt.datetime.now().strftime("%Y%m%d_%H%M")
+    return {"name": f"turnover_backup_{stamp}.zip", "data": buf.getvalue(), "rows": rows}
+
+def backup_artifact(fmt: str) -> tuple:
+    """Cache key of a backup of both tabs at their current versions, building it if needed."""
+    key = (fmt, tuple(tab_version(tab) for tab in (TAB_NAME, RFM_TAB)))
+    cache = _backup_cache()
+    with cache["lock"]:  # concurrent requests for the same versions wait and share one build
+        if key not in cache["artifacts"]:
+            cache["artifacts"][key] = _build_backup(fmt)
+            while len(cache["artifacts"]) > BACKUP_KEEP:
+                cache["artifacts"].popitem(last=False)
+    return key
 
 # ===================== Helpers =====================
 
@@ -310,35 +1978,38 @@ def gen_entry_id() -> str:
     rnd = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
     return f"E{ts}{rnd}"
 
+# Header spellings seen in older sheets/exports -> canonical column
+COLUMN_ALIASES = {
+    "WO #": "WO", "WO#": "WO", "Work Order": "WO",
+    "Tittle": "Title",
+    "Loc": "Location", "Area": "Location", "Place": "Location",
+    "Entry ID": "EntryID", "Created At": "CreatedAt",
+}
+
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df.columns = [str(c).strip() for c in df.columns]
-    alias = {
-        "WO #": "WO", "WO#": "WO", "Work Order": "WO",
-        "Tittle": "Title",
-        "Loc": "Location", "Area": "Location", "Place": "Location",
-        "Entry ID": "EntryID", "Created At": "CreatedAt",
-    }
-    df.rename(columns=alias, inplace=True)
+    df.rename(columns=COLUMN_ALIASES, inplace=True)
     for col in EXPECTED_HEADERS:
         if col not in df.columns:
             df[col] = ""
     return df
 
+@timed("latest_status_by_wo")
 def latest_status_by_wo(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
     tmp = df.copy()
-    tmp["CreatedAt_ts"] = pd.to_datetime(tmp["CreatedAt"], errors="coerce")
-    tmp = tmp.sort_values("CreatedAt_ts").groupby("WO", as_index=False).tail(1)
+    tmp["CreatedAt_ts"] = _as_datetime(tmp["CreatedAt"])
+    tmp = tmp.sort_values("CreatedAt_ts").groupby("WO", as_index=False, observed=True).tail(1)
     return tmp
 
 def latest_status_by_rfm(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
     tmp = df.copy()
-    tmp["CreatedAt_ts"] = pd.to_datetime(tmp["CreatedAt"], errors="coerce")
-    tmp = tmp.sort_values("CreatedAt_ts").groupby("RFM", as_index=False).tail(1)
+    tmp["CreatedAt_ts"] = _as_datetime(tmp["CreatedAt"])
+    tmp = tmp.sort_values("CreatedAt_ts").groupby("RFM", as_index=False, observed=True).tail(1)
     return tmp
 
 def wo_line(wo: str, title: str, res: str) -> str:
@@ -360,15 +2031,44 @@ def unicode_bold(s: str) -> str:
 def safe_col(df: pd.DataFrame, name: str) -> pd.Series:
     return df[name] if name in df.columns else pd.Series([""] * len(df), index=df.index)
 
+def _prefix_match(frame: pd.DataFrame, query: str, fields: list[str]) -> pd.Series:
+    """Rows where every query term starts a word in one of the fields (SearchIndex semantics)."""
+    text = safe_col(frame, fields[0]).astype(str).str.lower()
+    for f in fields[1:]:
+        text = text + " " + safe_col(frame, f).astype(str).str.lower()
+    mask = pd.Series(True, index=frame.index)
+    for term in dict.fromkeys(tokenize(query)):
+        mask &= text.str.contains(r"(?<!\w)" + re.escape(term), regex=True, na=False)
+    return mask
+
+@timed("apply_filters")
 def apply_filters(df0,
                   query_text: str,
                   start_date: dt.date | None,
                   end_date: dt.date | None,
                   loc_filter: list[str],
-                  status_filter: list[str]) -> pd.DataFrame:
-    out = df0.copy()
+                  status_filter: list[str],
+                  index: SearchIndex | None = None,
+                  archive: bool = False) -> pd.DataFrame:
+    """
+    Filter Entries rows; with a search index the query is a token/prefix AND match.
+    With archive=True and a date range, rows from the archive partitions that
+    overlap the range are searched too (labels >= ARCHIVE_LABEL_BASE).
+    """
+    out = df0  # only ever narrowed below, never mutated: no copy of the shared frame
+    if archive and (isinstance(start_date, dt.date) or isinstance(end_date, dt.date)):
+        archived = archive_frame(TAB_NAME, start_date, end_date)
+        if not archived.empty:
+            out = pd.concat(_align_categories(out, archived))
     q = (query_text or "").strip().lower()
-    if q:
+    if q and index is not None:
+        keys = index.match_keys(q, fields=WO_SEARCH_FIELDS, group=TAB_NAME)
+        keep = out.index.isin([label for _, label in keys])
+        cold = out.index >= ARCHIVE_LABEL_BASE
+        if cold.any():  # archived rows are not in the index: same prefix-AND match, directly
+            keep[cold] = _prefix_match(out[cold], q, WO_SEARCH_FIELDS).to_numpy()
+        out = out[keep]
+    elif q:
         mask = (
             safe_col(out, "WO").astype(str).str.lower().str.contains(q, na=False) |
             safe_col(out, "Title").astype(str).str.lower().str.contains(q, na=False) |
@@ -377,20 +2077,435 @@ def apply_filters(df0,
         )
         out = out[mask]
     if isinstance(start_date, dt.date):
-        out = out[safe_col(out, "Date") >= start_date.strftime("%Y-%m-%d")]
+        out = out[out["Date"] >= pd.Timestamp(start_date)]
     if isinstance(end_date, dt.date):
-        out = out[safe_col(out, "Date") <= end_date.strftime("%Y-%m-%d")]
+        out = out[out["Date"] <= pd.Timestamp(end_date)]
     if loc_filter:
         out = out[safe_col(out, "Location").isin(loc_filter)]
     if status_filter:
         out = out[safe_col(out, "Status").isin(status_filter)]
     return out
 
+# ---------- Thread lookups ----------
+
+@st.cache_resource(max_entries=4)
+def _thread_index(tab_name: str, source: str, version, _frame: pd.DataFrame) -> dict:
+    """
+    ID -> row labels of its thread, oldest -> newest by parsed CreatedAt.
+    Built once per tab version of a frame source (see frame_source) and shared
+    by every panel and session.
+    """
+    id_col = "WO" if tab_name == TAB_NAME else "RFM"
+    if _frame.empty:
+        return {}
+    labels = _frame["CreatedAt"].sort_values(kind="stable").index.to_numpy()
+    ids = _frame.loc[labels, id_col].astype(str).to_numpy()
+    groups = pd.Series(ids).groupby(ids, sort=False).indices
+    return {k: labels[pos] for k, pos in groups.items()}
+
+def _thread(tab_name: str, id_value) -> pd.DataFrame:
+    version, frame = _current_frame(tab_name)
+    labels = _thread_index(tab_name, frame_source(), version, frame).get(str(id_value))
+    if labels is None:
+        return frame.iloc[0:0]
+    return frame.loc[labels]
+
+def wo_thread(wo: str) -> pd.DataFrame:
+    """Full thread for one WO, oldest -> newest (O(1) lookup in the thread index)."""
+    return _thread(TAB_NAME, wo)
+
+@st.cache_resource
+def _latest_state(tab_name: str) -> dict:
+    """Materialized latest-row-per-ID view of one tab, tagged with its data version."""
+    return {"version": None, "by_id": {}, "df": None, "lock": threading.Lock()}
+
+def _latest_view(tab_name: str) -> dict:
+    """
+    Return the latest-state view for the current version: 'by_id' maps a stripped
+    WO/RFM to (row label, row dict), 'df' holds the same rows as a DataFrame.
+    Rebuilt from the thread index only when the version moved and no append
+    could be applied incrementally.
+    """
+    version, frame = _current_frame(tab_name)
+    state = _latest_state(tab_name)
+    with state["lock"]:
+        if state["version"] != version:
+            threads = _thread_index(tab_name, frame_source(), version, frame)
+            labels = [ls[-1] for ls in threads.values()]
+            rows = frame.loc[labels].to_dict("records")
+            id_col = "WO" if tab_name == TAB_NAME else "RFM"
+            by_id = {}
+            for label, row in zip(labels, rows):
+                key = str(row.get(id_col, "")).strip()
+                prev = by_id.get(key)
+                if prev is None or _ts(row.get("CreatedAt")) >= _ts(prev[1].get("CreatedAt")):
+                    by_id[key] = (label, row)
+            state.update(version=version, by_id=by_id, df=None)
+        if state["df"] is None:
+            df = frame.loc[[label for label, _ in state["by_id"].values()]]
+            state["df"] = df.loc[df["CreatedAt"].sort_values(kind="stable").index]
+        return state
+
+def _latest_apply_row(tab_name: str, from_version, to_version, label: int, row: dict) -> None:
+    """Carry the latest view forward across one appended/edited row instead of rebuilding it."""
+    state = _latest_state(tab_name)
+    id_col = "WO" if tab_name == TAB_NAME else "RFM"
+    key = str(row.get(id_col, "")).strip()
+    with state["lock"]:
+        if state["version"] != from_version:
+            return  # view is stale anyway; next read rebuilds it
+        prev = state["by_id"].get(key)
+        if prev is None or _ts(row.get("CreatedAt")) >= _ts(prev[1].get("CreatedAt")):
+            state["by_id"] = {**state["by_id"], key: (label, row)}
+            state["df"] = None
+        state["version"] = to_version
+
+def _ts(value) -> pd.Timestamp:
+    """Parse CreatedAt for ordering; unparseable values sort last, like the thread index."""
+    ts = pd.to_datetime(value, errors="coerce")
+    return pd.Timestamp.max if pd.isna(ts) else ts
+
+# ---------- Row index (EntryID -> sheet row) ----------
+
+@st.cache_resource
+def _row_index_state(tab_name: str) -> dict:
+    return {"version": None, "by_entry": {}, "lock": threading.Lock()}
+
+def _entry_rows(tab_name: str) -> dict:
+    """EntryID -> sheet row number for the current version (rebuilt only when it moved)."""
+    version, frame = _current_frame(tab_name)
+    state = _row_index_state(tab_name)
+    with state["lock"]:
+        if state["version"] != version:
+            ids = frame["EntryID"].astype(str).str.strip() if "EntryID" in frame.columns else []
+            state.update(version=version, by_entry={e: int(l) for e, l in zip(ids, frame.index) if e})
+        return state["by_entry"]
+
+def _row_index_apply_row(tab_name: str, from_version, to_version, label: int, row: dict) -> None:
+    state = _row_index_state(tab_name)
+    entry_id = str(row.get("EntryID", "")).strip()
+    with state["lock"]:
+        if state["version"] != from_version:
+            return
+        if entry_id:
+            state["by_entry"][entry_id] = int(label)  # in place: readers only do lookups
+        state["version"] = to_version
+
+def latest_row(tab_name: str, id_value) -> tuple[int | None, dict]:
+    """(sheet row number, row dict) of the latest entry for a WO/RFM, or (None, {})."""
+    hit = _latest_view(tab_name)["by_id"].get(str(id_value).strip())
+    return (int(hit[0]), _row_text(hit[1])) if hit else (None, {})
+
+def entry_row(tab_name: str, entry_id) -> int | None:
+    """Sheet row number currently holding an EntryID, or None."""
+    return _entry_rows(tab_name).get(str(entry_id or "").strip())
+
+# ---------- Global search (inverted token index over both tabs) ----------
+
+SEARCH_FIELD_WEIGHTS = {"WO": 3.0, "RFM": 3.0, "Title": 2.0, "Resolution": 1.0, "Description": 1.0, "Location": 1.0}
+WO_SEARCH_FIELDS = ["WO", "Title", "Resolution", "Location"]
+RFM_SEARCH_FIELDS = ["RFM", "Title", "Description", "Location"]
+
+@st.cache_resource
+def _search_state() -> dict:
+    return {"versions": None, "index": None, "lock": threading.Lock()}
+
+def _index_rows(ix: SearchIndex, tab_name: str, frame: pd.DataFrame) -> None:
+    cols = [c for c in SEARCH_FIELD_WEIGHTS if c in frame.columns]
+    for label, vals in zip(frame.index, frame[cols].itertuples(index=False, name=None)):
+        ix.add((tab_name, int(label)), dict(zip(cols, vals)), group=tab_name)
+
+def search_index() -> SearchIndex:
+    """Token index over Entries + RFM, keys (tab, row label); rebuilt when either tab's version moves."""
+    versions = {}
+    frames = {}
+    for tab in (TAB_NAME, RFM_TAB):
+        versions[tab], frames[tab] = _current_frame(tab)
+    state = _search_state()
+    with state["lock"]:
+        if state["versions"] != versions:
+            ix = SearchIndex(SEARCH_FIELD_WEIGHTS)
+            for tab, frame in frames.items():
+                _index_rows(ix, tab, frame)
+            state.update(versions=versions, index=ix)
+        return state["index"]
+
+def _search_apply_row(tab_name: str, from_version, to_version, label: int, row: dict) -> None:
+    """(Re-)index one written row in place and carry the index forward to the new version."""
+    state = _search_state()
+    with state["lock"]:
+        if not state["versions"] or state["versions"].get(tab_name) != from_version:
+            return
+        _index_rows(state["index"], tab_name, pd.DataFrame([row], index=[label]))
+        state["versions"] = {**state["versions"], tab_name: to_version}
+
+def _after_write(tab_name: str, from_version, to_version, label: int, row: dict) -> None:
+    """Carry the derived views (latest state, row index, search index) across one written row."""
+    _latest_apply_row(tab_name, from_version, to_version, label, row)
+    _row_index_apply_row(tab_name, from_version, to_version, label, row)
+    _search_apply_row(tab_name, from_version, to_version, label, row)
+
+def latest_entries() -> pd.DataFrame:
+    """Latest row per WO across the whole Entries tab (shared; do not mutate)."""
+    return _latest_view(TAB_NAME)["df"]
+
+def latest_rfms() -> pd.DataFrame:
+    """Latest row per RFM across the whole RFM tab (shared; do not mutate)."""
+    return _latest_view(RFM_TAB)["df"]
+
 def drop_rfm_rows(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty or "WO" not in df.columns:
         return df
     return df[~df["WO"].astype(str).str.upper().str.startswith("RFM")]
     
+# ===================== Data service (shared by all sessions) =====================
+# The panels query data through one DataService per process instead of holding
+# their own copies: every session gets the same shared frames, thread lookups,
+# latest-state views and search index. With DATA_SERVICE_ADDR ("host:port" or a
+# unix socket path) several app processes on one host share a single owner: the
+# first process to bind the address serves its DataService over the socket, later
+# ones become clients that forward tab queries and writes to it, so the Entries/RFM
+# snapshots are only synced by the owner (clients still read the Users index,
+# archive partitions and spreadsheet info themselves).
+# If the owner goes away, the next call re-elects (a client may become the owner).
+#
+# The socket carries pickles, so whoever holds the authkey can run code in the
+# owner: only loopback addresses and unix sockets are accepted, and the key is
+# DATA_SERVICE_KEY or else a random secret in a 0600 file only this user can read.
+
+DATA_SERVICE_ADDR = st.secrets.get("DATA_SERVICE_ADDR") or os.getenv("DATA_SERVICE_ADDR")
+DATA_SERVICE_KEY = st.secrets.get("DATA_SERVICE_KEY") or os.getenv("DATA_SERVICE_KEY")
+DATA_SERVICE_KEY_FILE = (st.secrets.get("DATA_SERVICE_KEY_FILE") or os.getenv("DATA_SERVICE_KEY_FILE")
+                         or os.path.join(tempfile.gettempdir(), f"turnover-data-service-{os.getuid()}.key"))
+
+@st.cache_resource(max_entries=8)
+def _today_rows(tab_name: str, version, day: dt.date, _frame: pd.DataFrame) -> pd.DataFrame:
+    return _frame[_frame["Date"] == pd.Timestamp(day)]
+
+class DataService:
+    """
+    Read queries the panels need, answered from the process-wide snapshots and
+    their derived views. Returned frames are shared: treat them as read-only.
+    Also usable wherever a SearchIndex is expected (search/match_keys/explain).
+    """
+
+    def versions(self) -> dict:
+        return {tab: _current_frame(tab)[0] for tab in (TAB_NAME, RFM_TAB)}
+
+    def frame(self, tab_name: str) -> tuple[int, pd.DataFrame]:
+        return _current_frame(tab_name)
+
+    def latest(self, tab_name: str) -> pd.DataFrame:
+        return _latest_view(tab_name)["df"]
+
+    def latest_row(self, tab_name: str, id_value) -> tuple[int | None, dict]:
+        return latest_row(tab_name, id_value)
+
+    def thread(self, tab_name: str, id_value) -> pd.DataFrame:
+        return _thread(tab_name, id_value)
+
+    def today(self, tab_name: str, day: dt.date) -> pd.DataFrame:
+        version, frame = _current_frame(tab_name)
+        return _today_rows(tab_name, version, day, frame)
+
+    def sync_status(self) -> dict:
+        """tab -> {'age': seconds or None, 'refreshing': bool, 'error': str or None}"""
+        return {tab: {"age": snapshot_age(tab), "refreshing": _sync_state(tab)["refreshing"],
+                      "error": _sync_state(tab)["error"]} for tab in (TAB_NAME, RFM_TAB)}
+
+    def search(self, query: str, fields=None, group=None, limit: int | None = None, positions: bool = True):
+        return search_index().search(query, fields=fields, group=group, limit=limit, positions=positions)
+
+    def match_keys(self, query: str, fields=None, group=None) -> set:
+        return search_index().match_keys(query, fields=fields, group=group)
+
+    def explain(self, query: str, keys, fields=None) -> dict:
+        return search_index().explain(query, keys, fields=fields)
+
+    def write(self, kind: str, tab_name: str, ordered: list, rownum: int | None = None,
+              expect_entry: str | None = None) -> int | None:
+        return _write(kind, tab_name, ordered, rownum, expect_entry)
+
+    def write_many(self, kind: str, tab_name: str, items: list) -> list:
+        return _write_many(kind, tab_name, items)
+
+SERVICE_METHODS = {n for n in vars(DataService) if not n.startswith("_")}
+
+class RemoteDataService:
+    """DataService of the owning process, over a local socket (one connection per thread)."""
+
+    def __init__(self, address):
+        self.address = address
+        self._local = threading.local()
+        self._cache = {}            # (method, tab) -> (version, result): one copy per process
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, *args, **kwargs):
+        conn = getattr(self._local, "conn", None)
+        try:
+            if conn is None:
+                conn = self._local.conn = Client(self.address, authkey=_service_key())
+            conn.send((method, args, kwargs))
+            ok, value = conn.recv()
+        except (OSError, EOFError):
+            self._local.conn = None
+            data_service.clear()    # owner is gone: the next call re-elects
+            raise
+        if not ok:
+            raise value
+        return value
+
+    def _versioned(self, method: str, tab_name: str):
+        version = self._call("versions")[tab_name]
+        with self._lock:
+            cached = self._cache.get((method, tab_name))
+        if cached and cached[0] == version:
+            return cached[1]
+        result = self._call(method, tab_name)
+        with self._lock:
+            self._cache[(method, tab_name)] = (version, result)
+        return result
+
+    def versions(self) -> dict:
+        return self._call("versions")
+
+    def frame(self, tab_name: str) -> tuple[int, pd.DataFrame]:
+        return self._versioned("frame", tab_name)
+
+    def latest(self, tab_name: str) -> pd.DataFrame:
+        return self._versioned("latest", tab_name)
+
+    def latest_row(self, tab_name: str, id_value) -> tuple[int | None, dict]:
+        return self._call("latest_row", tab_name, id_value)
+
+    def thread(self, tab_name: str, id_value) -> pd.DataFrame:
+        return self._call("thread", tab_name, id_value)
+
+    def today(self, tab_name: str, day: dt.date) -> pd.DataFrame:
+        return self._call("today", tab_name, day)
+
+    def sync_status(self) -> dict:
+        return self._call("sync_status")
+
+    def search(self, query: str, fields=None, group=None, limit: int | None = None, positions: bool = True):
+        return self._call("search", query, fields=fields, group=group, limit=limit, positions=positions)
+
+    def match_keys(self, query: str, fields=None, group=None) -> set:
+        return self._call("match_keys", query, fields=fields, group=group)
+
+    def explain(self, query: str, keys, fields=None) -> dict:
+        return self._call("explain", query, list(keys), fields=fields)
+
+    def write(self, kind: str, tab_name: str, ordered: list, rownum: int | None = None,
+              expect_entry: str | None = None) -> int | None:
+        return self._call("write", kind, tab_name, ordered, rownum, expect_entry)
+
+    def write_many(self, kind: str, tab_name: str, items: list) -> list:
+        return self._call("write_many", kind, tab_name, items)
+
+def _service_address():
+    """(host, port) on loopback or a unix socket path; any other interface is refused."""
+    host, sep, port = DATA_SERVICE_ADDR.rpartition(":")
+    if not (sep and port.isdigit()):
+        return DATA_SERVICE_ADDR
+    host = host.strip("[]") or "127.0.0.1"
+    try:
+        loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise RuntimeError(f"DATA_SERVICE_ADDR must be a loopback address or a unix socket path, not {host}")
+    return host, int(port)
+
+def _service_key() -> bytes:
+    """DATA_SERVICE_KEY, or this host's shared secret file (created once, readable by this user only)."""
+    if DATA_SERVICE_KEY:
+        return DATA_SERVICE_KEY.encode()
+    for _ in range(50):
+        try:
+            fd = os.open(DATA_SERVICE_KEY_FILE, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        except FileNotFoundError:
+            # Written under a temporary name and linked into place, so readers never see a partial key
+            tmp = f"{DATA_SERVICE_KEY_FILE}.{os.getpid()}.{threading.get_ident()}"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            try:
+                os.link(tmp, DATA_SERVICE_KEY_FILE)
+            except FileExistsError:
+                pass  # another process won; use its key
+            finally:
+                os.unlink(tmp)
+            continue
+        with os.fdopen(fd, "rb") as f:
+            info = os.fstat(f.fileno())
+            if info.st_uid != os.getuid() or info.st_mode & 0o077:
+                raise RuntimeError(f"{DATA_SERVICE_KEY_FILE} must be owned by this user and not readable by others")
+            key = f.read().strip()
+        if key:
+            return key
+        time.sleep(0.1)
+    raise RuntimeError(f"Could not read the data service key from {DATA_SERVICE_KEY_FILE}")
+
+def _serve(listener, service: DataService) -> None:
+    """Accept loop of the owning process; one thread per client connection."""
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception:  # failed handshake (wrong key) or a dropped connection
+            continue
+        threading.Thread(target=_serve_conn, args=(conn, service), daemon=True, name="data-service-conn").start()
+
+def _serve_conn(conn, service: DataService) -> None:
+    with conn:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except (OSError, EOFError):
+                return
+            try:
+                if method not in SERVICE_METHODS:
+                    raise AttributeError(f"DataService has no method {method!r}")
+                reply = (True, getattr(service, method)(*args, **kwargs))
+            except Exception as e:
+                reply = (False, e)
+            try:
+                conn.send(reply)
+            except (OSError, EOFError):
+                return
+            except Exception as e:  # result/exception could not be pickled
+                conn.send((False, RuntimeError(str(e))))
+
+@st.cache_resource
+def data_service():
+    """This process's DataService, or a RemoteDataService when another process owns the data."""
+    local = DataService()
+    if not DATA_SERVICE_ADDR:
+        return local
+    address, key = _service_address(), _service_key()
+    for _ in range(2):
+        try:
+            listener = Listener(address, authkey=key)
+        except OSError:
+            try:
+                Client(address, authkey=key).close()
+                return RemoteDataService(address)
+            except OSError:
+                if isinstance(address, str) and os.path.exists(address):
+                    os.unlink(address)  # stale socket file of an owner that died
+                    continue
+                raise
+        threading.Thread(target=_serve, args=(listener, local), daemon=True, name="data-service").start()
+        return local
+    raise RuntimeError(f"Could not bind or reach the data service at {DATA_SERVICE_ADDR}")
+
+def _remote_service() -> RemoteDataService | None:
+    """The remote owner's service when this process is a client, else None."""
+    if not DATA_SERVICE_ADDR:
+        return None
+    svc = data_service()
+    return svc if isinstance(svc, RemoteDataService) else None
+
 # --- Normalization + unified color map + pill renderer ---
 def _norm_key(s: str) -> str:
     s = (s or "").strip().replace("_", " ")
@@ -401,6 +2516,7 @@ def _norm_key(s: str) -> str:
 _RAW_COLOR_MAP = {**STATUS_COLOR, **RFM_STATUS_COLOR}
 COMBINED_COLOR_MAP = {_norm_key(k): v for k, v in _RAW_COLOR_MAP.items()}
 
+@functools.lru_cache(maxsize=512)
 def colored_status(text: str, bg: str | None = None, fg: str = "white"):
     """
     Return an HTML pill for a status or free text.
@@ -416,6 +2532,113 @@ def colored_status(text: str, bg: str | None = None, fg: str = "white"):
         f"font-size:.75rem;font-weight:600;background:{bg};color:{fg};'>{text}</span>"
     )
 
+# ---------- Panel rendering (one HTML document per panel, memoized fragments) ----------
+# Row fragments are cached process-wide by (kind, EntryID, the values they show),
+# so a rerun only re-renders rows whose content changed; each panel then goes out
+# as a single st.markdown call.
+FRAGMENT_CACHE_MAX = 20000
+
+@st.cache_resource
+def _fragment_cache() -> dict:
+    return {"items": OrderedDict(), "lock": threading.Lock(), "hits": 0, "misses": 0}
+
+def _fragment(kind: str, key, values: tuple, build) -> str:
+    """HTML for one row from build(*values), memoized by kind, row key and values."""
+    cache = _fragment_cache()
+    ck = (kind, key, values)
+    with cache["lock"]:
+        out = cache["items"].get(ck)
+        if out is not None:
+            cache["items"].move_to_end(ck)
+            cache["hits"] += 1
+            return out
+    out = build(*values)
+    with cache["lock"]:
+        cache["items"][ck] = out
+        cache["misses"] += 1
+        while len(cache["items"]) > FRAGMENT_CACHE_MAX:
+            cache["items"].popitem(last=False)
+    return out
+
+def highlight(txt, terms: tuple = ()) -> str:
+    """HTML-escape then highlight words starting with a query term."""
+    s = html.escape(str(txt or ""))
+    for t in terms:
+        s = re.sub(
+            r"\b" + re.escape(t) + r"\w*",
+            lambda m: f"<span style='background:#fff3cd'>{m.group(0)}</span>",
+            s,
+            flags=re.IGNORECASE
+        )
+    return s
+
+def _history_li(date: str, title: str, res: str, status: str, terms: tuple) -> str:
+    return (f"<li><b>{highlight(date, terms)}</b> — {highlight(title, terms)} | "
+            f"{highlight(res, terms)} &nbsp; {colored_status(status)}</li>")
+
+def history_html(thread: pd.DataFrame, terms: tuple = ()) -> str:
+    """<ul> of a WO thread (oldest -> newest), one memoized <li> per entry."""
+    items = [
+        _fragment("hist", entry or label, (str(d), str(t), str(r), str(st_), terms), _history_li)
+        for label, entry, d, t, r, st_ in zip(
+            thread.index, thread["EntryID"].astype(str), thread["Date"].map(_fmt_day), thread["Title"],
+            thread["Resolution"], thread["Status"])
+    ]
+    return "<ul style='margin-top:.5rem;'>" + "".join(items) + "</ul>"
+
+def details_block(summary_html: str, body_html: str) -> str:
+    # Flush-left: blocks are concatenated into one markdown body, where indented lines become code
+    return (
+        '<details style="padding:.4rem .6rem; border-radius:.5rem; border:1px solid #2a2a2a20; margin-bottom:.35rem;">\n'
+        '<summary style="cursor:pointer; list-style:none;">'
+        f'<span style="display:inline-block; transform:translateY(1px);">{summary_html}</span>'
+        f'</summary>\n{body_html}\n</details>'
+    )
+
+def render_panel(blocks: list[str]) -> None:
+    """Ship a whole panel as one HTML document (one element per panel, not per row)."""
+    if blocks:
+        st.markdown("\n".join(blocks), unsafe_allow_html=True)
+
+def fragment_stats() -> dict:
+    cache = _fragment_cache()
+    return {"cached": len(cache["items"]), "hits": cache["hits"], "misses": cache["misses"]}
+
+# ---------- Pagination (panels build and ship only the visible slice) ----------
+PAGE_SIZES = [10, 25, 50, 100]
+
+def pager(key: str, total: int, sort_options: list[str], default_size: int = 25) -> tuple[slice, str]:
+    """
+    Render sort / page-size / page controls for a panel with `total` items and
+    return (slice of items to render, chosen sort key). Small lists get no controls.
+    """
+    if total <= PAGE_SIZES[0]:
+        return slice(0, total), sort_options[0]
+    ss = st.session_state
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        sort = st.selectbox("Sort", sort_options, key=f"{key}_sort")
+    with c2:
+        size = st.selectbox("Per page", PAGE_SIZES, index=PAGE_SIZES.index(default_size), key=f"{key}_size")
+    pages = max(1, -(-total // size))
+    if ss.get(f"{key}_page", 1) > pages:
+        ss[f"{key}_page"] = pages  # list shrank (filters, closed items)
+    with c3:
+        page = int(st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page"))
+    start = (page - 1) * size
+    stop = min(start + size, total)
+    st.caption(f"Showing {start + 1}–{stop} of {total}")
+    return slice(start, stop), sort
+
+def sort_latest(frame: pd.DataFrame, sort: str, id_col: str) -> pd.DataFrame:
+    """Order a latest-per-ID frame by one of the pager's sort keys."""
+    if sort in ("Newest first", "Oldest first"):
+        order = frame["CreatedAt"].sort_values(
+            ascending=(sort == "Oldest first"), kind="stable", na_position="last").index
+        return frame.loc[order]
+    col = {"Location": "Location", "Status": "Status"}.get(sort, id_col)
+    return frame.sort_values(col, kind="stable", key=lambda s: s.astype(str))
+
 def append_progress_note(wo: str, title: str, note: str, status: str, loc: str, date_val: dt.date | None = None):
     """Append a 'work performed' note for an existing WO without changing the schema."""
     if not wo.strip():
@@ -439,52 +2662,19 @@ def append_progress_note(wo: str, title: str, note: str, status: str, loc: str,
 
 def _latest_rownum_for_wo(wo: str):
     """
-    Find the most recent row number (1-based) for a WO using CreatedAt column.
-    Returns (row_number, row_dict). row_number includes header, so >=2 if found.
-    Uses cached read for speed, only reads raw values once if needed.
+    Most recent row number (1-based, >= 2) for a WO by CreatedAt.
+    Returns (row_number, row_dict); a lookup in the maintained latest view.
     """
-    values = _get_all_values(TAB_NAME)
-    if not values or len(values) < 2:
-        return None, {}
-    headers = values[0]
-    idx = {h: i for i, h in enumerate(headers)}
-    if "WO" not in idx:
-        return None, {}
-    i_wo = idx["WO"]
-    i_created = idx.get("CreatedAt", None)
-
-    latest_row = None
-    latest_ts = ""
-    latest_dict = {}
-
-    for rnum in range(2, len(values) + 1):
-        row = values[rnum - 1]
-        if len(row) <= i_wo:
-            continue
-        if (row[i_wo] or "").strip() != str(wo).strip():
-            continue
-        created = row[i_created] if (i_created is not None and len(row) > i_created) else ""
-        if created >= latest_ts:
-            latest_ts = created
-            latest_row = rnum
-            latest_dict = {h: (row[idx[h]] if idx[h] < len(row) else "") for h in headers}
-
-    return latest_row, latest_dict
+    return latest_row(TAB_NAME, wo)
 
 # ---------- Last-known getters ----------
 def _last_for_wo(wo: str) -> dict:
-    d = latest_status_by_wo(load_df())
-    if d.empty:
-        return {}
-    m = d[d["WO"].astype(str).str.strip() == str(wo).strip()]
-    return m.iloc[0].to_dict() if not m.empty else {}
+    hit = _latest_view(TAB_NAME)["by_id"].get(str(wo).strip())
+    return _row_text(hit[1]) if hit else {}
 
 def _last_for_rfm(rfm: str) -> dict:
-    d = latest_status_by_rfm(load_rfm_df())
-    if d.empty:
-        return {}
-    m = d[d["RFM"].astype(str).str.strip() == str(rfm).strip()]
-    return m.iloc[0].to_dict() if not m.empty else {}
+    hit = _latest_view(RFM_TAB)["by_id"].get(str(rfm).strip())
+    return _row_text(hit[1]) if hit else {}
 
 # ---------- Append note (WO) ----------
 def append_progress_note(wo: str, title: str | None, note: str, status: str | None,
@@ -535,38 +2725,19 @@ def append_rfm_note(rfm: str, title: str | None, note: str, status: str | None,
 
 def _latest_rownum_for_rfm(rfm: str):
     """
-    Find the most recent row number (1-based) for an RFM using CreatedAt.
+    Most recent row number (1-based, >= 2) for an RFM by CreatedAt.
     Returns (row_number, row_dict).
     """
-    values = _get_all_values(RFM_TAB)
-    if not values or len(values) < 2:
-        return None, {}
-    headers = values[0]
-    idx = {h: i for i, h in enumerate(headers)}
-    if "RFM" not in idx:
-        return None, {}
-    i_rfm = idx["RFM"]
-    i_created = idx.get("CreatedAt", None)
-
-    latest_row = None
-    latest_ts = ""
-    latest_dict = {}
-
-    for rnum in range(2, len(values) + 1):
-        row = values[rnum - 1]
-        if len(row) <= i_rfm:
-            continue
-        if (row[i_rfm] or "").strip() != str(rfm).strip():
-            continue
-        created = row[i_created] if (i_created is not None and len(row) > i_created) else ""
-        if created >= latest_ts:
-            latest_ts = created
-            latest_row = rnum
-            latest_dict = {h: (row[idx[h]] if idx[h] < len(row) else "") for h in headers}
+    return latest_row(RFM_TAB, rfm)
 
-    return latest_row, latest_dict
-
-def _update_row_values(ws, rownum: int, new_dict: dict) -> None:
+def _update_row_values(rownum: int, new_dict: dict, expect_entry: str | None = None) -> None:
+    """
+    Overwrite one row. With expect_entry (the EntryID the row held when it was
+    loaded) the row is re-located through the row index if it moved, and the
+    write is refused if the sheet no longer holds that entry there.
+    """
+    if expect_entry:
+        rownum = entry_row(TAB_NAME, expect_entry) or rownum
     ordered = [
         new_dict.get("WO",""),
         new_dict.get("Title",""),
@@ -578,11 +2749,17 @@ def _update_row_values(ws, rownum: int, new_dict: dict) -> None:
         new_dict.get("EntryID",""),
         new_dict.get("CreatedAt",""),
     ]
-    _with_backoff(ws.update, f"A{rownum}:I{rownum}", [ordered], value_input_option="USER_ENTERED")
-    st.cache_data.clear()
+    _write("update", TAB_NAME, ordered, rownum, expect_entry)
 
 # RFM updater — NEW
-def _update_rfm_row_values(ws, rownum: int, new_dict: dict) -> None:
+def _update_rfm_row_values(rownum: int, new_dict: dict, expect_entry: str | None = None) -> None:
+    """
+    Overwrite one row. With expect_entry (the EntryID the row held when it was
+    loaded) the row is re-located through the row index if it moved, and the
+    write is refused if the sheet no longer holds that entry there.
+    """
+    if expect_entry:
+        rownum = entry_row(RFM_TAB, expect_entry) or rownum
     ordered = [
         new_dict.get("RFM",""),
         new_dict.get("Title",""),
@@ -594,13 +2771,70 @@ def _update_rfm_row_values(ws, rownum: int, new_dict: dict) -> None:
         new_dict.get("EntryID",""),
         new_dict.get("CreatedAt",""),
     ]
-    _with_backoff(ws.update, f"A{rownum}:I{rownum}", [ordered], value_input_option="USER_ENTERED")
-    st.cache_data.clear()
+    _write("update", RFM_TAB, ordered, rownum, expect_entry)
+
+# ---------- Bulk status/location change (one batched write) ----------
 
-# ---------- Write helpers (with backoff + cache bust) ----------
+def validate_entry(tab_name: str, row: dict) -> str | None:
+    """Why a WO/RFM row may not be saved as it is, or None."""
+    if tab_name == TAB_NAME and row.get("Status") in {"Completed", "RTS"} and not str(row.get("Resolution", "")).strip():
+        return "Resolution is required when Status is Completed or RTS."
+    return None
 
-def append_entry(row: dict) -> None:
-    ws = _open_entries_ws()
+def bulk_update(tab_name: str, ids: list, status: str | None = None, location: str | None = None,
+                note: str = "", in_place: bool = False) -> dict:
+    """
+    Apply one status and/or location change, plus an optional shared note, to
+    several WOs/RFMs. By default each gets a new entry based on its latest one
+    (all in one values.append); with in_place the latest entries are
+    overwritten instead (one values.batchUpdate). Rows that fail validation are
+    skipped. Returns {"written": [ids], "pending": [ids], "skipped": {id: reason}}.
+    """
+    headers = EXPECTED_HEADERS if tab_name == TAB_NAME else RFM_HEADERS
+    text_col = headers[2]   # Resolution / Description
+    note = (note or "").strip()
+    now_iso = dt.datetime.now().isoformat(timespec="seconds")
+    out = {"written": [], "pending": [], "skipped": {}}
+    items, item_ids = [], []
+    for id_value in dict.fromkeys(str(i).strip() for i in ids if str(i).strip()):
+        rownum, last = latest_row(tab_name, id_value)
+        if rownum is None:
+            out["skipped"][id_value] = "not found"
+            continue
+        row = dict(last)
+        if status:
+            row["Status"] = status
+        if location:
+            row["Location"] = location
+        row["CreatedAt"] = now_iso
+        if in_place:
+            if note:
+                row[text_col] = note
+            row["EntryID"] = last.get("EntryID") or gen_entry_id()
+        else:
+            row.update({text_col: note, "Date": dt.date.today().strftime("%Y-%m-%d"),
+                        "Attachments": "", "EntryID": gen_entry_id()})
+        problem = validate_entry(tab_name, row)
+        if problem:
+            out["skipped"][id_value] = problem
+            continue
+        ordered = [row.get(h, "") for h in headers]
+        items.append((ordered, rownum, last.get("EntryID") or None) if in_place else (ordered, None, None))
+        item_ids.append(id_value)
+    if items:
+        results = _write_many("update" if in_place else "append", tab_name, items)
+        for id_value, result in zip(item_ids, results):
+            if isinstance(result, Exception):
+                out["skipped"][id_value] = str(result)
+            elif result is None and JOURNAL_PATH:
+                out["pending"].append(id_value)
+            else:
+                out["written"].append(id_value)
+    return out
+
+# ---------- Write helpers (queued, batched, write-through) ----------
+
+def append_entry(row: dict) -> int | None:
     ordered = [
         row.get("WO",""),
         row.get("Title",""),
@@ -612,11 +2846,9 @@ def append_entry(row: dict) -> None:
         row.get("EntryID",""),
         row.get("CreatedAt",""),
     ]
-    _with_backoff(ws.append_row, ordered, value_input_option="USER_ENTERED")
-    st.cache_data.clear()
+    return _write("append", TAB_NAME, ordered)  # sheet row, or None while journaled
 
-def append_rfm_entry(row: dict) -> None:
-    ws = _open_rfm_ws()
+def append_rfm_entry(row: dict) -> int | None:
     ordered = [
         row.get("RFM",""),
         row.get("Title",""),
@@ -628,8 +2860,7 @@ def append_rfm_entry(row: dict) -> None:
         row.get("EntryID",""),
         row.get("CreatedAt",""),
     ]
-    _with_backoff(ws.append_row, ordered, value_input_option="USER_ENTERED")
-    st.cache_data.clear()
+    return _write("append", RFM_TAB, ordered)  # sheet row, or None while journaled
 
 # ---------- Add/Submit helpers (wired to UI) ----------
 
@@ -724,9 +2955,10 @@ def handle_submit(is_rfm: bool = False):
                 "EntryID": gen_entry_id(),
                 "CreatedAt": now_iso,
             }
-            append_rfm_entry(row)
+            landed = append_rfm_entry(row)
             ss.flash = ("success", f"{row['Date']} | [{row['Status']}] RFM {row['RFM']} - {row['Title']} added!")
-            ss.toast_msg = "RFM saved to Google Sheets ✅"
+            ss.toast_msg = ("RFM saved; syncing to Google Sheets ⏳" if JOURNAL_PATH and landed is None
+                            else "RFM saved to Google Sheets ✅")
             reset_addwo()
         else:
             row = {
@@ -740,13 +2972,100 @@ def handle_submit(is_rfm: bool = False):
                 "EntryID": gen_entry_id(),
                 "CreatedAt": now_iso,
             }
-            append_entry(row)
+            landed = append_entry(row)
             ss.flash = ("success", f"{row['Date']} | [{row['Status']}] WO {row['WO']} - {row['Title']} added!")
-            ss.toast_msg = "Entry saved to Google Sheets ✅"
+            ss.toast_msg = ("Entry saved; syncing to Google Sheets ⏳" if JOURNAL_PATH and landed is None
+                            else "Entry saved to Google Sheets ✅")
             reset_addwo()
     except Exception as e:
         ss.flash = ("error", f"Write failed: {e}")
 
+# ===================== Users (access links) =====================
+# Access links carry ?key=<token>; the Users tab stores sha256(token) per user.
+# The tab is read at most once per USERS_TTL_SECS per process into a TokenHash
+# index shared by all sessions, and a signed-in session re-checks its token
+# against that index only every USERS_TTL_SECS. Disabling a user or changing a
+# role therefore takes effect within about 2 x USERS_TTL_SECS (plus
+# REPLICA_USERS_SECS when the Users tab is read from the replica).
+
+USERS_TTL_SECS = int(st.secrets.get("USERS_TTL_SECS") or os.getenv("USERS_TTL_SECS") or 60)
+ENABLED_VALUES = {"true", "1", "yes", "y"}
+
+@st.cache_resource
+def _users_cache() -> dict:
+    return {"by_token": None, "loaded_at": 0.0, "error": None, "lock": threading.Lock()}
+
+def _users_index(users: pd.DataFrame) -> dict:
+    """TokenHash -> {'email', 'role', 'enabled'} (first row wins for a duplicated hash)."""
+    index = {}
+    if users.empty or "TokenHash" not in users.columns:
+        return index
+    for r in users.to_dict("records"):
+        token_hash = str(r.get("TokenHash", "")).strip()
+        if token_hash and token_hash not in index:
+            index[token_hash] = {
+                "email": str(r.get("Email", "")).strip(),
+                "role": str(r.get("Role", "") or "viewer").strip().lower(),
+                "enabled": str(r.get("Enabled", "")).strip().lower() in ENABLED_VALUES,
+            }
+    return index
+
+@sheets_layer()
+def users_by_token() -> dict:
+    """
+    The shared TokenHash index, re-read from the Users tab once it is older than
+    USERS_TTL_SECS. One session reloads while the others keep using the previous
+    index; if a reload fails the previous index is served until the next attempt.
+    """
+    cache = _users_cache()
+    if cache["by_token"] is not None and time.time() - cache["loaded_at"] < USERS_TTL_SECS:
+        return cache["by_token"]
+    if not cache["lock"].acquire(blocking=cache["by_token"] is None):
+        return cache["by_token"]  # someone else is reloading
+    try:
+        if cache["by_token"] is None or time.time() - cache["loaded_at"] >= USERS_TTL_SECS:
+            try:
+                cache["by_token"] = _users_index(load_users_df())
+                cache["error"] = None
+            except Exception as e:
+                cache["error"] = str(e)
+                if cache["by_token"] is None:
+                    raise
+            cache["loaded_at"] = time.time()  # failed reloads also wait a TTL before retrying
+        return cache["by_token"]
+    finally:
+        cache["lock"].release()
+
+def users_gate() -> None:
+    """Let the page render only for an enabled user's access link (or a session already signed in with one)."""
+    ss = st.session_state
+    now = time.time()
+    if ss.get("user_email") and now - ss.get("user_checked_at", 0.0) < USERS_TTL_SECS:
+        return
+    key = (st.query_params.get("key") or "").strip()
+    token_hash = _hash_token(key) if key else ss.get("user_token_hash")
+    try:
+        user = users_by_token().get(token_hash) if token_hash else None
+    except Exception as e:
+        st.error(f"Could not load the Users list: {e}")
+        st.stop()
+    if user and user["enabled"]:
+        ss["user_email"], ss["user_role"] = user["email"], user["role"]
+        ss["user_token_hash"], ss["user_checked_at"] = token_hash, now
+        return
+    for k in ("user_email", "user_role", "user_token_hash", "user_checked_at"):
+        ss.pop(k, None)
+    st.error("Access denied. Ask an admin for an access link.")
+    st.stop()
+
+users_gate()  # before any data is shown
+
+user_email = st.session_state.get("user_email", "unknown")
+user_role = st.session_state.get("user_role", "viewer")
+is_editor = user_role in ("editor", "admin")
+
+st.caption(f"Signed in as {user_email} · role: {user_role}")
+
 # ===================== UI =====================
 
 st.title("Turnover Notes")
@@ -897,7 +3216,6 @@ with st.sidebar.expander("✏️ Edit Last Entry (" + ("RFM" if is_rfm else "WO"
                         st.warning("Resolution is required when Status is Completed or RTS.")
                     else:
                         if is_rfm:
-                            ws = _open_rfm_ws()
                             new_dict = {
                                 "RFM": edit_wo,
                                 "Title": (new_title or "").strip(),
@@ -909,10 +3227,9 @@ with st.sidebar.expander("✏️ Edit Last Entry (" + ("RFM" if is_rfm else "WO"
                                 "EntryID": rowdata.get("EntryID","") or gen_entry_id(),
                                 "CreatedAt": dt.datetime.now().isoformat(timespec="seconds"),
                             }
-                            _update_rfm_row_values(ws, rownum, new_dict)
+                            _update_rfm_row_values(rownum, new_dict, rowdata.get("EntryID", ""))
                             st.success(f"Updated RFM{edit_wo} (row {rownum}) ✅")
                         else:
-                            ws = _open_entries_ws()
                             new_dict = {
                                 "WO": edit_wo,
                                 "Title": (new_title or "").strip(),
@@ -924,14 +3241,13 @@ with st.sidebar.expander("✏️ Edit Last Entry (" + ("RFM" if is_rfm else "WO"
                                 "EntryID": rowdata.get("EntryID","") or gen_entry_id(),
                                 "CreatedAt": dt.datetime.now().isoformat(timespec="seconds"),
                             }
-                            _update_row_values(ws, rownum, new_dict)
+                            _update_row_values(rownum, new_dict, rowdata.get("EntryID", ""))
 
                         st.toast("Entry updated", icon="✏️")
                         st.session_state.edit_loaded = False
                         st.session_state.edit_rownum = None
                         st.session_state.edit_rowdata = {}
                         st.session_state.edit_wo_selected = ""
-                        st.cache_data.clear()
                         st.rerun()
                 except Exception as e:
                     st.error(f"Update failed: {e}")
@@ -1003,11 +3319,46 @@ with st.sidebar.expander("📝 Quick Progress Note (append WO/RFM)", expanded=Fa
                     append_rfm_note(_id, title, note, status, loc, datev)
 
                 st.toast("Note appended ✅", icon="🧷")
-                st.cache_data.clear()
                 clear_quick_note()
         except Exception as e:
             st.error(f"Could not append: {e}")
 
+# ===================== Bulk Update (several WOs/RFMs at once) =====================
+if is_editor:
+    with st.sidebar.expander("🗂️ Bulk Update (" + ("RFM" if is_rfm else "WO") + ")", expanded=False):
+        b_tab = RFM_TAB if is_rfm else TAB_NAME
+        b_latest = latest_rfms() if is_rfm else drop_rfm_rows(latest_entries())
+        b_open = b_latest[~b_latest["Status"].isin(CLOSED_STATUSES[b_tab])]
+        b_id_col = "RFM" if is_rfm else "WO"
+        b_titles = dict(zip(b_open[b_id_col].astype(str).str.strip(), b_open["Title"].astype(str)))
+        b_ids = st.multiselect(
+            "Open " + b_id_col + "s", sorted(b_titles), key="bulk_ids",
+            format_func=lambda i: f"{b_id_col}{i} — {b_titles.get(i, '')}",
+        )
+        b_stat_opts = ["Submitted", "WAPPR", "PO Created", "Close"] if is_rfm else STATUSES
+        b_status = st.selectbox("New status", ["(keep)"] + b_stat_opts, key="bulk_status")
+        b_loc = st.selectbox("New location", ["(keep)"] + LOCATIONS, key="bulk_loc")
+        b_note = st.text_area("Shared note (optional)", key="bulk_note", height=90,
+                              help=("Becomes the Description of each entry." if is_rfm else
+                                    "Becomes the Resolution of each entry; required for Completed/RTS."))
+        b_in_place = st.radio("Apply as", ["New entry on each", "Edit each last entry"],
+                              horizontal=True, key="bulk_mode") == "Edit each last entry"
+        if st.button(f"Apply to {len(b_ids)} selected", use_container_width=True,
+                     key="bulk_apply_btn", disabled=not b_ids):
+            try:
+                res = bulk_update(b_tab, b_ids,
+                                  status=None if b_status == "(keep)" else b_status,
+                                  location=None if b_loc == "(keep)" else b_loc,
+                                  note=b_note, in_place=b_in_place)
+                done = len(res["written"]) + len(res["pending"])
+                if done:
+                    st.success(f"Updated {done} {b_id_col}s"
+                               + (f" ({len(res['pending'])} still syncing)" if res["pending"] else "") + " ✅")
+                for i, why in res["skipped"].items():
+                    st.warning(f"{b_id_col}{i}: {why}")
+            except Exception as e:
+                st.error(f"Bulk update failed: {e}")
+
 
 # --- Data load for main panels ---
 
@@ -1024,8 +3375,13 @@ def _explain_api_error(e: APIError) -> str:
 try:
     if not SPREADSHEET_ID:
         raise RuntimeError("TURNOVER_SPREADSHEET_ID is not set in secrets or environment.")
-    df = load_df()
-    rfm_df = load_rfm_df()
+    svc = data_service()
+    with Span("load_df") as _sp:
+        df = svc.frame(TAB_NAME)[1]      # shared frames (read-only): one copy per process, not per session
+        _sp.rows = len(df)
+    with Span("load_rfm_df") as _sp:
+        rfm_df = svc.frame(RFM_TAB)[1]
+        _sp.rows = len(rfm_df)
 except APIError as e:
     detail = _explain_api_error(e)
     st.error("Google Sheets API error while opening the spreadsheet.")
@@ -1036,14 +3392,32 @@ except APIError as e:
         "2) Share the Google Sheet with your **service account** email (Editor). The email is the `client_email` in your credentials JSON.\n"
         "3) Ensure the **Google Sheets API** (and Drive API if you create tabs) is enabled for the project."""
     )
+    svc = DataService()
     df = pd.DataFrame(columns=EXPECTED_HEADERS)
     rfm_df = pd.DataFrame(columns=RFM_HEADERS)
 except Exception as e:
     st.error(f"Failed to load data: {e}")
     st.info("`TURNOVER_SPREADSHEET_ID` is missing or invalid.")
+    svc = DataService()
     df = pd.DataFrame(columns=EXPECTED_HEADERS)
     rfm_df = pd.DataFrame(columns=RFM_HEADERS)
 
+if SPREADSHEET_ID:
+    _status = svc.sync_status()
+    _ages = {tab: s["age"] for tab, s in _status.items()}
+    _refreshing = any(s["refreshing"] for s in _status.values())
+    st.caption(
+        f"Data as of {_fmt_age(max((a for a in _ages.values() if a is not None), default=None))}"
+        + (" · refreshing…" if _refreshing else "")
+    )
+    _sync_errors = [f"{tab}: {s['error']}" for tab, s in _status.items() if s["error"]]
+    if _sync_errors:
+        st.warning("Background refresh failed; showing the last good data. " + "; ".join(_sync_errors))
+    _maybe_compact()
+    _backlog = journal_backlog()
+    if _backlog:
+        st.caption(f"⏳ {_backlog} saved write{'s' if _backlog != 1 else ''} waiting to sync to Google Sheets")
+
 # --- Search + Copy Turnover (Today) ---
 with st.container():
     c1, c2 = st.columns([3, 1])
@@ -1061,51 +3435,13 @@ with st.container():
             use_container_width=True,
             key="copy_today_btn",
         )
-        # --- Search Results (WOs + RFMs) ---
-    if query and query.strip():
-        q = query.strip().lower()
-
-        # WOs come from your existing df
-        wo_df = df.copy()
-
-        # RFMs come from the RFM tab
-        rfm_df = load_rfm_df().copy()
-
-        # Build simple full-text blobs (self-contained; no new helpers needed)
-        def _mk_blob(d, cols_priority):
-            if d.empty:
-                return pd.Series([], dtype=str)
-            cols = [c for c in cols_priority if c in d.columns]
-            if cols:
-                blob = d[cols].astype(str).agg(" ".join, axis=1)
-            else:
-                blob = d.astype(str).apply(lambda r: " ".join(map(str, r.values)), axis=1)
-            return blob.str.lower()
-
-        if not wo_df.empty:
-            wo_df["_searchblob"] = _mk_blob(wo_df, ["WO","Title","Resolution","Status","Location","Notes","Date"])
-        if not rfm_df.empty:
-            rfm_df["_searchblob"] = _mk_blob(rfm_df, ["RFM","Title","Resolution","Status","Notes","Date"])
-
-        # Filter by query
-        wo_hits  = wo_df[ wo_df["_searchblob"].str.contains(q, na=False) ] if not wo_df.empty  else wo_df
-        rfm_hits = rfm_df[ rfm_df["_searchblob"].str.contains(q, na=False) ] if not rfm_df.empty else rfm_df
-
-        # Prepare columns to show
-        wo_cols = [c for c in ["WO","Title","Resolution","Status","Date"] if (not wo_hits.empty and c in wo_hits.columns)]
-        if not wo_cols and not wo_hits.empty:
-            wo_cols = [c for c in wo_hits.columns if c not in ["_searchblob"]][:5]
-
-        if not rfm_hits.empty:
-            # Present RFM with a WO-like column for readability
-            view = rfm_hits.rename(columns={"RFM": "WO"}) if "RFM" in rfm_hits.columns else rfm_hits.copy()
-            view["WO"] = "RFM-" + view["WO"].astype(str)
-        else:
-            view = rfm_hits
 
-        rfm_cols = [c for c in ["WO","Title","Resolution","Status","Date"] if (not view.empty and c in view.columns)]
-        if not rfm_cols and not view.empty:
-            rfm_cols = [c for c in view.columns if c not in ["_searchblob"]][:5]
+    # Optional date range; also searches archived months that overlap it
+    d1, d2, _ = st.columns([1, 1, 2])
+    with d1:
+        st.date_input("From", value=None, key="start")
+    with d2:
+        st.date_input("To", value=None, key="end")
 
 # --- Normalize filter vars (in case this block runs in a different scope) ---
 if "query"       not in locals(): query = ""
@@ -1125,85 +3461,113 @@ use_dates   = bool(start or end)
 
        # --- Global Search Results (across all dates/status) ---
 st.subheader("Search Results")
-matches = apply_filters(df.copy(), query, start, end, loc_mult, status_mult)
+_panel = Span("panel: Search Results").start()
+search_idx = svc  # answers search/match_keys/explain like the SearchIndex it wraps
+matches = apply_filters(df, query, start, end, loc_mult, status_mult, index=search_idx, archive=True)
 
 if (query or "").strip() or use_dates or loc_mult or status_mult:
     if matches.empty:
         st.caption("No matches.")
     else:
-        import html, re
-
         # Pull simple keywords from the query for highlighting
-        terms = [t for t in re.findall(r"\w+", (query or "")) if len(t) > 1]
-
-        def highlight(txt: str) -> str:
-            """HTML-escape then highlight query terms."""
-            s = html.escape(str(txt or ""))
-            for t in terms:
-                s = re.sub(
-                    re.escape(t), 
-                    lambda m: f"<span style='background:#fff3cd'>{m.group(0)}</span>",
-                    s,
-                    flags=re.IGNORECASE
-                )
-            return s
+        terms = tuple(t for t in re.findall(r"\w+", (query or "")) if len(t) > 1)
 
-        # We want one result per WO that had any matching row
+        # One result per WO that had any matching row, best-ranked first
+        hit_labels = set()
         wo_ids = [str(x) for x in matches["WO"].astype(str).unique()]
+        if (query or "").strip():
+            hits = search_idx.search(query, fields=WO_SEARCH_FIELDS, group=TAB_NAME, positions=False)
+            hit_labels = {label for _, label in (h.key for h in hits)}
+            rank = {}
+            wo_of = matches["WO"].astype(str)
+            for h in hits:
+                if h.key[1] in wo_of.index:
+                    rank.setdefault(wo_of.at[h.key[1]], len(rank))
+            wo_ids.sort(key=lambda w: rank.get(w, len(rank)))
+
+        # Archived threads (date-range searches only), WO -> rows
+        archived_threads = {}
+        if use_dates:
+            archived = archive_frame(TAB_NAME, start, end)
+            if not archived.empty:
+                wo_keys = archived["WO"].astype(str)
+                archived_threads = {k: archived.iloc[v] for k, v in wo_keys.groupby(wo_keys, sort=False).indices.items()}
+
+        sort_options = (["Relevance"] if (query or "").strip() else []) + ["Newest first", "Oldest first", "WO"]
+        page, sort = pager("search_results", len(wo_ids), sort_options)
+        if sort in ("Newest first", "Oldest first"):
+            _latest = svc.latest(TAB_NAME)
+            latest_created = pd.Series(_latest["CreatedAt"].to_numpy(), index=_latest["WO"].astype(str))
+
+            def _last_created(w):
+                if w in latest_created.index:
+                    return _ts(latest_created[w])
+                return _ts(archived_threads[w]["CreatedAt"].max() if w in archived_threads else None)
+
+            wo_ids.sort(key=_last_created, reverse=(sort == "Newest first"))
+        elif sort == "WO":
+            wo_ids.sort()
+
+        def _search_summary(wo, title, res, loc, status, date, hit_badge, terms):
+            return (
+                wo_line(wo, highlight(title, terms), highlight(res, terms))
+                + f" &nbsp; <span style='opacity:.7;'>[{html.escape(loc)}]</span> &nbsp; {colored_status(status)} &nbsp; "
+                + f"<span style='opacity:.6;'>{html.escape(date)}</span> &nbsp; {hit_badge}"
+            )
 
-        for wo in wo_ids:
-            # Full thread for this WO (oldest -> newest)
-            thread = df[df["WO"].astype(str) == wo].copy()
-            if "CreatedAt" in thread.columns:
-                thread["CreatedAt_ts"] = pd.to_datetime(thread["CreatedAt"], errors="coerce")
-                thread = thread.sort_values("CreatedAt_ts")
+        blocks = []
+        for wo in wo_ids[page]:
+            # Full thread for this WO (oldest -> newest), archived part first
+            thread = svc.thread(TAB_NAME, wo)
+            if wo in archived_threads:
+                older = archived_threads[wo].sort_values("CreatedAt", kind="stable")
+                thread = pd.concat(_align_categories(older, thread)) if not thread.empty else older
 
             # Latest entry (summary line)
             last = thread.tail(1).iloc[0]
-            title  = str(last.get("Title",""))
-            res    = str(last.get("Resolution",""))
-            status = str(last.get("Status",""))
-            loc    = str(last.get("Location",""))
-            date   = str(last.get("Date",""))
-
-            # Count how many rows in this thread actually match the query (for a small badge)
-            def row_hits(row) -> bool:
-                blob = " ".join([str(row.get("Title","")), str(row.get("Resolution","")), str(row.get("Location",""))])
-                return any(t.lower() in blob.lower() for t in terms)
-            hit_count = int(thread.apply(row_hits, axis=1).sum()) if terms else 0
-            hit_badge = f"<span style='opacity:.6;'>[{hit_count} match{'es' if hit_count!=1 else ''}]</span>" if hit_count else ""
-
-            pill = colored_status(status)
-
-            # Build the expanded history (oldest -> newest) with highlights
-            hist_items = []
-            for _, rr in thread.iterrows():
-                p   = colored_status(str(rr.get("Status","")))
-                d   = highlight(rr.get("Date",""))
-                t   = highlight(rr.get("Title",""))
-                rsz = highlight(rr.get("Resolution",""))
-                hist_items.append(f"<li><b>{d}</b> — {t} | {rsz} &nbsp; {p}</li>")
-            hist_html = "<ul style='margin-top:.5rem;'>" + "".join(hist_items) + "</ul>"
 
-            # Clickable summary using <details> so the SUMMARY is the row itself
-            summary_html = (
-                wo_line(wo, highlight(title), highlight(res))
-                + f" &nbsp; <span style='opacity:.7;'>[{html.escape(loc)}]</span> &nbsp; {pill} &nbsp; "
-                + f"<span style='opacity:.6;'>{html.escape(date)}</span> &nbsp; {hit_badge}"
-            )
+            # Count how many rows in this thread match the query, and in which fields (small badge)
+            thread_hits = [(TAB_NAME, int(l)) for l in thread.index if l in hit_labels]
+            hit_count = len(thread_hits)
+            hit_badge = ""
+            if hit_count:
+                matched = search_idx.explain(query, thread_hits, fields=WO_SEARCH_FIELDS)
+                fields_hit = [f for f in WO_SEARCH_FIELDS if any(f in m for m in matched.values())]
+                hit_badge = (f"<span style='opacity:.6;'>[{hit_count} match{'es' if hit_count!=1 else ''}"
+                             f" · {html.escape(', '.join(fields_hit))}]</span>")
 
-            block = f"""
-            <details style="padding:.4rem .6rem; border-radius:.5rem; border:1px solid #2a2a2a20; margin-bottom:.35rem;">
-              <summary style="cursor:pointer; list-style:none;">
-                <span style="display:inline-block; transform:translateY(1px);">{summary_html}</span>
-              </summary>
-              {hist_html}
-            </details>
-            """
-            st.markdown(block, unsafe_allow_html=True)
+            # Clickable summary using <details> so the SUMMARY is the row itself
+            summary_html = _fragment("search_summary", str(last.get("EntryID","")) or thread.index[-1], (
+                wo, str(last.get("Title","")), str(last.get("Resolution","")), str(last.get("Location","")),
+                str(last.get("Status","")), _fmt_day(last.get("Date")), hit_badge, terms,
+            ), _search_summary)
+            blocks.append(details_block(summary_html, history_html(thread, terms)))
+        render_panel(blocks)
 else:
     st.caption("Use the search or filters to find entries.")
 
+# RFM matches (query only; RFM statuses differ from the WO filters)
+if (query or "").strip():
+    rfm_ids = []
+    for h in search_idx.search(query, fields=RFM_SEARCH_FIELDS, group=RFM_TAB, positions=False):
+        if h.key[1] in rfm_df.index:
+            rid = str(rfm_df.at[h.key[1], "RFM"])
+            if rid not in rfm_ids:
+                rfm_ids.append(rid)
+    if rfm_ids:
+        st.caption(f"RFM matches ({len(rfm_ids)})")
+        lines = []
+        for rid in rfm_ids:
+            last = svc.latest_row(RFM_TAB, rid)[1]
+            lines.append(
+                f"<div>• RFM{html.escape(rid)} — {html.escape(str(last.get('Title','')))} | "
+                f"{html.escape(str(last.get('Description','')))} &nbsp; "
+                f"<span style='opacity:.7;'>[{html.escape(str(last.get('Location','')))}]</span> &nbsp; "
+                f"{colored_status(str(last.get('Status','')))}</div>"
+            )
+        st.markdown("".join(lines), unsafe_allow_html=True)
+_panel.end(rows=len(matches))
+
 
 # --- Right-side panels ---
 left, right = st.columns([1.2, 2])
@@ -1212,95 +3576,56 @@ left, right = st.columns([1.2, 2])
 # Today’s WOs (dedup by WO; show latest only + history)
 with left:
     st.subheader("Today’s WOs")
-    today_str = dt.date.today().strftime("%Y-%m-%d")
-    todays = df[(df["Date"] == today_str)].copy()
-    todays = drop_rfm_rows(todays)
-    todays = apply_filters(todays, query, start, end, loc_mult, status_mult)
+    _panel = Span("panel: Today’s WOs").start()
+    todays = drop_rfm_rows(svc.today(TAB_NAME, dt.date.today()))
+    todays = apply_filters(todays, query, start, end, loc_mult, status_mult, index=search_idx)
 
     if todays.empty:
         st.caption("No entries today.")
     else:
         # keep only the latest entry per WO
         latest_today = todays.copy()
-        latest_today["CreatedAt_ts"] = pd.to_datetime(latest_today["CreatedAt"], errors="coerce")
-        latest_today = latest_today.sort_values("CreatedAt_ts").groupby("WO", as_index=False).tail(1)
-
-        # order nicely
-        latest_today = latest_today.sort_values("CreatedAt_ts")
+        latest_today = latest_today.sort_values("CreatedAt").groupby("WO", as_index=False, observed=True).tail(1)
+
+        def _today_summary(wo, title, res, loc, status, date):
+            # Build the green resolution HTML safely, then hand it to wo_line
+            green_res = f"<span style='color:#1a7f37;'>{html.escape(res)}</span>"
+            return (
+                wo_line(wo, html.escape(title), green_res)
+                + f" &nbsp; <span style='opacity:.7;'>[{html.escape(loc)}]</span> &nbsp; {colored_status(status)} &nbsp; "
+                + f"<span style='opacity:.6;'>{html.escape(date)}</span>"
+            )
 
+        blocks = []
         for _, r in latest_today.iterrows():
             wo  = str(r.get("WO",""))
-            loc = str(r.get("Location",""))
-        
-            # Full thread (oldest -> newest)
-            thread = df[df["WO"].astype(str) == wo].copy()
-            if "CreatedAt" in thread.columns:
-                thread["CreatedAt_ts"] = pd.to_datetime(thread["CreatedAt"], errors="coerce")
-                thread = thread.sort_values("CreatedAt_ts")
-        
-            # Latest entry = last input
+
+            # Full thread (oldest -> newest); latest entry = last input
+            thread = svc.thread(TAB_NAME, wo)
             last = thread.tail(1).iloc[0] if not thread.empty else r
-            last_title  = str(last.get("Title",""))
-            last_res    = str(last.get("Resolution",""))
-            last_status = str(last.get("Status",""))
-            last_date   = str(last.get("Date",""))
-        
-            # Status pill for quick read
-            pill = colored_status(last_status)
-        
-            # Escape user text to avoid breaking HTML
-            etitle = html.escape(last_title)
-            eres   = html.escape(last_res)
-            eloc   = html.escape(loc)
-            edate  = html.escape(last_date)
-        
-            # Build history HTML (oldest -> newest)
-            hist_rows = []
-            for _, rr in thread.iterrows():
-                p   = colored_status(str(rr.get("Status","")))
-                d   = html.escape(str(rr.get("Date","")))
-                t   = html.escape(str(rr.get("Title","")))
-                res = html.escape(str(rr.get("Resolution","")))
-                hist_rows.append(
-                    f"<li><b>{d}</b> — {t} | {res} &nbsp; {p}</li>"
-                )
-            hist_html = "<ul style='margin-top:.5rem;'>" + "".join(hist_rows) + "</ul>"
-        
-            # Clickable row using <details><summary>
-           # Build the green resolution HTML safely, then hand it to wo_line
-            green_res = f"<span style='color:#1a7f37;'>{eres}</span>"
-            
-            summary_html = (
-                wo_line(wo, etitle, green_res)
-                + f" &nbsp; <span style='opacity:.7;'>[{eloc}]</span> &nbsp; {pill} &nbsp; "
-                + f"<span style='opacity:.6;'>{edate}</span>"
-            )
 
-        
-            block = f"""
-            <details style="padding:.4rem .6rem; border-radius:.5rem; border:1px solid #2a2a2a20; margin-bottom:.35rem;">
-              <summary style="cursor:pointer; list-style:none;">
-                <span style="display:inline-block; transform:translateY(1px);">{summary_html}</span>
-              </summary>
-              {hist_html}
-            </details>
-            """
-        
-            st.markdown(block, unsafe_allow_html=True)
+            summary_html = _fragment("today_summary", str(last.get("EntryID","")) or wo, (
+                wo, str(last.get("Title","")), str(last.get("Resolution","")), str(r.get("Location","")),
+                str(last.get("Status","")), _fmt_day(last.get("Date")),
+            ), _today_summary)
+            blocks.append(details_block(summary_html, history_html(thread)))
+        render_panel(blocks)
+    _panel.end(rows=len(todays))
 
 # Open WOs (includes WMATL). Show latest entry per WO.
 with right:
     st.subheader("Open WOs")
-    latest = latest_status_by_wo(df)
+    _panel = Span("panel: Open WOs").start()
+    latest = svc.latest(TAB_NAME)
     open_wo = latest[~latest["Status"].isin(["Completed","RTS","WMATL"])].copy()
     open_wo = drop_rfm_rows(open_wo)
-    open_wo = apply_filters(open_wo, query, start, end, loc_mult, status_mult)
+    open_wo = apply_filters(open_wo, query, start, end, loc_mult, status_mult, index=search_idx)
     if open_wo.empty:
         st.caption("No open WOs 🎉")
     else:
-        if "CreatedAt" in open_wo.columns:
-            open_wo = open_wo.sort_values("CreatedAt")
-        for _, r in open_wo.iterrows():
+        page, sort = pager("open_wos", len(open_wo), ["Oldest first", "Newest first", "WO", "Location", "Status"])
+        open_wo = sort_latest(open_wo, sort, "WO")
+        for _, r in open_wo.iloc[page].iterrows():
             pill = colored_status(str(r["Status"]))
             with st.expander(f"WO{r['WO']} — {r['Title']}  [{r['Location']}]  ", expanded=False):
                 st.markdown(pill, unsafe_allow_html=True)
@@ -1309,40 +3634,29 @@ with right:
                 if str(r.get("Attachments","")):
                     links = [x.strip() for x in str(r["Attachments"]).split(',') if x.strip()]
                     st.caption("Attachments:")
-                    for i, url in enumerate(links, 1):
-                        st.markdown(f"- [File {i}]({url})")
-
-                thread = df[df["WO"] == r["WO"]].copy()
-                if "CreatedAt" in thread.columns:
-                    thread = thread.sort_values("CreatedAt")
-                with st.expander("History", expanded=False):
-                    for _, rr in thread.iterrows():
-                        p = colored_status(str(rr["Status"]))
-                        st.markdown(
-                            f"- **{rr['Date']}** — {rr['Title']} | {rr['Resolution']} &nbsp; {p}",
-                            unsafe_allow_html=True
-                        )
+                    st.markdown("\n".join(f"- [File {i}]({url})" for i, url in enumerate(links, 1)))
+
+                # History as one block (one element per WO instead of one per row)
+                thread = svc.thread(TAB_NAME, r["WO"])
+                st.markdown(f"<details><summary>History ({len(thread)})</summary>{history_html(thread)}</details>",
+                            unsafe_allow_html=True)
+    _panel.end(rows=len(open_wo))
 
 # ===== RFM TRACKER (read-only list; editing via sidebar) =====
 st.subheader("Open RFMs")
-rfm_df_latest = latest_status_by_rfm(rfm_df)
+_panel = Span("panel: Open RFMs").start()
+rfm_df_latest = svc.latest(RFM_TAB)
 open_rfm = rfm_df_latest[~rfm_df_latest["Status"].isin(["Completed","RTS"])].copy()
 
 if open_rfm.empty:
     st.caption("No open RFMs 🎉")
 else:
-    if "CreatedAt" in open_rfm.columns:
-        open_rfm = open_rfm.sort_values("CreatedAt")
+    page, sort = pager("open_rfms", len(open_rfm), ["Oldest first", "Newest first", "RFM", "Location", "Status"])
+    open_rfm = sort_latest(open_rfm, sort, "RFM")
 
     from html import escape  # safe to put here or at top of file once
 
-    for _, r in open_rfm.iterrows():
-        label = str(r.get("Status", "")).strip()
-        title = str(r.get("Title", "")) or ""
-        desc  = str(r.get("Description", "")) or ""
-        loc   = str(r.get("Location", "")) or ""
-        rfmno = str(r.get("RFM", "")) or ""
-
+    def _rfm_card(rfmno, label, title, desc, loc, attachments):
         pill = colored_status(label)
 
         title_html = escape(title)
@@ -1352,7 +3666,6 @@ else:
             if desc.strip() else ""
         )
 
-        attachments = str(r.get("Attachments", "")).strip()
         att_html = ""
         if attachments:
             links = [x.strip() for x in attachments.split(",") if x.strip()]
@@ -1363,7 +3676,7 @@ else:
                 )
                 att_html = f"<div style='opacity:.75;margin-top:.25rem;'>Attachments:</div><ul>{items}</ul>"
 
-        details_html = f"""
+        return f"""
 <details style="margin:.25rem 0 .5rem 0;">
   <summary style="cursor:pointer; display:flex; align-items:center; gap:.5rem;">
     {pill}
@@ -1376,14 +3689,26 @@ else:
 </details>
         """.strip()
 
-        st.markdown(details_html, unsafe_allow_html=True)
+    blocks = []
+    for label_, r in open_rfm.iloc[page].iterrows():
+        blocks.append(_fragment("rfm_card", str(r.get("EntryID", "")) or label_, (
+            str(r.get("RFM", "")) or "",
+            str(r.get("Status", "")).strip(),
+            str(r.get("Title", "")) or "",
+            str(r.get("Description", "")) or "",
+            str(r.get("Location", "")) or "",
+            str(r.get("Attachments", "")).strip(),
+        ), _rfm_card))
+    render_panel(blocks)
+_panel.end(rows=len(open_rfm))
 
 # WMATL box (compact, readable on dark theme)
 st.subheader("WMATL")
-wmatl_latest = latest_status_by_wo(df)
+_panel = Span("panel: WMATL").start()
+wmatl_latest = svc.latest(TAB_NAME)
 wmatl = wmatl_latest[wmatl_latest["Status"] == "WMATL"].copy()
 wmatl = drop_rfm_rows(wmatl)
-wmatl = apply_filters(wmatl, query, start, end, loc_mult, status_mult)
+wmatl = apply_filters(wmatl, query, start, end, loc_mult, status_mult, index=search_idx)
 if wmatl.empty:
     st.caption("No WOs waiting on material.")
 else:
@@ -1411,31 +3736,129 @@ else:
         wmatl = wmatl.sort_values("CreatedAt")
     tags = [f"<span class='wmatl-tag'>WO{r['WO']} — {r['Title']}</span>" for _, r in wmatl.iterrows()]
     st.markdown(" ".join(tags), unsafe_allow_html=True)
+_panel.end(rows=len(wmatl))
 
 # --- Diagnostics (optional but handy) ---
-with st.expander("Sheet Diagnostics", expanded=False):
+def render_diagnostics() -> None:
     try:
-        gc = get_gc()
-        sh = open_spreadsheet(gc=gc)
-        st.write("**Spreadsheet title:**", sh.title)
-        try:
-            st.write("**Spreadsheet URL:**", sh.url)
-        except Exception:
-            pass
-        tabs = [ws.title for ws in sh.worksheets()]
-        st.write("**Tabs found:**", tabs)
+        meta = sheet_metadata(refresh=st.button("Refresh spreadsheet info", key="diag_meta_refresh_btn"))
+        st.write("**Spreadsheet title:**", meta["title"])
+        st.write("**Spreadsheet URL:**", meta["url"])
+        st.write(f"**Tabs found** (as of {dt.datetime.fromtimestamp(meta['loaded_at']):%H:%M:%S}, "
+                 f"re-read every {SHEET_META_TTL_SECS // 60} min)")
+        st.dataframe(pd.DataFrame(meta["tabs"]), hide_index=True, use_container_width=True)
+        if REPLICA_PATH:
+            box = _replica()
+            for tab in (TAB_NAME, RFM_TAB, USERS_TAB):
+                meta = box["replica"].meta(tab)
+                age = f"{time.time() - meta['synced_at']:.0f}s ago" if meta else "never"
+                st.write(f"**Replica {tab}:** v{meta.get('version', '-')} — synced {age}")
+            if box["error"]:
+                st.warning(f"Replica sync error: {box['error']}")
+        qs = quota_stats()
+        for kind in ("read", "write"):
+            b = qs[kind]
+            st.write(
+                f"**Sheets {kind}s:** {b['queued']} queued · {b['tokens']} tokens"
+                f" · avg wait {b['avg_wait']}s (p95 {b['p95_wait']}s) over the last {b['recent']} of {b['calls']} calls"
+                + (f" · paused {b['paused_for']}s" if b["paused_for"] else "")
+            )
+        if qs["quota_errors"]:
+            st.write(f"**Quota errors since start:** {qs['quota_errors']}")
+        per_minute = api_minutes()
+        if not per_minute.empty:
+            st.write(f"**Sheets requests per minute** (limits: {SHEETS_READS_PER_MIN} reads, "
+                     f"{SHEETS_WRITES_PER_MIN} writes; retries included)")
+            st.dataframe(per_minute, hide_index=True, use_container_width=True)
+            st.write("**Requests since start** by operation, caller, tab and session")
+            st.dataframe(api_totals(), hide_index=True, use_container_width=True)
+            st.download_button("Export request log (JSON lines)", api_log_jsonl(), file_name="sheets_requests.jsonl",
+                               mime="application/jsonl", key="diag_api_log_dl")
+        uncached = uncached_calls()
+        if not uncached.empty:
+            st.write("**Requests from reruns outside the cache layer** (each one is also logged as a warning)")
+            st.dataframe(uncached, hide_index=True, use_container_width=True)
+        uc = _users_cache()
+        if uc["by_token"] is not None:
+            st.write(f"**Users:** {len(uc['by_token'])} access tokens · loaded {time.time() - uc['loaded_at']:.0f}s ago"
+                     f" (refreshed every {USERS_TTL_SECS}s)")
+        if uc["error"]:
+            st.warning(f"Users reload failed; using the last good list: {uc['error']}")
+        fs = fragment_stats()
+        st.write(f"**Render cache:** {fs['cached']} fragments · {fs['hits']} hits / {fs['misses']} misses")
+        recent_runs, span_pct = span_stats()
+        if not recent_runs.empty:
+            st.write("**Recent reruns** (ms per span; rows in brackets; ✓ cached / ✗ loaded from Sheets; "
+                     f"Sheets requests logged above {RERUN_API_BUDGET} per rerun)")
+            st.dataframe(recent_runs, hide_index=True, use_container_width=True)
+            st.write("**Span timings**")
+            st.dataframe(span_pct, hide_index=True, use_container_width=True)
+        if st.button("Profile next rerun", key="diag_profile_btn"):
+            st.session_state["profile_next_rerun"] = True
+            st.caption("The next rerun of this page will be profiled.")
+        profiles = rerun_profiles()
+        if profiles:
+            at, text = profiles[-1]
+            with st.popover(f"Profile of the rerun at {dt.datetime.fromtimestamp(at):%H:%M:%S}"):
+                st.code(text)
+        if JOURNAL_PATH:
+            jbox = _journal()
+            st.write(f"**Write journal:** {journal_backlog()} pending")
+            if jbox["error"]:
+                st.warning(f"Journal replay is retrying: {jbox['error']}")
+            for f in jbox["journal"].failed(5):
+                st.write(f"Refused {f['kind']} of {f['entry_id']} ({f['tab']}): {f['error']}")
+        parts = archive_partitions()
+        arc = _archive_state()
+        st.write(
+            f"**Archive:** {len(parts)} partitions · {sum(p['Rows'] for p in parts)} rows"
+            + (f" · threads closed > {ARCHIVE_AFTER_DAYS} days are compacted daily" if ARCHIVE_AFTER_DAYS > 0 else " · compaction off")
+            + (" · compacting…" if arc["running"] else "")
+        )
+        if arc["error"]:
+            st.warning(f"Archive compaction error: {arc['error']}")
+        if is_editor and ARCHIVE_AFTER_DAYS > 0 and not arc["running"]:
+            if st.button("Compact archive now", key="diag_compact_btn"):
+                moved = _compact_all()
+                total = sum(n for per_tab in moved.values() for n in per_tab.values())
+                st.success(f"Moved {total} rows into {sum(len(m) for m in moved.values())} archive tabs.")
+
+        if user_role in ("admin",):
+            st.markdown("**Bulk import / export**")
+            io_tab = st.radio("Tab", [TAB_NAME, RFM_TAB], horizontal=True, key="bulk_io_tab")
+            upload = st.file_uploader("Import history (CSV)", type=["csv"], key="bulk_import_file")
+            if upload is not None and st.button("Import CSV", key="bulk_import_btn"):
+                status_line = st.empty()
+                res = import_csv(io_tab, upload, progress=lambda read, n: status_line.caption(
+                    f"{n} rows imported ({read} CSV rows read)…"))
+                st.success(
+                    f"Imported {res['imported']} rows into {io_tab}"
+                    + (f" (resumed after CSV row {res['resumed_from']})" if res["resumed_from"] else "")
+                    + (f"; {res['dropped']} rows without an ID skipped" if res["dropped"] else "") + "."
+                )
+            with_archive = st.checkbox("Include archived months", key="bulk_export_archive")
+            if st.button("Export CSV", key="bulk_export_btn"):
+                with tempfile.TemporaryFile("w+b") as tmp:
+                    text = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+                    n = export_csv(io_tab, text, include_archive=with_archive)
+                    text.flush()
+                    text.detach()
+                    tmp.seek(0)
+                    st.download_button(f"Download {n} rows", tmp.read(), file_name=f"{io_tab.lower()}_export.csv",
+                                       mime="text/csv", key="bulk_export_dl")
 
         colA, colB = st.columns(2)
         with colA:
             if st.button("Create/Repair tab & headers", key="diag_repair_headers_btn"):
-                ws = _open_entries_ws()
-                first_row = _with_backoff(ws.row_values, 1)
-                if not first_row or [c.strip() for c in first_row] != EXPECTED_HEADERS:
-                    _with_backoff(ws.update, "A1", [EXPECTED_HEADERS])
-                    try:
-                        _with_backoff(ws.freeze, rows=1)
-                    except Exception:
-                        pass
+                with sheets_layer():
+                    ws = _open_entries_ws()
+                    first_row = _with_backoff(ws.row_values, 1)
+                    if not first_row or [c.strip() for c in first_row] != EXPECTED_HEADERS:
+                        _with_backoff(ws.update, "A1", [EXPECTED_HEADERS])
+                        try:
+                            _with_backoff(ws.freeze, rows=1)
+                        except Exception:
+                            pass
                 st.success(f"'{TAB_NAME}' tab ready with headers.")
         with colB:
             if st.button("Run write test", key="diag_write_test_btn"):
@@ -1464,12 +3887,29 @@ with st.expander("Sheet Diagnostics", expanded=False):
             "- Network/credentials issue."
         )
 
-# CSV backup
+# Expander bodies run on every rerun, even collapsed: the checks only run while switched on
+with st.expander("Sheet Diagnostics", expanded=False):
+    if st.toggle("Load diagnostics", key="diag_open",
+                 help="Reads spreadsheet info (cached) and builds the quota, cache and timing tables on each rerun while on."):
+        render_diagnostics()
+    else:
+        st.caption("Switch on to see spreadsheet info, Sheets quota and request logs, cache and rerun timings.")
+
+# Backup (Entries + RFM), built only when asked for
 st.divider()
 try:
-    csv_bytes = pd.DataFrame(df).to_csv(index=False).encode("utf-8")
-    st.download_button("Download CSV (backup)", csv_bytes,
-                       file_name="turnover_log.csv", mime="text/csv",
-                       use_container_width=True, key="download_csv_btn")
-except Exception:
-    pass
+    b1, b2 = st.columns([1, 2])
+    with b1:
+        backup_fmt = st.selectbox("Backup format", BACKUP_FORMATS, key="backup_fmt", label_visibility="collapsed")
+    with b2:
+        if st.button("Prepare backup (Entries + RFM)", use_container_width=True, key="backup_prepare_btn"):
+            st.session_state["backup_key"] = backup_artifact(backup_fmt)
+        art = _backup_cache()["artifacts"].get(st.session_state.get("backup_key"))
+        if art:
+            st.download_button(f"Download backup ({art['rows'][TAB_NAME]} entries, {art['rows'][RFM_TAB]} RFMs)",
+                               art["data"], file_name=art["name"], mime="application/zip",
+                               use_container_width=True, key="download_csv_btn")
+except Exception as e:
+    st.caption(f"Backup unavailable: {e}")
+
+end_rerun()
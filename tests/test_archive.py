@@ -0,0 +1,70 @@
+"""
+Archive compaction against the in-memory Sheets fake (no credentials needed):
+
+    python -m unittest discover -s tests -t .
+"""
+import datetime as dt
+import io
+import unittest
+
+import streamlit as st
+from streamlit.logger import set_log_level
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from benchmarks.run import DEFAULT_SETTINGS, load_app
+from benchmarks.synthetic import ENTRY_HEADERS, RFM_HEADERS
+
+def _entry(wo: str, n: int, day: str, status: str) -> list:
+    return [wo, f"WO {wo}", "Done" if status == "Completed" else "", day, "JOW General", status, "",
+            f"E{wo}-{n}", f"{day}T08:{n:02d}:00"]
+
+class CompactionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        set_log_level("error")
+        cls.app = load_app(DEFAULT_SETTINGS)
+
+    def setUp(self):
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        today = dt.date.today().isoformat()
+        self.entries = [
+            _entry("100", 1, "2025-02-03", "WIP"), _entry("100", 2, "2025-02-04", "Completed"),
+            _entry("101", 1, "2025-02-10", "RTS"),
+            _entry("102", 1, "2025-03-05", "Completed"),
+            _entry("200", 1, today, "WIP"), _entry("201", 1, today, "Completed"),
+        ]
+        self.book = FakeSpreadsheet({"Entries": [ENTRY_HEADERS] + self.entries, "RFM": [RFM_HEADERS]})
+        client = FakeClient(self.book)
+        self.app.get_gc = lambda *a, **k: client
+
+    def _feb(self):
+        return self.app.archive_frame("Entries", dt.date(2025, 2, 1), dt.date(2025, 2, 28))
+
+    def test_compacted_rows_are_searchable_and_exported_right_away(self):
+        app = self.app
+        app.archive_partitions()  # a manifest read cached before compaction
+        moved = app.compact_archive("Entries", older_than_days=30)
+        self.assertEqual(moved, {"Entries 2025-02": 3, "Entries 2025-03": 1})
+        self.assertEqual(len(self.book.worksheet("Entries").get_all_values()), 3)  # header + today's rows
+
+        self.assertEqual(sorted(self._feb()["EntryID"]), ["E100-1", "E100-2", "E101-1"])
+        out = io.StringIO()
+        self.assertEqual(app.export_csv("Entries", out, include_archive=True), len(self.entries))
+
+    def test_widened_partition_is_reread(self):
+        app = self.app
+        app.compact_archive("Entries", older_than_days=30)
+        self.assertEqual(len(self._feb()), 3)  # caches the partition's frame
+
+        self.book.worksheet("Entries").append_rows([_entry("103", 1, "2025-02-20", "Completed")])
+        app._sync_state("Entries")["synced_at"] = 0.0
+        moved = app.compact_archive("Entries", older_than_days=30)
+        self.assertEqual(moved, {"Entries 2025-02": 1})
+        self.assertEqual(sorted(self._feb()["EntryID"]), ["E100-1", "E100-2", "E101-1", "E103-1"])
+        feb = next(p for p in app.archive_partitions("Entries") if p["Tab"] == "Entries 2025-02")
+        self.assertEqual(feb["Rows"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Write-ahead journal replay (JOURNAL_PATH) against the in-memory Sheets fake:
+
+    python -m unittest discover -s tests -t .
+"""
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+
+import streamlit as st
+from streamlit.logger import set_log_level
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from benchmarks.run import DEFAULT_SETTINGS, load_app
+from benchmarks.synthetic import ENTRY_HEADERS, RFM_HEADERS
+from write_journal import Journal
+
+def _entry(wo: str, n: int, status: str = "WIP") -> list:
+    return [wo, f"WO {wo}", "", "2025-02-03", "JOW General", status, "", f"E{wo}-{n}", f"2025-02-03T08:{n:02d}:00"]
+
+class JournalReplayTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        set_log_level("error")
+        cls.app = load_app(DEFAULT_SETTINGS)
+
+    def setUp(self):
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "journal.db")
+        self.app.JOURNAL_PATH = self.path
+        self.addCleanup(setattr, self.app, "JOURNAL_PATH", None)
+        rows = [_entry("100", 1), _entry("100", 2, "RTS"), _entry("101", 1)]
+        self.book = FakeSpreadsheet({"Entries": [ENTRY_HEADERS] + rows, "RFM": [RFM_HEADERS]})
+        self.ws = self.book.worksheet("Entries")
+        client = FakeClient(self.book)
+        self.app.get_gc = lambda *a, **k: client
+        self.journal = Journal(self.path)
+
+    def _restart(self) -> dict:
+        """What _journal() builds after a restart, minus the replayer thread (the tests replay by hand)."""
+        return {"journal": Journal(self.path), "wake": threading.Event(), "waiters": {},
+                "error": None, "lock": threading.Lock()}
+
+    def _state(self, seq: int) -> str:
+        return self.journal.conn.execute("SELECT state FROM journal WHERE seq = ?", (seq,)).fetchone()[0]
+
+    def test_append_that_landed_before_a_restart_is_marked_done(self):
+        row = _entry("102", 1)
+        seq, _ = self.journal.record("append", "Entries", "E102-1", row)
+        self.ws.rows.append(row)   # written, but the process died before marking it done
+        box = self._restart()
+        self.app.load_df()
+        self.book.reset_calls()
+        self.assertEqual(self.app._replay_batch(box), 1)
+        self.assertNotIn("append_rows", self.book.calls)
+        self.assertEqual(self._state(seq), "done")
+        self.assertEqual([r[7] for r in self.ws.rows].count("E102-1"), 1)
+
+    def test_pending_append_is_written_once(self):
+        seq, _ = self.journal.record("append", "Entries", "E102-1", _entry("102", 1))
+        self.assertEqual(self.journal.record("append", "Entries", "E102-1", _entry("102", 1)), (seq, "pending"))
+        box = self._restart()
+        self.assertEqual(self.app._replay_batch(box), 1)
+        self.assertEqual(self.app._replay_batch(box), 0)
+        self.assertEqual(self._state(seq), "done")
+        self.assertEqual(self.book.calls["append_rows"], 1)
+        self.assertEqual([r[7] for r in self.ws.rows].count("E102-1"), 1)
+
+    def test_newer_edit_of_a_pending_edit_rewrites_it(self):
+        seq, _ = self.journal.record("update", "Entries", "E100-1", _entry("100", 1, "RTS"), 2, "E100-1")
+        taken = self.journal.pending()   # being replayed when the newer edit comes in
+        newer = _entry("100", 1, "Completed")
+        self.assertEqual(self.journal.record("update", "Entries", "E100-1", newer, 2, "E100-1"), (seq, "pending"))
+        self.assertEqual([e["values"] for e in self.journal.pending()], [newer])
+
+        self.journal.mark_done(taken)    # the stale payload must not close the entry
+        self.assertEqual(self._state(seq), "pending")
+        self.assertEqual(self.app._replay_batch(self._restart()), 1)
+        self.assertEqual(self._state(seq), "done")
+        self.assertEqual(self.ws.rows[1][5], "Completed")
+
+    def test_refused_row_check_marks_the_entry_failed(self):
+        self.ws.rows[2][7] = "E999-1"    # the edited entry is gone from the sheet
+        seq, _ = self.journal.record("update", "Entries", "E100-2", _entry("100", 2, "Completed"), 3, "E100-2")
+        box = self._restart()
+        waiter = Future()
+        box["waiters"][seq] = [waiter]
+        self.assertEqual(self.app._replay_batch(box), 1)
+        self.assertEqual(self._state(seq), "failed")
+        self.assertIsInstance(waiter.exception(timeout=0), ValueError)
+        self.assertEqual(self.journal.backlog(), 0)
+        self.assertEqual([f["seq"] for f in self.journal.failed()], [seq])
+
+        self.book.reset_calls()
+        self.assertEqual(self.app._replay_batch(box), 0)   # not retried
+        self.assertEqual(self.book.calls, {})
+        self.assertEqual(self.ws.rows[2][5], "RTS")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Local SQLite replica (REPLICA_PATH) kept current row by row, against the in-memory Sheets fake:
+
+    python -m unittest discover -s tests -t .
+"""
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+import streamlit as st
+from streamlit.logger import set_log_level
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from benchmarks.run import DEFAULT_SETTINGS, load_app
+from benchmarks.synthetic import ENTRY_HEADERS, RFM_HEADERS
+
+def _entry(wo: str, n: int, status: str = "WIP") -> list:
+    return [wo, f"WO {wo}", "", "2025-02-03", "JOW General", status, "", f"E{wo}-{n}", f"2025-02-03T08:{n:02d}:00"]
+
+class ReplicaTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        set_log_level("error")
+        cls.app = load_app(DEFAULT_SETTINGS)
+        cls.app.REPLICA_SYNC_SECS = 3600  # the tests drive _replica_mirror themselves
+
+    def setUp(self):
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.app.REPLICA_PATH = os.path.join(tmp.name, "replica.db")
+        self.addCleanup(setattr, self.app, "REPLICA_PATH", None)
+        rows = [_entry("100", 1), _entry("100", 2, "RTS"), _entry("101", 1)]
+        self.book = FakeSpreadsheet({"Entries": [ENTRY_HEADERS] + rows, "RFM": [RFM_HEADERS]})
+        client = FakeClient(self.book)
+        self.app.get_gc = lambda *a, **k: client
+
+        self.box = self.app._replica()
+        deadline = time.time() + 10
+        while self.box["replica"].version("Users") is None and time.time() < deadline:
+            time.sleep(0.01)  # the worker's first full copy of every tab
+        self.assertIsNone(self.box["error"])
+        self.copies, self.reads = self._count("replace_tab"), self._count("frame")
+        self.app.load_df()
+
+    def _count(self, name: str) -> list:
+        rep, calls = self.box["replica"], []
+        fn = getattr(rep, name)
+        setattr(rep, name, lambda tab, *a: (calls.append(tab), fn(tab, *a))[1])
+        return calls
+
+    def _assert_matches_replica(self, frame: pd.DataFrame) -> None:
+        """The patched frame equals what a fresh read of the SQLite table gives."""
+        reread = self.app._type_frame(self.box["replica"].frame("Entries"))
+        pd.testing.assert_frame_equal(self.app._sheet_text(frame), self.app._sheet_text(reread))
+
+    def test_writes_patch_the_frame_read_back_earlier(self):
+        app = self.app
+        self.assertEqual(self.reads, ["Entries"])
+        app._write("append", "Entries", _entry("102", 1))
+        app._write("update", "Entries", _entry("100", 1, "Completed"), rownum=2, expect_entry="E100-1")
+        frame = app.load_df()
+        self.assertEqual(self.reads, ["Entries"])   # not re-read from SQLite
+        self.assertEqual(self.copies, [])
+        self.assertEqual(frame.loc[5, "EntryID"], "E102-1")
+        self.assertEqual(frame.loc[2, "Status"], "Completed")
+        self.assertEqual(app.latest_row("Entries", "100")[1]["Status"], "RTS")
+        self._assert_matches_replica(frame)
+
+    def test_delta_synced_append_is_upserted(self):
+        app = self.app
+        self.book.worksheet("Entries").rows.append(_entry("103", 1))
+        app._sync_state("Entries")["synced_at"] = 0.0
+        app._replica_mirror(self.box, "Entries")
+        frame = app.load_df()
+        self.assertEqual(self.copies, [])
+        self.assertEqual(self.reads, ["Entries"])
+        self.assertEqual(frame.loc[5, "EntryID"], "E103-1")
+        self._assert_matches_replica(frame)
+
+    def test_full_reload_copies_the_tab_again(self):
+        app = self.app
+        del self.book.worksheet("Entries").rows[2]
+        app._sync_state("Entries")["synced_at"] = 0.0
+        app._replica_mirror(self.box, "Entries")
+        frame = app.load_df()
+        self.assertEqual(self.copies, ["Entries"])
+        self.assertEqual(self.reads, ["Entries", "Entries"])
+        self.assertEqual(list(frame["EntryID"]), ["E100-1", "E101-1"])
+
+if __name__ == "__main__":
+    unittest.main()
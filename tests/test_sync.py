@@ -0,0 +1,80 @@
+"""
+Incremental delta sync of the Entries tab against the in-memory Sheets fake:
+
+    python -m unittest discover -s tests -t .
+"""
+import unittest
+
+import pandas as pd
+import streamlit as st
+from streamlit.logger import set_log_level
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from benchmarks.run import DEFAULT_SETTINGS, load_app
+from benchmarks.synthetic import ENTRY_HEADERS, RFM_HEADERS
+
+def _entry(wo: str, n: int, status: str = "WIP") -> list:
+    return [wo, f"WO {wo}", "", "2025-02-03", "JOW General", status, "", f"E{wo}-{n}", f"2025-02-03T08:{n:02d}:00"]
+
+class DeltaSyncTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        set_log_level("error")
+        cls.app = load_app(DEFAULT_SETTINGS)
+
+    def setUp(self):
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        rows = [_entry("100", 1), _entry("100", 2, "RTS"), _entry("101", 1), _entry("102", 1)]
+        self.book = FakeSpreadsheet({"Entries": [ENTRY_HEADERS] + rows, "RFM": [RFM_HEADERS]})
+        self.ws = self.book.worksheet("Entries")
+        client = FakeClient(self.book)
+        self.app.get_gc = lambda *a, **k: client
+        self.app.load_df()
+        self.book.reset_calls()
+
+    def _reload(self) -> pd.DataFrame:
+        """Next load_df() after the snapshot's TTL ran out."""
+        self.app._sync_state("Entries")["synced_at"] = 0.0
+        return self.app.load_df()
+
+    def _assert_matches_cold_load(self, frame: pd.DataFrame) -> None:
+        st.cache_resource.clear()
+        cold = self.app.load_df()
+        pd.testing.assert_frame_equal(self.app._sheet_text(frame), self.app._sheet_text(cold))
+
+    def test_external_append_is_fetched_as_tail(self):
+        self.ws.rows.append(_entry("103", 1))
+        version = self.app.tab_version("Entries")
+        frame = self._reload()
+        self.assertEqual(self.book.calls, {"batch_get": 1})  # key columns + tail, no full read
+        self.assertEqual(self.app.tab_version("Entries"), version + 1)
+        self.assertEqual(frame.loc[6, "EntryID"], "E103-1")
+        self._assert_matches_cold_load(frame)
+
+    def test_unchanged_sheet_keeps_the_version(self):
+        version = self.app.tab_version("Entries")
+        self._reload()
+        self.assertEqual(self.book.calls, {"batch_get": 1})
+        self.assertEqual(self.app.tab_version("Entries"), version)
+
+    def test_deleted_row_above_the_tail_forces_full_reload(self):
+        # Same row count as before plus one: splicing the tail would keep the deleted row
+        del self.ws.rows[2]
+        self.ws.rows.append(_entry("103", 1))
+        frame = self._reload()
+        self.assertIn("fetch_sheet_metadata", self.book.calls)
+        self.assertIn("get", self.book.calls)
+        self.assertNotIn("E100-2", set(frame["EntryID"]))
+        self._assert_matches_cold_load(frame)
+
+    def test_edited_key_cell_forces_full_reload(self):
+        self.ws.rows[1][8] = "2025-02-04T09:00:00"   # CreatedAt of row 2
+        frame = self._reload()
+        self.assertIn("get", self.book.calls)
+        self.assertEqual(frame.loc[2, "CreatedAt"], pd.Timestamp("2025-02-04T09:00:00"))
+        self._assert_matches_cold_load(frame)
+
+if __name__ == "__main__":
+    unittest.main()
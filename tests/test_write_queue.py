@@ -0,0 +1,115 @@
+"""
+Batched, coalescing write queue against the in-memory Sheets fake:
+
+    python -m unittest discover -s tests -t .
+"""
+import threading
+import time
+import unittest
+
+import streamlit as st
+from streamlit.logger import set_log_level
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from benchmarks.run import DEFAULT_SETTINGS, load_app
+from benchmarks.synthetic import ENTRY_HEADERS, RFM_HEADERS
+
+def _entry(wo: str, n: int, status: str = "WIP") -> list:
+    return [wo, f"WO {wo}", "", "2025-02-03", "JOW General", status, "", f"E{wo}-{n}", f"2025-02-03T08:{n:02d}:00"]
+
+class WriteQueueTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        set_log_level("error")
+        cls.app = load_app(DEFAULT_SETTINGS)
+
+    def setUp(self):
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        rows = [_entry("100", 1), _entry("100", 2, "RTS"), _entry("101", 1)]
+        self.book = FakeSpreadsheet({"Entries": [ENTRY_HEADERS] + rows, "RFM": [RFM_HEADERS]})
+        self.ws = self.book.worksheet("Entries")
+        client = FakeClient(self.book)
+        self.app.get_gc = lambda *a, **k: client
+        self.app.load_df()
+        self.q = self.app._write_queue()
+        self.book.reset_calls()
+
+    def tearDown(self):
+        # Let this test's batch finish before the next test's sheet is opened
+        deadline = time.time() + 10
+        while (self.q["pending"] or self.q["inflight"]) and time.time() < deadline:
+            time.sleep(0.01)
+
+    def _submit_together(self, *writes) -> list:
+        """Queue several writes before the flusher can take any of them (one batch)."""
+        with self.q["cond"]:
+            return [self.app._submit_write(*w) for w in writes]
+
+    def _entry_ids(self) -> list:
+        return [r[7] for r in self.ws.rows[1:]]
+
+    def test_repeated_append_while_pending_writes_one_row(self):
+        row = _entry("102", 1)
+        first, again = self._submit_together(("append", "Entries", row), ("append", "Entries", list(row)))
+        self.assertIs(again, first)
+        self.assertEqual(first.result(timeout=10), 5)
+        self.assertEqual(self.book.calls, {"append_rows": 1})
+        self.assertEqual(self._entry_ids().count("E102-1"), 1)
+        self.assertEqual(self.q["stats"]["deduped"], 1)
+
+    def test_repeated_append_while_in_flight_writes_one_row(self):
+        entered, release = threading.Event(), threading.Event()
+        append_rows = self.ws.append_rows
+
+        def blocking_append_rows(*args, **kwargs):
+            entered.set()
+            release.wait(10)
+            return append_rows(*args, **kwargs)
+        self.ws.append_rows = blocking_append_rows
+
+        first = self.app._submit_write("append", "Entries", _entry("102", 1))
+        self.assertTrue(entered.wait(10))
+        again = self.app._submit_write("append", "Entries", _entry("102", 1))
+        release.set()
+        self.assertIs(again, first)
+        self.assertEqual(first.result(timeout=10), 5)
+        self.assertEqual(self._entry_ids().count("E102-1"), 1)
+
+    def test_retry_of_a_written_append_returns_its_row(self):
+        first = self.app._submit_write("append", "Entries", _entry("102", 1))
+        self.assertEqual(first.result(timeout=10), 5)
+        again = self.app._submit_write("append", "Entries", _entry("102", 1))
+        self.assertIs(again, first)
+        self.assertEqual(self.book.calls, {"append_rows": 1})
+        self.assertEqual(self._entry_ids().count("E102-1"), 1)
+
+    def test_newer_edit_of_a_pending_row_replaces_the_older_one(self):
+        older, newer = self._submit_together(
+            ("update", "Entries", _entry("100", 1, "RTS"), 2, "E100-1"),
+            ("update", "Entries", _entry("100", 1, "Completed"), 2, "E100-1"),
+        )
+        self.assertIs(newer, older)
+        self.assertEqual(older.result(timeout=10), 2)
+        self.assertEqual(self.book.calls, {"batch_get": 1, "batch_update": 1})
+        self.assertEqual(self.ws.rows[1][5], "Completed")
+        self.assertEqual(self.app.load_df().loc[2, "Status"], "Completed")
+
+    def test_failed_row_check_refuses_only_the_moved_rows(self):
+        self.ws.rows[2][7] = "E999-1"   # row 3 was replaced on the sheet meanwhile
+        kept, moved, unchecked = self._submit_together(
+            ("update", "Entries", _entry("100", 1, "Completed"), 2, "E100-1"),
+            ("update", "Entries", _entry("100", 2, "Completed"), 3, "E100-2"),
+            ("update", "Entries", _entry("101", 1, "Completed"), 4, None),
+        )
+        self.assertEqual(kept.result(timeout=10), 2)
+        self.assertEqual(unchecked.result(timeout=10), 4)
+        with self.assertRaises(ValueError):
+            moved.result(timeout=10)
+        self.assertEqual(self.book.calls, {"batch_get": 1, "batch_update": 1})
+        self.assertEqual([r[5] for r in self.ws.rows[1:]], ["Completed", "RTS", "Completed"])
+        self.assertEqual(self.ws.rows[2][7], "E999-1")
+
+if __name__ == "__main__":
+    unittest.main()
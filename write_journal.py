@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import threading
+import time
+
+class Journal:
+    """
+    Durable local write-ahead log of Sheets writes. Every append/edit is stored
+    here before it is sent, and stays 'pending' until the replayer has written
+    it; entries are replayed in seq order. Keyed by (tab, EntryID): recording an
+    append that is already journaled returns the existing entry, and a newer
+    edit of a pending edit replaces its values in place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS journal ("
+                    "seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, tab TEXT, entry_id TEXT, "
+                    "rownum INTEGER, expect TEXT, payload TEXT, state TEXT DEFAULT 'pending', "
+                    "attempts INTEGER DEFAULT 0, error TEXT, created_at REAL, done_at REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_journal_state ON journal (state, seq)")
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_journal_entry ON journal (tab, entry_id)")
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # an acknowledged write must survive a crash
+            self._local.conn = conn
+        return conn
+
+    # ----- recording (request threads) -----
+
+    def record(self, kind: str, tab: str, entry_id: str, values: list,
+               rownum: int | None = None, expect: str | None = None) -> tuple[int, str]:
+        """Journal one write; returns (seq, state) of the entry that now covers it."""
+        payload = json.dumps(list(values))
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                if entry_id:
+                    row = conn.execute(
+                        "SELECT seq, state FROM journal WHERE kind = ? AND tab = ? AND entry_id = ? "
+                        "AND state != 'failed' ORDER BY seq DESC LIMIT 1",
+                        (kind, tab, entry_id),
+                    ).fetchone()
+                    if row and kind == "append":
+                        return row[0], row[1]           # retry of the same append
+                    if row and row[1] == "pending":     # newer edit of a pending edit
+                        conn.execute(
+                            "UPDATE journal SET payload = ?, rownum = ?, expect = ? WHERE seq = ?",
+                            (payload, rownum, expect, row[0]),
+                        )
+                        return row[0], "pending"
+                cur = conn.execute(
+                    "INSERT INTO journal (kind, tab, entry_id, rownum, expect, payload, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (kind, tab, entry_id, rownum, expect, payload, time.time()),
+                )
+                return cur.lastrowid, "pending"
+
+    # ----- replay (replayer thread) -----
+
+    def pending(self, limit: int = 50) -> list[dict]:
+        """Oldest pending entries first."""
+        rows = self.conn.execute(
+            "SELECT seq, kind, tab, entry_id, rownum, expect, payload, attempts FROM journal "
+            "WHERE state = 'pending' ORDER BY seq LIMIT ?", (limit,)
+        ).fetchall()
+        return [
+            {"seq": r[0], "kind": r[1], "tab": r[2], "entry_id": r[3], "rownum": r[4],
+             "expect": r[5], "payload": r[6], "values": json.loads(r[6]), "attempts": r[7]}
+            for r in rows
+        ]
+
+    def _set(self, sql: str, params: list) -> None:
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                conn.executemany(sql, params)
+
+    def mark_done(self, entries: list[dict]) -> None:
+        """Mark replayed entries done, unless a newer edit replaced their values meanwhile."""
+        now = time.time()
+        self._set("UPDATE journal SET state = 'done', done_at = ?, error = NULL WHERE seq = ? AND payload = ?",
+                  [(now, e["seq"], e["payload"]) for e in entries])
+
+    def mark_retry(self, seqs: list, error: str) -> None:
+        self._set("UPDATE journal SET attempts = attempts + 1, error = ? WHERE seq = ?",
+                  [(error, s) for s in seqs])
+
+    def mark_failed(self, seq: int, error: str) -> None:
+        """Give up on an entry that can never apply (e.g. its row is gone); kept for review."""
+        self._set("UPDATE journal SET state = 'failed', error = ?, done_at = ? WHERE seq = ?",
+                  [(error, time.time(), seq)])
+
+    def prune(self, keep_secs: float) -> None:
+        """Forget replayed entries older than keep_secs (failed ones are kept)."""
+        self._set("DELETE FROM journal WHERE state = 'done' AND done_at < ?", [(time.time() - keep_secs,)])
+
+    # ----- status -----
+
+    def backlog(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM journal WHERE state = 'pending'").fetchone()[0]
+
+    def failed(self, limit: int = 20) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT seq, kind, tab, entry_id, error FROM journal WHERE state = 'failed' "
+            "ORDER BY seq DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [{"seq": r[0], "kind": r[1], "tab": r[2], "entry_id": r[3], "error": r[4]} for r in rows]